@@ -0,0 +1,72 @@
+# bench_bulk_export.py
+# 목적: jinwook/bulk_export.py의 일괄 내보내기 처리량이
+#       "요청 지연 x 문서 수"(직렬)가 아니라 분당 쿼터에 의해 결정되는지 확인한다.
+#       중간 실패 후 재실행 시 남은 항목만 처리되는지도 확인한다. (로컬 Docs API 대역 서버 사용)
+#
+# 실행:
+#   python benchmarks/bench_bulk_export.py --docs 60 --latency 0.3 --quota 600 --workers 16
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stubs.docs_api import start_docs_stub
+
+
+def _items(n: int, tag: str) -> list:
+    return [{
+        "key": f"{tag}-{i}",
+        "title": f"지원자 {i}",
+        "content": f"[자기소개서]\n지원자 {i}의 자기소개서 본문\n\n[면접 대비 질문 리스트]\n1. 질문\n",
+    } for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Docs 일괄 내보내기 벤치마크")
+    parser.add_argument("--docs", type=int, default=60, help="내보낼 문서 수")
+    parser.add_argument("--latency", type=float, default=0.3, help="Docs API 요청당 지연(초)")
+    parser.add_argument("--quota", type=int, default=600, help="분당 요청 한도 (스텁과 클라이언트 모두)")
+    parser.add_argument("--workers", type=int, default=16, help="동시 작업 수")
+    args = parser.parse_args()
+
+    docs = start_docs_stub(latency=args.latency, quota_per_minute=args.quota)
+    workdir = tempfile.mkdtemp(prefix="bulk-export-")
+    os.environ["GOOGLE_DOCS_API_ENDPOINT"] = docs.url
+    os.environ["GOOGLE_DOCS_SYNC_DIR"] = os.path.join(workdir, "sync")
+
+    # 환경변수를 설정한 뒤에 import 해야 스텁 주소를 사용합니다.
+    from jinwook.bulk_export import export_documents
+
+    n = args.docs
+    requests_per_doc = 2  # create + batchUpdate
+    serialized = n * requests_per_doc * args.latency
+    quota_bound = n * requests_per_doc / (args.quota / 60)
+    print(f"🏁 일괄 내보내기 {n}건 | 요청 지연 {args.latency}s | 쿼터 {args.quota}/분")
+    print(f"   직렬 처리 예상 {serialized:.1f}s / 쿼터 하한 {quota_bound:.1f}s")
+
+    try:
+        for workers in (1, args.workers):
+            summary = export_documents(_items(n, f"w{workers}"), workers=workers, quota_per_minute=args.quota)
+            print(f"workers={workers:<3d} 완료 {len(summary['done'])}건 | {summary['elapsed']:6.2f}s | "
+                  f"{len(summary['done']) / summary['elapsed']:5.1f} docs/s | 재시도 {summary['retried']}회")
+
+        # 재개(resume): 절반만 끝난 매니페스트를 만든 뒤 다시 실행
+        manifest = os.path.join(workdir, "resume.manifest.jsonl")
+        items = _items(n, "resume")
+        export_documents(items[: n // 2], workers=args.workers, quota_per_minute=args.quota, manifest_path=manifest)
+        before = docs.backend.calls["create"]
+        start = time.perf_counter()
+        summary = export_documents(items, workers=args.workers, quota_per_minute=args.quota, manifest_path=manifest)
+        print(f"resume       이전 완료 {summary['skipped']}건 건너뜀 | 새로 생성 {docs.backend.calls['create'] - before}건 | "
+              f"{time.perf_counter() - start:.2f}s")
+        print(f"   Docs 호출: {docs.backend.calls}")
+    finally:
+        docs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench_docs_server_load.py
+# 목적: GoogleDocsMCPServer에 N개의 도구 호출을 동시에 보냈을 때
+#       핸들러가 서로를 막지 않고 병렬로 처리되는지 측정한다.
+#       (로컬 Docs API / OpenAI 대역 서버 사용, 네트워크·비용 없음)
+#
+# 실행:
+#   python benchmarks/bench_docs_server_load.py --concurrency 16 --docs-latency 0.2 --llm-latency 0.5
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stubs.docs_api import start_docs_stub
+from benchmarks.stubs.openai_api import start_openai_stub
+
+
+async def _run_concurrent(tool, args_list: list) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*[tool.ainvoke(args) for args in args_list])
+    elapsed = time.perf_counter() - start
+    errors = [r for r in results if "오류 발생" in r]
+    if errors:
+        print(f"   ⚠️ 실패 {len(errors)}건: {errors[0][:200]}")
+    return elapsed
+
+
+def _report(name: str, n: int, elapsed: float, serialized: float):
+    print(f"{name:<18} 호출 {n:3d}개 | 총 {elapsed:6.2f}s | 처리량 {n / elapsed:6.1f} calls/s | "
+          f"직렬 처리 예상 {serialized:6.2f}s (x{serialized / elapsed:4.1f})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="GoogleDocsMCPServer 동시 호출 부하 벤치마크")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 보낼 도구 호출 수")
+    parser.add_argument("--docs-latency", type=float, default=0.2, help="Docs API 요청당 지연(초)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="OpenAI 요청당 지연(초)")
+    args = parser.parse_args()
+
+    docs = start_docs_stub(latency=args.docs_latency)
+    llm = start_openai_stub(latency=args.llm_latency, reply="[자기소개서 문항 1] 스텁 응답")
+    os.environ["GOOGLE_DOCS_API_ENDPOINT"] = docs.url
+    os.environ["OPENAI_BASE_URL"] = f"{llm.url}v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ.setdefault("GOOGLE_DOCS_MAX_WORKERS", str(args.concurrency))
+
+    # 환경변수를 설정한 뒤에 import 해야 스텁 주소를 사용합니다.
+    from jinwook.googlmcp import GoogleDocsMCPServer
+    from pilsang.inprocess_mcp import load_inprocess_tools
+
+    server = GoogleDocsMCPServer()
+    tools = {t.name: t for t in await load_inprocess_tools(server.server)}
+    n = args.concurrency
+
+    print(f"🏁 GoogleDocsMCPServer 부하 테스트 (동시 {n}개)")
+    try:
+        doc_ids = [docs.backend.create(f"doc {i}")["documentId"] for i in range(n)]
+        elapsed = await _run_concurrent(tools["read_google_doc"], [{"document_id": d} for d in doc_ids])
+        _report("read_google_doc", n, elapsed, n * args.docs_latency)
+
+        # read_google_docs = 한 번의 도구 호출로 n개 문서를 동시에 읽음 (두 번째는 revision 확인만)
+        for label in ("read_google_docs", "  (재호출, 캐시)"):
+            before = dict(docs.backend.calls)
+            elapsed = await _run_concurrent(tools["read_google_docs"], [{"document_ids": doc_ids}])
+            _report(label, n, elapsed, n * args.docs_latency)
+            print(f"   get {docs.backend.calls['get'] - before['get']}회 / "
+                  f"revision 확인 {docs.backend.calls['get.revision'] - before['get.revision']}회")
+
+        # create_documents = LLM 2회 + Docs create + batchUpdate
+        elapsed = await _run_concurrent(tools["create_documents"], [{
+            "form_template": "[자기소개서 문항 1] 지원 동기",
+            "cover_letter_prompt": f"지원자 {i}",
+            "interview_prep_prompt": "면접 질문 5개",
+            "doc_title": f"bench {i}",
+        } for i in range(n)])
+        _report("create_documents", n, elapsed, n * (2 * args.llm_latency + 2 * args.docs_latency))
+        print(f"   Docs 호출: {docs.backend.calls} / OpenAI 호출: {llm.backend.calls}")
+    finally:
+        docs.stop()
+        llm.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# bench_import_time.py
+# 목적: 워크플로우 진입점(import)이 무거운 의존성(LLM SDK, 벡터 DB, 문서 로더, MCP 어댑터, Google API)을
+#       불러오지 않고 예산(ms) 안에 끝나는지 확인한다. `python -X importtime` 결과를 모듈별로 집계한다.
+#       예산을 넘거나 지연 import 대상 모듈이 import 시점에 올라오면 종료 코드 1 (CI 게이트로 사용)
+#
+# 실행:
+#   python benchmarks/bench_import_time.py
+#   python benchmarks/bench_import_time.py --repeat 5 --budget pilsang.v_all=300 --top 15
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 처음 실제로 쓸 때까지 import하면 안 되는 무거운 패키지 (최상위 이름)
+HEAVY = ["openai", "langchain_openai", "langchain_chroma", "chromadb", "langchain_community",
+         "langchain_mcp_adapters", "googleapiclient", "langgraph", "langchain_core"]
+
+# 모듈: (예산 ms, import되면 안 되는 패키지)
+ENTRY_POINTS = {
+    "pilsang.v_all": (400, HEAVY),
+    "pilsang.batch_runner": (400, HEAVY),
+    "pilsang.tracing": (100, HEAVY),
+    "pilsang.output_sink": (150, HEAVY),
+    "mirim.hr_agent": (200, HEAVY),
+    "mirim.interview": (200, HEAVY),
+    # RAG 그래프 정의에 langgraph는 필요하지만, LLM/벡터 DB/로더는 setup_retriever / get_llm 에서 import
+    "jaebeom.rag": (1500, ["openai", "langchain_openai", "langchain_chroma", "chromadb", "langchain_community"]),
+}
+
+
+def measure(module: str) -> tuple:
+    """새 인터프리터에서 module을 import하고 (총 ms, {모듈: 누적 us}, 최상위 import 목록)을 돌려줍니다."""
+    # API 키 없이도 import가 되어야 하므로 키를 빼고 실행합니다.
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{result.stderr.strip().splitlines()[-1]}")
+
+    cumulative, top_level = {}, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        cumulative[name.strip()] = int(cum)
+        if depth == 1:
+            top_level.append((int(cum), name.strip()))
+    return cumulative[module] / 1000, cumulative, top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description="진입점 import 시간 / 지연 import 검사")
+    parser.add_argument("modules", nargs="*", help="검사할 모듈 (기본: ENTRY_POINTS 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈마다 반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS", help="예산 덮어쓰기")
+    parser.add_argument("--top", type=int, default=8, help="예산 초과 시 보여줄 무거운 import 수")
+    args = parser.parse_args()
+
+    budgets = {name: budget for name, (budget, _) in ENTRY_POINTS.items()}
+    for item in args.budget:
+        name, _, value = item.partition("=")
+        budgets[name] = float(value)
+
+    failed = False
+    print(f"{'module':<24}{'import(ms)':>12}{'budget':>10}  result")
+    for module in args.modules or list(ENTRY_POINTS):
+        runs = [measure(module) for _ in range(args.repeat)]
+        elapsed, cumulative, top_level = min(runs, key=lambda r: r[0])
+        budget = budgets.get(module)
+        forbidden = ENTRY_POINTS.get(module, (None, HEAVY))[1]
+        loaded = [name for name in forbidden if name in cumulative]
+
+        problems = []
+        if budget is not None and elapsed > budget:
+            problems.append("over budget")
+        if loaded:
+            problems.append("eager: " + ", ".join(loaded))
+        print(f"{module:<24}{elapsed:>12.1f}{budget if budget is not None else '-':>10}  {'; '.join(problems) or 'ok'}")
+        if problems:
+            failed = True
+            for cum, name in sorted(top_level, reverse=True)[:args.top]:
+                print(f"    {cum / 1000:>9.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# bench_mcp_transport.py
+# 목적: 파이썬 MCP 서버(jia/notion_server.py)의 도구 호출 지연을
+#       stdio(서브프로세스) 방식과 in-process 방식으로 비교한다.
+#
+# 실행:
+#   python benchmarks/bench_mcp_transport.py --calls 50
+#
+# 네트워크 비용을 빼고 transport 비용만 보기 위해 NOTION_API_KEY를 비우고
+# 존재하지 않는 미러 DB를 지정합니다. (search_notion이 즉시 에러 문자열을 반환)
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+NOTION_SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'jia', 'notion_server.py'))
+
+
+def _summary(name: str, load_s: float, samples: list) -> str:
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[max(0, int(len(samples_ms) * 0.95) - 1)]
+    return (
+        f"{name:<22} 도구 로드 {load_s * 1000:8.1f} ms | "
+        f"호출 평균 {statistics.mean(samples_ms):8.2f} ms | "
+        f"p50 {statistics.median(samples_ms):8.2f} ms | p95 {p95:8.2f} ms"
+    )
+
+
+async def _time_calls(tool, calls: int) -> list:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        await tool.ainvoke({"query": f"benchmark {i}"})
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_stdio(env: dict, calls: int, persistent: bool) -> str:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+    from langchain_mcp_adapters.tools import load_mcp_tools
+
+    config = {
+        "notion": {
+            "transport": "stdio",
+            "command": sys.executable,
+            "args": [NOTION_SCRIPT_PATH],
+            "env": {**env, "PATH": os.environ["PATH"], "PYTHONUNBUFFERED": "1"},
+        }
+    }
+    client = MultiServerMCPClient(config)
+
+    if persistent:
+        # 세션 하나를 열어 두고 재사용 (서브프로세스 1회 기동)
+        start = time.perf_counter()
+        async with client.session("notion") as session:
+            tools = await load_mcp_tools(session)
+            load_s = time.perf_counter() - start
+            samples = await _time_calls(tools[0], calls)
+        return _summary("stdio (세션 유지)", load_s, samples)
+
+    # v_all.py 기본 사용 방식: 도구 호출마다 세션(서브프로세스)을 새로 엶
+    start = time.perf_counter()
+    tools = await client.get_tools()
+    load_s = time.perf_counter() - start
+    samples = await _time_calls(tools[0], calls)
+    return _summary("stdio (호출마다 기동)", load_s, samples)
+
+
+async def bench_inprocess(env: dict, calls: int) -> str:
+    from pilsang.inprocess_mcp import HybridMCPClient
+
+    config = {"notion": {"transport": "inprocess", "target": "jia.notion_server:mcp", "env": env}}
+    start = time.perf_counter()
+    tools = await HybridMCPClient(config).get_tools()
+    load_s = time.perf_counter() - start
+    samples = await _time_calls(tools[0], calls)
+    return _summary("in-process", load_s, samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP transport 지연 비교 (stdio vs in-process)")
+    parser.add_argument("--calls", type=int, default=30, help="모드별 도구 호출 횟수")
+    parser.add_argument("--skip-per-call-stdio", action="store_true", help="호출마다 기동하는 stdio 모드 생략")
+    args = parser.parse_args()
+
+    missing_db = os.path.join(tempfile.mkdtemp(), "none.db")
+    os.environ["NOTION_MIRROR_DB"] = missing_db
+    os.environ.pop("NOTION_API_KEY", None)
+    env = {"NOTION_MIRROR_DB": missing_db}
+
+    print(f"🏁 MCP transport 벤치마크 (호출 {args.calls}회)")
+    print(await bench_inprocess(env, args.calls))
+    print(await bench_stdio(env, args.calls, persistent=True))
+    if not args.skip_per_call_stdio:
+        print(await bench_stdio(env, args.calls, persistent=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,362 @@
+# run_suite.py
+# 목적: 전체 워크플로우(pilsang/v_all.py 그래프)를 로컬 대역 서버(OpenAI 호환 / Google Docs / GitHub MCP) 위에서
+#       여러 번 실행해 성능을 잰다. 네트워크·비용 없이 같은 조건으로 반복 측정할 수 있다.
+#       - 노드별 지연 p50 / p95 (tracing의 노드 span), 동시 실행 수별 처리량(runs/s)과 실행 지연 p50 / p95
+#       - 최대 RSS, 진입점 import 시간 (bench_import_time.measure)
+#       결과는 benchmarks/results/<시각>.json 으로 저장하고, 기준선(--baseline)이 있으면 비교해서
+#       허용 범위(--tolerance)를 넘게 나빠진 지표가 있으면 종료 코드 1 (CI 게이트로 사용)
+#
+# 실행:
+#   python benchmarks/run_suite.py --concurrency 1,4,8 --runs 8 --llm-latency 0.2 --token-rate 200
+#   python benchmarks/run_suite.py --revise 2 --error-rate 0.1 --spike-rate 0.05  # HR 재작성 루프 + 429 / 지연 급증
+#   python benchmarks/run_suite.py --update-baseline            # 이번 결과를 기준선으로 저장
+#   python benchmarks/run_suite.py --compare OLD.json NEW.json  # 저장된 결과 두 개만 비교
+
+import io
+import os
+import sys
+import json
+import time
+import logging
+import asyncio
+import argparse
+import tempfile
+import platform
+import threading
+import contextlib
+import subprocess
+from collections import defaultdict, Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.bench_import_time import measure as measure_import
+from benchmarks.stubs.docs_api import start_docs_stub
+from benchmarks.stubs.openai_api import start_openai_stub
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+IMPORT_MODULES = ["pilsang.v_all", "pilsang.batch_runner"]
+# HR 검토 응답 형식 ([PASS] + 점수 줄). MCP / 면접 에이전트도 같은 응답을 받습니다.
+STUB_REPLY = "[PASS]\n[SCORES] ①=4 ②=4 ③=4 ④=4 ⑤=4\n[자기소개서 문항 1] 지원 동기\n스텁 응답입니다."
+# HR 검토 프롬프트에만 있는 문구. --revise N이면 이 요청에 [REVISE]를 N번 준 뒤 [PASS]
+HR_PROMPT_MARKER = "HR 관점에서 평가"
+# 노드 출력에 이 문자열이 있으면 노드 안에서 삼킨 오류로 셉니다. (노드는 예외 대신 오류 메시지를 출력하고 진행)
+ERROR_MARKERS = ("Agent Error", "MCP 에러", "Traceback")
+# 지연 지표는 이 값(ms)보다 적게 늘어난 경우 허용 범위 안으로 봅니다. (짧은 노드의 측정 잡음)
+MIN_LATENCY_DELTA_MS = 5.0
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KB, macOS는 바이트 단위
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class NodeTimes:
+    """tracing 리스너: 끝난 노드 span의 지연을 노드 이름별로 모읍니다."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(self, item: dict):
+        with self._lock:
+            if item["kind"] == "node":
+                self.samples[item["name"]].append(item["duration_ms"])
+            else:
+                self.calls[item["kind"]] += 1
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.calls.clear()
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: {"count": len(values), "p50_ms": round(percentile(values, 0.5), 1),
+                           "p95_ms": round(percentile(values, 0.95), 1)}
+                    for name, values in sorted(self.samples.items())}
+
+
+def hr_script(revisions: int) -> list:
+    """HR 검토에 [REVISE]를 revisions번 (점수를 올려 가며) 준 뒤 [PASS]를 주는 각본."""
+    replies = []
+    for i in range(revisions):
+        score = min(5, 2 + i)
+        replies.append(f"[REVISE]\n[SCORES] ①={score} ②={score} ③={score} ④={score} ⑤={score}\n"
+                       "[자기소개서 문항 1] 지원 동기\n경험의 수치와 본인 역할을 구체적으로 쓰십시오.")
+    return [{"endpoint": "responses", "match": HR_PROMPT_MARKER, "replies": replies + [STUB_REPLY]}]
+
+
+def configure_environment(args, workdir: str) -> list:
+    """대역 서버를 띄우고 워크플로우가 그쪽을 보도록 환경변수를 설정합니다. (pilsang 모듈 import 전에 호출)"""
+    llm = start_openai_stub(latency=args.llm_latency, reply=STUB_REPLY, token_rate=args.token_rate, tool_calls=True,
+                            script=hr_script(args.revise) if args.revise else None, error_rate=args.error_rate,
+                            retry_after=args.retry_after, spike_rate=args.spike_rate,
+                            spike_latency=args.spike_latency)
+    docs = start_docs_stub(latency=args.docs_latency)
+    os.environ.update({
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"{llm.url}v1",
+        "CV_EMBEDDING_CTX_CHECK": "0",
+        "GOOGLE_DOCS_API_ENDPOINT": docs.url,
+        "CV_DOCS_SINK": "google",
+        "GOOGLE_DOCS_SYNC_DIR": os.path.join(workdir, "doc_sync"),
+        "CV_GITHUB_MCP_TARGET": "benchmarks.stubs.github_mcp:mcp",
+        "CV_STUB_MCP_LATENCY": str(args.tool_latency),
+        "CV_OUTPUT_DIR": os.path.join(workdir, "output"),
+        "CV_CHECKPOINT_DB": os.path.join(workdir, "checkpoints.db"),
+        "CV_BLOB_DIR": os.path.join(workdir, "blobs"),
+        "CV_TOOL_CACHE_DIR": os.path.join(workdir, "tool_cache"),
+        "CV_TRACE_FILE": os.path.join(workdir, "spans.jsonl"),
+        "CV_CONVERGENCE_LOG": os.path.join(workdir, "convergence.jsonl"),
+        "CV_CASSETTE_MODE": "off",
+    })
+    os.environ.pop("LOCAL_REPOS_DIR", None)
+    return [llm, docs]
+
+
+async def run_level(execute_job, concurrency: int, runs: int, tag: str, nodes: NodeTimes) -> dict:
+    """runs개의 실행을 최대 concurrency개씩 동시에 돌리고 처리량 / 지연을 잽니다."""
+    limit = asyncio.Semaphore(concurrency)
+    log = io.StringIO()
+
+    async def one(i: int) -> dict:
+        async with limit:
+            return await execute_job({"candidate_id": f"{tag}-{i}", "github_id": "stub"})
+
+    nodes.reset()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        records = await asyncio.gather(*[one(i) for i in range(runs)])
+    wall = time.perf_counter() - started
+
+    errors = [line for line in log.getvalue().splitlines() if any(marker in line for marker in ERROR_MARKERS)]
+    latencies = [record["elapsed"] * 1000 for record in records]
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "failed": sum(record["status"] != "done" for record in records),
+        "node_errors": len(errors),
+        "first_error": errors[0][:300] if errors else None,
+        "wall_s": round(wall, 3),
+        "runs_per_s": round(runs / wall, 3),
+        "run_p50_ms": round(percentile(latencies, 0.5), 1),
+        "run_p95_ms": round(percentile(latencies, 0.95), 1),
+        "calls": dict(nodes.calls),
+        "nodes": nodes.summary(),
+        "rss_mb": peak_rss_mb(),
+    }
+
+
+async def run_suite(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="cv-bench-")
+    servers = configure_environment(args, workdir)
+    try:
+        import_ms = {}
+        if not args.skip_import:
+            for module in IMPORT_MODULES:
+                import_ms[module] = round(min(measure_import(module)[0] for _ in range(args.import_repeat)), 1)
+
+        # 환경변수를 설정한 뒤에 import 해야 대역 서버와 임시 디렉터리를 사용합니다.
+        from pilsang import tracing
+        from pilsang.batch_runner import execute_job
+        from pilsang.inprocess_mcp import enable_session_pool, close_session_pool
+
+        # GitHub 대역 서버(FastMCP)는 만들어질 때 루트 로거를 INFO로 바꾸므로, 먼저 만들고 요청마다 찍히는 HTTP 로그를 끕니다.
+        import benchmarks.stubs.github_mcp  # noqa: F401
+        logging.getLogger().setLevel(logging.WARNING)
+        nodes = NodeTimes()
+        tracing.add_listener(nodes)
+        enable_session_pool()
+
+        llm = servers[0]
+        llm_calls = Counter()
+
+        def reset_llm_stub():
+            # 단계마다 각본 순번과 장애 추첨(seed)을 처음부터 시작합니다. 호출 수는 합쳐서 보고합니다.
+            llm_calls.update(llm.backend.stats()["calls"])
+            llm.backend.reset()
+
+        # 첫 실행(그래프 컴파일, RAG 인덱스 생성, MCP 세션 연결)은 따로 잽니다.
+        warmup = await run_level(execute_job, 1, 1, "warmup", nodes)
+        levels = []
+        for concurrency in args.concurrency:
+            runs = args.runs or max(4, concurrency * 2)
+            reset_llm_stub()
+            levels.append(await run_level(execute_job, concurrency, runs, f"c{concurrency}", nodes))
+            level = levels[-1]
+            print(f"  동시 {concurrency:>3}: {level['runs']}회 {level['wall_s']:7.2f}s | "
+                  f"{level['runs_per_s']:6.2f} runs/s | 실행 p50 {level['run_p50_ms']:8.1f} ms, "
+                  f"p95 {level['run_p95_ms']:8.1f} ms | 실패 {level['failed']}, 노드 오류 {level['node_errors']}")
+        await close_session_pool()
+        tracing.remove_listener(nodes)
+        reset_llm_stub()
+        stub_calls = {"openai": dict(llm_calls), "docs": dict(servers[1].backend.calls)}
+        stub_calls["github_mcp"] = dict(benchmarks.stubs.github_mcp.calls)
+    finally:
+        for server in servers:
+            server.stop()
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {"llm_latency": args.llm_latency, "token_rate": args.token_rate,
+                         "tool_latency": args.tool_latency, "docs_latency": args.docs_latency,
+                         "revise": args.revise,
+                         "error_rate": args.error_rate, "retry_after": args.retry_after,
+                         "spike_rate": args.spike_rate, "spike_latency": args.spike_latency},
+        },
+        "import_ms": import_ms,
+        "first_run_ms": warmup["run_p50_ms"],
+        "stub_calls": stub_calls,
+        "levels": levels,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """기준선보다 tolerance(비율) 넘게 나빠진 지표 목록. (지표, 기준선, 현재, 변화율)"""
+    regressions = []
+
+    def check(metric: str, old, new, higher_is_worse: bool = True, absolute: float = 0.0):
+        if old is None or new is None or not old:
+            return
+        change = (new - old) / old
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        if worse and abs(new - old) > absolute:
+            regressions.append((metric, old, new, change))
+
+    for module, value in current.get("import_ms", {}).items():
+        check(f"import {module} (ms)", baseline.get("import_ms", {}).get(module), value, absolute=MIN_LATENCY_DELTA_MS)
+    check("peak RSS (MB)", baseline.get("peak_rss_mb"), current.get("peak_rss_mb"))
+    old_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in current.get("levels", []):
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        prefix = f"c={level['concurrency']}"
+        check(f"{prefix} runs/s", old["runs_per_s"], level["runs_per_s"], higher_is_worse=False)
+        check(f"{prefix} run p95 (ms)", old["run_p95_ms"], level["run_p95_ms"], absolute=MIN_LATENCY_DELTA_MS)
+        for name, stats in level["nodes"].items():
+            if name in old["nodes"]:
+                check(f"{prefix} {name} p95 (ms)", old["nodes"][name]["p95_ms"], stats["p95_ms"],
+                      absolute=MIN_LATENCY_DELTA_MS)
+    return regressions
+
+
+def print_report(result: dict):
+    if result["import_ms"]:
+        print("\nimport: " + ", ".join(f"{module} {ms:.1f} ms" for module, ms in result["import_ms"].items()))
+    print(f"첫 실행: {result['first_run_ms']:.1f} ms | 최대 RSS: {result['peak_rss_mb']} MB")
+    print("대역 서버 호출: " + " | ".join(f"{name} {calls}" for name, calls in result["stub_calls"].items()))
+    levels = result["levels"]
+    names = sorted({name for level in levels for name in level["nodes"]})
+    print(f"\n{'node p50/p95 (ms)':<20}" + "".join(f"{'c=' + str(level['concurrency']):>20}" for level in levels))
+    for name in names:
+        cells = []
+        for level in levels:
+            stats = level["nodes"].get(name)
+            cells.append(f"{stats['p50_ms']:>9.1f}/{stats['p95_ms']:<9.1f}" if stats else f"{'-':>20}")
+        print(f"{name:<20}" + "".join(f"{cell:>20}" for cell in cells))
+    for level in levels:
+        if level["first_error"]:
+            print(f"\n⚠️ c={level['concurrency']} 노드 오류 {level['node_errors']}건: {level['first_error']}")
+
+
+def print_comparison(current: dict, baseline: dict, tolerance: float) -> bool:
+    """비교 결과를 출력하고 회귀가 있으면 True."""
+    if current["meta"]["settings"] != baseline["meta"]["settings"]:
+        print(f"\n⚠️ 대역 서버 설정이 기준선과 다릅니다: {baseline['meta']['settings']} -> {current['meta']['settings']}")
+    regressions = compare(current, baseline, tolerance)
+    print(f"\n기준선 {baseline['meta'].get('commit')} ({baseline['meta']['time']}) 대비, 허용 범위 {tolerance:.0%}")
+    if not regressions:
+        print("✅ 회귀 없음")
+        return False
+    for metric, old, new, change in regressions:
+        print(f"❌ {metric:<40} {old:>10} -> {new:<10} ({change:+.0%})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 대역 서버 위의 전체 워크플로우 성능 벤치마크")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 8],
+                        help="동시 실행 수 목록 (쉼표 구분)")
+    parser.add_argument("--runs", type=int, default=None, help="동시 실행 수마다 실행 횟수 (기본 max(4, 동시 실행 수 x 2))")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="OpenAI 요청당 지연(초)")
+    parser.add_argument("--token-rate", type=float, default=None, help="초당 출력 토큰 수 (생성 시간 흉내)")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="GitHub MCP 도구 호출당 지연(초)")
+    parser.add_argument("--docs-latency", type=float, default=0.05, help="Docs API 요청당 지연(초)")
+    parser.add_argument("--revise", type=int, default=0, help="HR 검토가 [PASS] 전에 줄 [REVISE] 횟수")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="OpenAI 요청 중 429로 돌려보낼 비율 (0~1)")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="429 응답의 retry-after(초)")
+    parser.add_argument("--spike-rate", type=float, default=0.0, help="OpenAI 요청 중 지연 급증을 넣을 비율 (0~1)")
+    parser.add_argument("--spike-latency", type=float, default=1.0, help="지연 급증 시 더할 시간(초)")
+    parser.add_argument("--import-repeat", type=int, default=3, help="import 시간 반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--skip-import", action="store_true", help="import 시간 측정 생략")
+    parser.add_argument("--save", default=None, help="결과 파일 (기본 benchmarks/results/<시각>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="비교할 기준선 결과 파일")
+    parser.add_argument("--update-baseline", action="store_true", help="이번 결과를 기준선으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용할 악화 비율 (기본 0.2 = 20%%)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "RESULT"), help="저장된 결과 두 개만 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            current = json.load(f)
+        print_report(current)
+        sys.exit(1 if print_comparison(current, baseline, args.tolerance) else 0)
+
+    print(f"🏁 전체 워크플로우 벤치마크 (동시 실행 {args.concurrency}, LLM 지연 {args.llm_latency}s)")
+    result = asyncio.run(run_suite(args))
+    print_report(result)
+
+    path = args.save or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {path}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"기준선 갱신: {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        sys.exit(1 if print_comparison(result, baseline, args.tolerance) else 0)
+    print(f"기준선이 없습니다 ({args.baseline}). --update-baseline으로 만들 수 있습니다.")
+
+
+if __name__ == "__main__":
+    main()
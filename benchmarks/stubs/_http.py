@@ -0,0 +1,110 @@
+"""
+로컬 대역(stand-in) HTTP 서버 공통 부분.
+
+각 스텁은 StubHandler를 상속해 route()만 구현하고, StubServer로 백그라운드 스레드에서 띄웁니다.
+요청마다 스레드가 하나씩 배정되므로(ThreadingHTTPServer) 지연 시뮬레이션(time.sleep)이
+다른 요청을 막지 않습니다.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # 서버 객체에서 공유 상태(backend)를 꺼내 씁니다.
+    protocol_version = "HTTP/1.1"
+    # keep-alive 연결에서 헤더/본문을 나눠 쓰면 Nagle + delayed ACK로 요청마다 ~40ms가 더해집니다.
+    disable_nagle_algorithm = True
+
+    @property
+    def backend(self):
+        return self.server.backend
+
+    def log_message(self, format, *args):
+        pass  # 벤치마크 출력이 묻히지 않게 접근 로그는 끔
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def send_json(self, status: int, payload, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self, content_type: str = "text/event-stream"):
+        """길이를 모르는 응답(SSE 등)을 chunked 인코딩으로 시작합니다. keep-alive 연결을 그대로 씁니다."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _dispatch(self, method: str):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        body = self.read_json() if method in ("POST", "PATCH", "PUT") else {}
+        try:
+            self.route(method, parsed.path, query, body)
+        except Exception as e:
+            self.send_json(500, {"error": {"code": 500, "message": str(e)}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def route(self, method: str, path: str, query: dict, body: dict):
+        raise NotImplementedError
+
+
+class StubServer:
+    """스텁 서버를 백그라운드 스레드에서 실행합니다. port=0이면 빈 포트를 자동으로 고릅니다."""
+
+    def __init__(self, handler_cls, backend, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), handler_cls)
+        self.httpd.daemon_threads = True
+        self.httpd.backend = backend
+        self.backend = backend
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
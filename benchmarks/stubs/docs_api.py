@@ -0,0 +1,198 @@
+"""
+Google Docs REST API 로컬 대역(stand-in).
+
+googleapiclient가 client_options={"api_endpoint": url}로 붙을 수 있도록
+documents.create / documents.get / documents.batchUpdate 를 흉내 냅니다.
+(jinwook/google_auth.py는 GOOGLE_DOCS_API_ENDPOINT가 설정되면 이 주소를 사용)
+
+- 인덱스는 실제 API처럼 UTF-16 code unit 기준, 1부터 시작하며 본문 끝에는 항상 줄바꿈이 있습니다.
+- latency: 요청당 지연(초)
+- quota_per_minute: 분당 요청 한도. 넘으면 429 RESOURCE_EXHAUSTED
+- writeControl.requiredRevisionId가 현재 revision과 다르면 400 FAILED_PRECONDITION
+- documents.get의 fields=revisionId (revision 확인용 가벼운 요청)는 revisionId만 돌려줍니다.
+
+단독 실행:
+    python benchmarks/stubs/docs_api.py --port 8765 --latency 0.2 --quota 300
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from benchmarks.stubs._http import StubHandler, StubServer
+
+
+def _u16_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _py_index(text: str, u16_offset: int) -> int:
+    """UTF-16 오프셋을 파이썬 문자열 인덱스로 바꿉니다."""
+    units = 0
+    for i, ch in enumerate(text):
+        if units >= u16_offset:
+            return i
+        units += 2 if ord(ch) > 0xFFFF else 1
+    return len(text)
+
+
+class FakeDocsBackend:
+    """문서 저장소와 호출 통계. 여러 요청 스레드에서 함께 사용합니다."""
+
+    def __init__(self, latency: float = 0.0, quota_per_minute: int = None):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.docs = {}  # documentId -> {"title", "text", "revision"}
+        self.calls = {"create": 0, "get": 0, "get.revision": 0, "batchUpdate": 0, "throttled": 0}
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        """분당 한도 안이면 True. (슬라이딩 윈도우)"""
+        with self._lock:
+            if self.quota_per_minute is None:
+                return True
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.quota_per_minute:
+                self.calls["throttled"] += 1
+                return False
+            self._recent.append(now)
+            return True
+
+    def create(self, title: str) -> dict:
+        with self._lock:
+            self.calls["create"] += 1
+            doc_id = uuid.uuid4().hex
+            self.docs[doc_id] = {"title": title or "Untitled document", "text": "\n", "revision": 1}
+            return self._render(doc_id)
+
+    def get(self, doc_id: str, fields: str = None):
+        with self._lock:
+            if doc_id not in self.docs:
+                self.calls["get"] += 1
+                return None
+            if fields == "revisionId":
+                self.calls["get.revision"] += 1
+                return {"revisionId": str(self.docs[doc_id]["revision"])}
+            self.calls["get"] += 1
+            return self._render(doc_id)
+
+    def batch_update(self, doc_id: str, body: dict):
+        """(status, payload)를 돌려줍니다."""
+        with self._lock:
+            self.calls["batchUpdate"] += 1
+            doc = self.docs.get(doc_id)
+            if doc is None:
+                return 404, _error(404, "NOT_FOUND", f"Requested entity was not found: {doc_id}")
+            required = (body.get("writeControl") or {}).get("requiredRevisionId")
+            if required and required != str(doc["revision"]):
+                return 400, _error(400, "FAILED_PRECONDITION", "The document was modified since the required revision.")
+
+            text = doc["text"]
+            for req in body.get("requests", []):
+                if "insertText" in req:
+                    op = req["insertText"]
+                    if "endOfSegmentLocation" in op:
+                        pos = len(text) - 1
+                    else:
+                        pos = _py_index(text, op["location"]["index"] - 1)
+                    if pos >= len(text):
+                        return 400, _error(400, "INVALID_ARGUMENT", "Index must be less than the end index of the segment")
+                    text = text[:pos] + op["text"] + text[pos:]
+                elif "deleteContentRange" in req:
+                    rng = req["deleteContentRange"]["range"]
+                    start = _py_index(text, rng["startIndex"] - 1)
+                    end = _py_index(text, rng["endIndex"] - 1)
+                    if end >= len(text) or start >= end:
+                        return 400, _error(400, "INVALID_ARGUMENT", "Invalid deletion range")
+                    text = text[:start] + text[end:]
+                else:
+                    return 400, _error(400, "INVALID_ARGUMENT", f"Unsupported request: {list(req)}")
+            doc["text"] = text
+            doc["revision"] += 1
+            return 200, {
+                "documentId": doc_id,
+                "replies": [{} for _ in body.get("requests", [])],
+                "writeControl": {"requiredRevisionId": str(doc["revision"])},
+            }
+
+    def text_of(self, doc_id: str) -> str:
+        """테스트/검증용: 본문 텍스트 (마지막 줄바꿈 제외)."""
+        return self.docs[doc_id]["text"][:-1]
+
+    def _render(self, doc_id: str) -> dict:
+        doc = self.docs[doc_id]
+        content = [{"endIndex": 1, "sectionBreak": {}}]
+        index = 1
+        for line in doc["text"].splitlines(keepends=True):
+            end = index + _u16_len(line)
+            content.append({
+                "startIndex": index,
+                "endIndex": end,
+                "paragraph": {"elements": [{"startIndex": index, "endIndex": end, "textRun": {"content": line}}]},
+            })
+            index = end
+        return {
+            "documentId": doc_id,
+            "title": doc["title"],
+            "revisionId": str(doc["revision"]),
+            "body": {"content": content},
+        }
+
+
+def _error(code: int, status: str, message: str) -> dict:
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+class DocsHandler(StubHandler):
+    def route(self, method, path, query, body):
+        backend = self.backend
+        if backend.latency:
+            time.sleep(backend.latency)
+        if not backend.admit():
+            self.send_json(429, _error(429, "RESOURCE_EXHAUSTED", "Quota exceeded"), {"Retry-After": "1"})
+            return
+
+        if method == "POST" and path == "/v1/documents":
+            self.send_json(200, backend.create(body.get("title", "")))
+        elif method == "POST" and path.startswith("/v1/documents/") and path.endswith(":batchUpdate"):
+            doc_id = path[len("/v1/documents/"):-len(":batchUpdate")]
+            status, payload = backend.batch_update(doc_id, body)
+            self.send_json(status, payload)
+        elif method == "GET" and path.startswith("/v1/documents/"):
+            doc = backend.get(path[len("/v1/documents/"):], query.get("fields"))
+            if doc is None:
+                self.send_json(404, _error(404, "NOT_FOUND", "Requested entity was not found."))
+            else:
+                self.send_json(200, doc)
+        else:
+            self.send_json(404, _error(404, "NOT_FOUND", f"No route: {method} {path}"))
+
+
+def start_docs_stub(latency: float = 0.0, quota_per_minute: int = None, port: int = 0) -> StubServer:
+    """Docs API 스텁을 백그라운드에서 띄우고 StubServer를 돌려줍니다. (.url, .backend, .stop())"""
+    return StubServer(DocsHandler, FakeDocsBackend(latency, quota_per_minute), port=port).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Google Docs API 로컬 대역 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument("--quota", type=int, default=None, help="분당 요청 한도")
+    args = parser.parse_args()
+
+    server = start_docs_stub(args.latency, args.quota, args.port)
+    print(f"📄 Docs API 스텁 실행 중: {server.url}  (GOOGLE_DOCS_API_ENDPOINT={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
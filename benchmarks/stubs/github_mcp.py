@@ -0,0 +1,75 @@
+"""
+GitHub MCP 서버(@modelcontextprotocol/server-github) 로컬 대역(stand-in).
+
+npx / 네트워크 없이 같은 이름의 검색 / 읽기 도구를 흉내 내는 FastMCP 서버입니다.
+v_all.py는 CV_GITHUB_MCP_TARGET="benchmarks.stubs.github_mcp:mcp"이면 이 서버를 in-process로 붙입니다.
+
+- CV_STUB_MCP_LATENCY: 도구 호출당 지연(초, 기본 0). 호출할 때마다 읽으므로 실행 중에 바꿀 수 있습니다.
+
+단독 실행 (stdio):
+    python benchmarks/stubs/github_mcp.py
+"""
+
+import os
+import json
+import asyncio
+import threading
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("GitHubStub")
+
+calls = {}
+_lock = threading.Lock()
+
+
+async def _simulate(tool: str):
+    with _lock:
+        calls[tool] = calls.get(tool, 0) + 1
+    latency = float(os.getenv("CV_STUB_MCP_LATENCY", "0"))
+    if latency:
+        await asyncio.sleep(latency)
+
+
+@mcp.tool()
+async def search_repositories(query: str, page: int = 1, perPage: int = 30) -> str:
+    """Search for GitHub repositories"""
+    await _simulate("search_repositories")
+    owner = query.replace("user:", "").split()[0] if query else "stub"
+    return json.dumps({"total_count": 2, "items": [
+        {"full_name": f"{owner}/cv-agent", "description": "LangGraph 기반 자소서 작성 에이전트", "language": "Python",
+         "stargazers_count": 12},
+        {"full_name": f"{owner}/data-pipeline", "description": "배치 데이터 수집 파이프라인", "language": "Go",
+         "stargazers_count": 3},
+    ]}, ensure_ascii=False)
+
+
+@mcp.tool()
+async def search_code(q: str, page: int = 1, per_page: int = 30) -> str:
+    """Search for code across GitHub repositories"""
+    await _simulate("search_code")
+    return json.dumps({"total_count": 1, "items": [
+        {"path": "pilsang/v_all.py", "repository": {"full_name": "stub/cv-agent"},
+         "text_matches": [{"fragment": "workflow.add_node(\"rag_agent\", limit_stage(\"rag_agent\", rag_agent))"}]},
+    ]}, ensure_ascii=False)
+
+
+@mcp.tool()
+async def get_file_contents(owner: str, repo: str, path: str, branch: str = None) -> str:
+    """Get the contents of a file or directory from a GitHub repository"""
+    await _simulate("get_file_contents")
+    return f"# {owner}/{repo}/{path}\n\n단계별 동시 실행 한도와 체크포인트로 배치 실행 시간을 40% 줄였습니다.\n"
+
+
+@mcp.tool()
+async def list_commits(owner: str, repo: str, sha: str = None, page: int = 1, perPage: int = 30) -> str:
+    """Get list of commits of a branch in a GitHub repository"""
+    await _simulate("list_commits")
+    return json.dumps([
+        {"sha": f"{i:040x}", "commit": {"message": message, "author": {"name": owner}}}
+        for i, message in enumerate(["Add stage limits", "Cache retriever per posting", "Fix retry loop"], 1)
+    ], ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    mcp.run()
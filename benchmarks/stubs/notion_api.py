@@ -0,0 +1,82 @@
+"""
+Notion API 로컬 대역(stand-in).
+
+jia/notion_server.py의 search_notion이 NOTION_API_BASE(예: http://127.0.0.1:8767/v1)로 보내는
+POST /v1/search 를 흉내 냅니다. 검색어가 들어간 제목의 페이지 몇 개를 돌려줍니다.
+(NOTION_MIRROR_DB를 없는 경로로 두어야 로컬 미러 대신 이 스텁으로 요청이 갑니다.)
+
+- latency: 요청당 지연(초)
+- pages: 검색마다 돌려줄 페이지 수
+
+단독 실행:
+    python benchmarks/stubs/notion_api.py --port 8767 --latency 0.1
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from benchmarks.stubs._http import StubHandler, StubServer
+
+
+class FakeNotionBackend:
+    def __init__(self, latency: float = 0.0, pages: int = 3):
+        self.latency = latency
+        self.pages = pages
+        self.calls = {"search": 0}
+        self._lock = threading.Lock()
+
+    def search(self, body: dict) -> dict:
+        with self._lock:
+            self.calls["search"] += 1
+        query = body.get("query") or "page"
+        count = min(self.pages, body.get("page_size") or self.pages)
+        results = []
+        for i in range(count):
+            page_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{query}:{i}"))
+            results.append({
+                "object": "page",
+                "id": page_id,
+                "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+                "properties": {"title": {"id": "title", "type": "title",
+                                         "title": [{"plain_text": f"{query} 프로젝트 기록 {i + 1}"}]}},
+            })
+        return {"object": "list", "results": results, "has_more": False, "next_cursor": None}
+
+
+class NotionHandler(StubHandler):
+    def route(self, method, path, query, body):
+        backend = self.backend
+        if backend.latency:
+            time.sleep(backend.latency)
+        if method == "POST" and path == "/v1/search":
+            self.send_json(200, backend.search(body))
+        else:
+            self.send_json(404, {"object": "error", "status": 404, "code": "object_not_found",
+                                 "message": f"No route: {method} {path}"})
+
+
+def start_notion_stub(latency: float = 0.0, pages: int = 3, port: int = 0) -> StubServer:
+    """Notion 스텁을 백그라운드에서 띄웁니다. NOTION_API_BASE에는 f"{server.url}v1"을 넣으세요."""
+    return StubServer(NotionHandler, FakeNotionBackend(latency, pages), port=port).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notion API 로컬 대역 서버")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument("--pages", type=int, default=3, help="검색마다 돌려줄 페이지 수")
+    args = parser.parse_args()
+
+    server = start_notion_stub(args.latency, args.pages, args.port)
+    print(f"📝 Notion API 스텁 실행 중: {server.url}  (NOTION_API_BASE={server.url}v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,430 @@
+"""
+OpenAI 호환 API 로컬 대역(stand-in).
+
+OpenAI SDK는 OPENAI_BASE_URL(예: http://127.0.0.1:8766/v1)을 따르므로,
+돈과 네트워크 없이 에이전트/서버 코드의 처리량과 재시도(backoff) 동작을 재 볼 수 있습니다.
+(ChatOpenAI, OpenAIEmbeddings, OpenAI().responses.create, chat.completions.create가 쓰는 범위)
+
+지원:
+- POST /v1/chat/completions: 요청에 tools가 있고 아직 도구 결과가 없으면 모든 도구를 한 번씩 (병렬로) 호출하는
+  tool_calls 응답 (tool_calls=True일 때, ReAct 에이전트의 도구 왕복까지 재현), 그 다음에는 reply.
+  stream=True면 chat.completion.chunk SSE (stream_options.include_usage 지원)
+- POST /v1/responses: reply를 output_text로 (mirim HR / 면접 에이전트). stream=True면 response.* 이벤트 SSE
+- POST /v1/embeddings: 단어 해시 기반의 결정적 벡터 (encoding_format=base64 지원, 벡터 DB / 도구 라우터용)
+- GET /stats: 호출 / 429 / 지연 급증 횟수와 최대 동시 요청 수, POST /stats/reset: 초기화
+
+설정:
+- latency: 요청당 지연(초). 스트리밍이면 첫 토큰까지의 시간
+- token_rate: 초당 출력 토큰 수. 비스트리밍은 출력 토큰 수 / token_rate 만큼 더 기다리고,
+  스트리밍은 토큰(약 4글자)마다 1 / token_rate 간격으로 보냄 (생성 시간 흉내)
+- reply: 고정 응답 텍스트. script 규칙에 걸리지 않은 요청에 씀
+- script: 각본 규칙 목록. [{"endpoint": "responses", "match": "HR 관점", "replies": ["[REVISE]...", "[PASS]..."]}]
+  처럼 쓰면 endpoint가 같고 프롬프트에서 match(정규식)가 찾아지는 첫 규칙의 replies를 순서대로 돌려가며 씀.
+  (endpoint / match는 생략 가능. 순번은 규칙과 실행(TRACE_HEADER 헤더의 trace_id)마다 따로 셈.
+  헤더가 없는 요청끼리는 순번 하나를 나눠 가짐)
+- error_rate: 이 비율의 요청에 429 rate_limit_exceeded (retry-after / retry-after-ms 헤더는 retry_after초)
+- rpm: 분당 요청 한도. 넘으면 429 (슬라이딩 윈도우)
+- spike_rate / spike_latency: 이 비율의 요청에 spike_latency초를 더 기다림 (꼬리 지연 흉내)
+- seed: 429 / 지연 급증 추첨용 난수 시드. 같은 시드, 같은 요청 순서면 같은 결과
+
+단독 실행:
+    python benchmarks/stubs/openai_api.py --port 8766 --latency 0.5 --token-rate 50
+    python benchmarks/stubs/openai_api.py --script script.json --error-rate 0.1 --spike-rate 0.05 --spike-latency 3
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import base64
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from benchmarks.stubs._http import StubHandler, StubServer
+
+# pilsang/tracing.py가 OpenAI 요청에 싣는 실행(trace) ID 헤더. 각본 순번을 실행마다 따로 세는 데 씁니다.
+TRACE_HEADER = "X-CV-Trace-Id"
+
+EMBEDDING_DIM = 64
+CHARS_PER_TOKEN = 4
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _token_pieces(text: str) -> list:
+    """스트리밍용으로 텍스트를 토큰(약 4글자) 단위로 자릅니다."""
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)] or [""]
+
+
+def _embed(text: str) -> list:
+    """단어마다 해시로 차원 / 부호를 정해 더한 뒤 정규화. 같은 단어를 공유하면 가까운 벡터가 됩니다."""
+    vector = [0.0] * EMBEDDING_DIM
+    for word in (text or "").lower().split() or [""]:
+        digest = hashlib.sha1(word.encode("utf-8")).digest()
+        vector[digest[0] % EMBEDDING_DIM] += 1.0 if digest[1] % 2 else -1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _sample_args(schema: dict) -> dict:
+    """도구 스키마의 필수 인자를 타입에 맞는 임의 값으로 채웁니다."""
+    samples = {"string": "stub", "integer": 1, "number": 1, "boolean": True, "array": [], "object": {}}
+    properties = schema.get("properties") or {}
+    return {name: samples.get((properties.get(name) or {}).get("type"), "stub") for name in schema.get("required") or []}
+
+
+def _text_of(content) -> str:
+    """메시지 content(문자열 또는 파트 목록)에서 텍스트만 모읍니다."""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content or "")
+
+
+def load_script(path: str) -> list:
+    """각본 파일(JSON)을 읽습니다. 규칙 목록 또는 {"rules": [...]} 형식."""
+    with open(path, "r", encoding="utf-8") as f:
+        script = json.load(f)
+    return script["rules"] if isinstance(script, dict) else script
+
+
+class FakeOpenAIBackend:
+    """응답 생성과 장애 주입, 호출 통계. 여러 요청 스레드에서 함께 사용합니다."""
+
+    def __init__(self, latency: float = 0.0, reply: str = "stub reply", token_rate: float = None,
+                 tool_calls: bool = False, script: list = None, error_rate: float = 0.0, retry_after: float = 1.0,
+                 rpm: int = None, spike_rate: float = 0.0, spike_latency: float = 2.0, seed: int = 0):
+        self.latency = latency
+        self.reply = reply
+        self.token_rate = token_rate
+        self.tool_calls = tool_calls
+        self.rules = [dict(rule, pattern=re.compile(rule["match"]) if rule.get("match") else None)
+                      for rule in script or []]
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = {"chat.completions": 0, "responses": 0, "embeddings": 0,
+                          "streamed": 0, "rate_limited": 0, "spikes": 0}
+            self.inflight = 0
+            self.peak_inflight = 0
+            self.output_tokens = 0
+            self._turns = {}  # (규칙 번호, trace_id) -> 다음 순번
+            self._recent = deque()
+            self._random = random.Random(self.seed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": dict(self.calls), "inflight": self.inflight, "peak_inflight": self.peak_inflight,
+                    "output_tokens": self.output_tokens}
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def enter(self):
+        with self._lock:
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def admit(self) -> bool:
+        """분당 한도와 error_rate 추첨을 통과하면 True. 아니면 429로 돌려보낼 요청."""
+        with self._lock:
+            throttled = False
+            if self.rpm is not None:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                throttled = len(self._recent) >= self.rpm
+                if not throttled:
+                    self._recent.append(now)
+            if not throttled and self.error_rate:
+                throttled = self._random.random() < self.error_rate
+            if throttled:
+                self.calls["rate_limited"] += 1
+            return not throttled
+
+    def request_delay(self) -> float:
+        """요청당 지연. spike_rate 비율로 spike_latency가 더해집니다."""
+        with self._lock:
+            if self.spike_rate and self._random.random() < self.spike_rate:
+                self.calls["spikes"] += 1
+                return self.latency + self.spike_latency
+        return self.latency
+
+    def generation_delay(self, completion_tokens: int) -> float:
+        return completion_tokens / self.token_rate if self.token_rate else 0.0
+
+    def next_reply(self, endpoint: str, prompt: str, trace_id: str = None) -> str:
+        """각본에서 이 요청에 맞는 규칙의 다음 응답 (순번은 실행별). 맞는 규칙이 없으면 reply."""
+        for index, rule in enumerate(self.rules):
+            if rule.get("endpoint") not in (None, endpoint):
+                continue
+            if rule["pattern"] is not None and not rule["pattern"].search(prompt):
+                continue
+            with self._lock:
+                turn = self._turns.get((index, trace_id), 0)
+                self._turns[(index, trace_id)] = turn + 1
+            return rule["replies"][turn % len(rule["replies"])]
+        return self.reply
+
+    def chat_completion(self, body: dict, trace_id: str = None) -> dict:
+        self.count("chat.completions")
+        messages = body.get("messages", [])
+        prompt = "".join(_text_of(m.get("content")) for m in messages)
+        finish_reason = "stop"
+        tools = body.get("tools") or []
+        if self.tool_calls and tools and not any(m.get("role") == "tool" for m in messages):
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": tool["function"]["name"],
+                             "arguments": json.dumps(_sample_args(tool["function"].get("parameters") or {}))},
+            } for tool in tools]}
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": self.next_reply("chat.completions", prompt, trace_id)}
+        prompt_tokens = _approx_tokens(prompt)
+        completion_tokens = _approx_tokens(message["content"] or str(message.get("tool_calls")))
+        with self._lock:
+            self.output_tokens += completion_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def response(self, body: dict, trace_id: str = None) -> dict:
+        self.count("responses")
+        items = body.get("input")
+        prompt = items if isinstance(items, str) else "".join(_text_of(item.get("content")) for item in items or [])
+        prompt = (body.get("instructions") or "") + prompt
+        reply = self.next_reply("responses", prompt, trace_id)
+        prompt_tokens, completion_tokens = _approx_tokens(prompt), _approx_tokens(reply)
+        with self._lock:
+            self.output_tokens += completion_tokens
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "stub"),
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": reply, "annotations": []}],
+            }],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": prompt_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": completion_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def embeddings(self, body: dict) -> dict:
+        self.count("embeddings")
+        inputs = body.get("input")
+        inputs = [inputs] if isinstance(inputs, (str, int)) or (inputs and isinstance(inputs[0], int)) else inputs
+        data = []
+        for index, text in enumerate(inputs or []):
+            vector = _embed(text if isinstance(text, str) else " ".join(map(str, text)))
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        tokens = sum(_approx_tokens(str(text)) for text in inputs or [])
+        return {"object": "list", "data": data, "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+
+def chat_chunks(payload: dict, include_usage: bool = False):
+    """chat.completion 응답을 스트리밍 청크 (chunk, 토큰 수)로 풉니다. 토큰 수만큼 생성 시간을 기다립니다."""
+    choice = payload["choices"][0]
+    message = choice["message"]
+    base = {"id": payload["id"], "object": "chat.completion.chunk", "created": payload["created"],
+            "model": payload["model"]}
+
+    def chunk(delta: dict, finish_reason=None) -> dict:
+        return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+    yield chunk({"role": "assistant", "content": ""}), 0
+    if message.get("tool_calls"):
+        calls = [dict(call, index=index) for index, call in enumerate(message["tool_calls"])]
+        yield chunk({"tool_calls": calls}), payload["usage"]["completion_tokens"]
+    else:
+        for piece in _token_pieces(message["content"]):
+            yield chunk({"content": piece}), 1
+    yield chunk({}, choice["finish_reason"]), 0
+    if include_usage:
+        yield dict(base, choices=[], usage=payload["usage"]), 0
+
+
+def response_events(payload: dict):
+    """Responses API 응답을 스트리밍 이벤트 (event, 토큰 수)로 풉니다."""
+    item = payload["output"][0]
+    part = item["content"][0]
+    text = part["text"]
+    in_progress = dict(payload, status="in_progress", output=[], usage=None)
+    empty_item = dict(item, status="in_progress", content=[])
+    empty_part = dict(part, text="")
+    events = [
+        ({"type": "response.created", "response": in_progress}, 0),
+        ({"type": "response.in_progress", "response": in_progress}, 0),
+        ({"type": "response.output_item.added", "output_index": 0, "item": empty_item}, 0),
+        ({"type": "response.content_part.added", "item_id": item["id"], "output_index": 0, "content_index": 0,
+          "part": empty_part}, 0),
+    ]
+    events += [({"type": "response.output_text.delta", "item_id": item["id"], "output_index": 0,
+                 "content_index": 0, "delta": piece, "logprobs": []}, 1) for piece in _token_pieces(text)]
+    events += [
+        ({"type": "response.output_text.done", "item_id": item["id"], "output_index": 0, "content_index": 0,
+          "text": text, "logprobs": []}, 0),
+        ({"type": "response.content_part.done", "item_id": item["id"], "output_index": 0, "content_index": 0,
+          "part": part}, 0),
+        ({"type": "response.output_item.done", "output_index": 0, "item": item}, 0),
+        ({"type": "response.completed", "response": payload}, 0),
+    ]
+    for sequence_number, (event, tokens) in enumerate(events):
+        yield dict(event, sequence_number=sequence_number), tokens
+
+
+class OpenAIHandler(StubHandler):
+    def route(self, method, path, query, body):
+        backend = self.backend
+        if method == "GET" and path == "/stats":
+            self.send_json(200, backend.stats())
+            return
+        if method == "POST" and path == "/stats/reset":
+            backend.reset()
+            self.send_json(200, backend.stats())
+            return
+
+        backend.enter()
+        try:
+            self._serve(backend, method, path, body)
+        finally:
+            backend.leave()
+
+    def _serve(self, backend, method, path, body):
+        delay = backend.request_delay()
+        if delay:
+            time.sleep(delay)
+        if path in ("/v1/chat/completions", "/v1/responses", "/v1/embeddings") and not backend.admit():
+            self.send_json(429, {"error": {"message": "Rate limit reached for requests (stub).", "type": "requests",
+                                           "param": None, "code": "rate_limit_exceeded"}},
+                           {"retry-after": str(math.ceil(backend.retry_after)),
+                            "retry-after-ms": str(int(backend.retry_after * 1000))})
+            return
+
+        if method == "POST" and path == "/v1/chat/completions":
+            payload = backend.chat_completion(body, self.headers.get(TRACE_HEADER))
+            if body.get("stream"):
+                include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                self._stream(backend, ((f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n", tokens)
+                                       for chunk, tokens in chat_chunks(payload, include_usage)), "data: [DONE]\n\n")
+                return
+        elif method == "POST" and path == "/v1/responses":
+            payload = backend.response(body, self.headers.get(TRACE_HEADER))
+            if body.get("stream"):
+                self._stream(backend, ((f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n",
+                                        tokens) for event, tokens in response_events(payload)))
+                return
+        elif method == "POST" and path == "/v1/embeddings":
+            payload = backend.embeddings(body)
+        else:
+            self.send_json(404, {"error": {"message": f"No route: {method} {path}", "type": "invalid_request_error"}})
+            return
+        time.sleep(backend.generation_delay(payload.get("usage", {}).get("completion_tokens")
+                                            or payload.get("usage", {}).get("output_tokens") or 0))
+        self.send_json(200, payload)
+
+    def _stream(self, backend, frames, trailer: str = None):
+        """SSE 프레임을 토큰 수에 맞춰 나눠 보냅니다. 클라이언트가 중간에 끊으면 연결만 닫습니다."""
+        backend.count("streamed")
+        self.start_stream()
+        try:
+            for frame, tokens in frames:
+                if tokens:
+                    time.sleep(backend.generation_delay(tokens))
+                self.write_chunk(frame.encode("utf-8"))
+            if trailer:
+                self.write_chunk(trailer.encode("utf-8"))
+            self.end_stream()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def start_openai_stub(latency: float = 0.0, reply: str = "stub reply", port: int = 0, token_rate: float = None,
+                      tool_calls: bool = False, **faults) -> StubServer:
+    """
+    OpenAI 스텁을 백그라운드에서 띄웁니다. SDK에는 f"{server.url}v1"을 base_url로 넘기세요.
+    faults: FakeOpenAIBackend의 script / error_rate / retry_after / rpm / spike_rate / spike_latency / seed
+    """
+    backend = FakeOpenAIBackend(latency, reply, token_rate, tool_calls, **faults)
+    return StubServer(OpenAIHandler, backend, port=port).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 호환 API 로컬 대역 서버")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument("--reply", default="stub reply", help="고정 응답 텍스트")
+    parser.add_argument("--token-rate", type=float, default=None, help="초당 출력 토큰 수 (생성 시간 흉내)")
+    parser.add_argument("--tool-calls", action="store_true", help="tools가 있으면 모든 도구를 한 번씩 호출")
+    parser.add_argument("--script", default=None, help="각본 규칙 JSON 파일")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429로 돌려보낼 요청 비율 (0~1)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 retry-after(초)")
+    parser.add_argument("--rpm", type=int, default=None, help="분당 요청 한도")
+    parser.add_argument("--spike-rate", type=float, default=0.0, help="지연 급증을 넣을 요청 비율 (0~1)")
+    parser.add_argument("--spike-latency", type=float, default=2.0, help="지연 급증 시 더할 시간(초)")
+    parser.add_argument("--seed", type=int, default=0, help="429 / 지연 급증 추첨용 난수 시드")
+    args = parser.parse_args()
+
+    server = start_openai_stub(args.latency, args.reply, args.port, args.token_rate, args.tool_calls,
+                               script=load_script(args.script) if args.script else None,
+                               error_rate=args.error_rate, retry_after=args.retry_after, rpm=args.rpm,
+                               spike_rate=args.spike_rate, spike_latency=args.spike_latency, seed=args.seed)
+    print(f"🤖 OpenAI 스텁 실행 중: {server.url}  (OPENAI_BASE_URL={server.url}v1, 통계: {server.url}stats)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,16 +1,17 @@
 import os
+import time
+import uuid
+import threading
 import dotenv
+from collections import OrderedDict
 from dotenv import load_dotenv
 from typing import Annotated, TypedDict
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader, BSHTMLLoader, Docx2txtLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
+# langchain_openai / langchain_community 로더 / Chroma는 무거우므로 처음 쓰는 함수 안에서 import 합니다.
 
 # API KEY 설정 (환경변수 또는 직접 입력)
 load_dotenv()
@@ -19,12 +20,35 @@ load_dotenv()
 class AgentState(TypedDict):
     # add_messages: 기존 메시지 리스트에 새로운 메시지를 append 하는 리듀서
     messages: Annotated[list[BaseMessage], add_messages]
-    # 문맥 공유를 위한 추가 필드
-    retriever: object 
+    # 문맥 공유를 위한 추가 필드 (register_retriever()가 준 키. 직렬화할 수 없는 retriever 객체는 상태에 넣지 않음)
+    retriever: str
+
+# Retriever 레지스트리: retriever는 벡터 DB 연결을 가진 객체라 상태에 넣으면 직렬화(체크포인트 / 프로세스 간 전달)가 막히므로,
+# 객체는 프로세스 안에 두고 상태에는 키만 담습니다.
+_retrievers = {}
+
+def register_retriever(retriever) -> str:
+    key = f"retriever:{uuid.uuid4().hex}"
+    _retrievers[key] = retriever
+    return key
+
+def release_retriever(key: str):
+    _retrievers.pop(key, None)
+
+def get_retriever(value):
+    """상태의 retriever 값(키)을 객체로 바꿉니다. 예전처럼 객체를 직접 넣은 경우도 그대로 받습니다."""
+    return _retrievers[value] if isinstance(value, str) else value
 
 # --- 2. 문서 로드 및 VectorStore 생성 (Step 1) ---
+# 0이면 임베딩 전에 tiktoken으로 길이를 검사 / 분할하지 않습니다. (OpenAI 호환 로컬 서버용, 인코딩 파일 다운로드 불필요)
+EMBEDDING_CTX_CHECK = os.getenv("CV_EMBEDDING_CTX_CHECK", "1") != "0"
+
 def setup_retriever(input_source: str, file_path: str):
     """웹과 PDF를 로드하여 Retriever를 반환합니다."""
+    from langchain_openai import OpenAIEmbeddings
+    from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader, BSHTMLLoader, Docx2txtLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from langchain_chroma import Chroma
 
     # 1. Input Source 로드 (URL vs 로컬 파일 분기 처리)
     if input_source.startswith("http"):
@@ -61,20 +85,61 @@ def setup_retriever(input_source: str, file_path: str):
     # 4. Indexing (In-memory Chroma)
     vectorstore = Chroma.from_documents(
         documents=all_splits, 
-        embedding=OpenAIEmbeddings()
+        embedding=OpenAIEmbeddings(check_embedding_ctx_length=EMBEDDING_CTX_CHECK)
     )
     
     # MMR 검색 방식 사용하여 다양성 확보 (자소서 문항과 직무 내용이 섞여 있으므로)
     return vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": 5})
 
+# 같은 공고 / 문항 파일의 인덱스는 다시 만들지 않고 재사용합니다. (작업 서버 / 배치에서 여러 지원자가 같은 공고를 쓸 때)
+# 로컬 파일은 수정 시각이 바뀌면 새로 만들고, URL은 RETRIEVER_CACHE_TTL초 동안 재사용합니다.
+RETRIEVER_CACHE_SIZE = int(os.getenv("CV_RETRIEVER_CACHE_SIZE", "8"))
+RETRIEVER_CACHE_TTL = float(os.getenv("CV_RETRIEVER_CACHE_TTL", "3600"))
+_retriever_cache = OrderedDict()  # key -> (생성 시각, retriever)
+_retriever_cache_lock = threading.Lock()
+_retriever_build_locks = {}
+
+def _source_version(source: str):
+    if source.startswith("http") or not os.path.exists(source):
+        return None
+    stat = os.stat(source)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def cached_retriever(input_source: str, file_path: str):
+    """setup_retriever 결과를 (공고, 문항 파일) 단위로 캐시합니다. 같은 키를 동시에 요청하면 한 번만 만듭니다."""
+    key = (input_source, _source_version(input_source), file_path, _source_version(file_path))
+    with _retriever_cache_lock:
+        build_lock = _retriever_build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        with _retriever_cache_lock:
+            cached = _retriever_cache.get(key)
+            if cached and time.time() - cached[0] < RETRIEVER_CACHE_TTL:
+                _retriever_cache.move_to_end(key)
+                print(f"캐시된 인덱스 사용: {input_source} + {file_path}")
+                return cached[1]
+        retriever = setup_retriever(input_source, file_path)
+        with _retriever_cache_lock:
+            _retriever_cache[key] = (time.time(), retriever)
+            while len(_retriever_cache) > RETRIEVER_CACHE_SIZE:
+                evicted, _ = _retriever_cache.popitem(last=False)
+                _retriever_build_locks.pop(evicted, None)
+        return retriever
+
 # --- 3. Nodes 정의 ---
 
-# LLM 초기화
-llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
+# LLM 초기화 (처음 호출될 때 한 번만 생성)
+_llm = None
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        from langchain_openai import ChatOpenAI
+        _llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
+    return _llm
 
 def analyze_competency_node(state: AgentState):
     """Step 2: 직무 역량 분석"""
-    retriever = state["retriever"]
+    retriever = get_retriever(state["retriever"])
     query = "이 회사의 해당 직무에 지원하기 위해 필요한 핵심 역량과 자격 요건을 자세히 알려줘."
     
     # RAG 수행
@@ -86,7 +151,7 @@ def analyze_competency_node(state: AgentState):
         ("human", "채용 공고 내용: {context}\n\n질문: {query}")
     ])
     
-    chain = prompt | llm
+    chain = prompt | get_llm()
     response = chain.invoke({"context": context, "query": query})
     
     # 결과 메시지 저장
@@ -94,7 +159,7 @@ def analyze_competency_node(state: AgentState):
 
 def strategize_resume_node(state: AgentState):
     """Step 3: 자소서 문항별 전략 수립"""
-    retriever = state["retriever"]
+    retriever = get_retriever(state["retriever"])
     
     # 이전 단계(역량 분석)의 결과 가져오기
     competency_analysis = state["messages"][-1].content
@@ -119,7 +184,7 @@ def strategize_resume_node(state: AgentState):
         """)
     ])
     
-    chain = prompt | llm
+    chain = prompt | get_llm()
     response = chain.invoke({
         "competency_analysis": competency_analysis, 
         "context_questions": context_questions
@@ -129,19 +194,33 @@ def strategize_resume_node(state: AgentState):
 
 # --- 4. Graph 구성 ---
 
-workflow = StateGraph(AgentState)
+def build_workflow() -> StateGraph:
+    workflow = StateGraph(AgentState)
+
+    # 노드 추가
+    workflow.add_node("analyze_competency", analyze_competency_node)
+    workflow.add_node("strategize_resume", strategize_resume_node)
+
+    # 엣지 연결 (순차 실행)
+    workflow.add_edge(START, "analyze_competency")
+    workflow.add_edge("analyze_competency", "strategize_resume")
+    workflow.add_edge("strategize_resume", END)
+    return workflow
 
-# 노드 추가
-workflow.add_node("analyze_competency", analyze_competency_node)
-workflow.add_node("strategize_resume", strategize_resume_node)
+# 컴파일 (import 시점이 아니라 처음 get_app()을 부를 때 한 번)
+_app = None
 
-# 엣지 연결 (순차 실행)
-workflow.add_edge(START, "analyze_competency")
-workflow.add_edge("analyze_competency", "strategize_resume")
-workflow.add_edge("strategize_resume", END)
+def get_app():
+    global _app
+    if _app is None:
+        _app = build_workflow().compile()
+    return _app
 
-# 컴파일
-app = workflow.compile()
+def __getattr__(name):
+    # 기존 코드의 `from jaebeom.rag import app` 호환
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- 5. 실행 (Execution) ---
 
@@ -174,7 +253,7 @@ if __name__ == "__main__":
     
     print("--- 2. Agent 실행 중 ---")
     # Step 4: 결과는 자동으로 MessageState 형식(리스트)으로 누적되어 반환됨
-    final_state = app.invoke(initial_state)
+    final_state = get_app().invoke(initial_state)
     
     print("\n--- [Step 2 결과: 직무 역량] ---")
     # 첫 번째 AI 응답 (analyze_competency_node 결과)
@@ -0,0 +1,456 @@
+# notion_mirror.py
+# 목적: 통합(integration)이 볼 수 있는 Notion 페이지 전체를 로컬 SQLite에 미러링하고,
+#       전문(full-text) 인덱스 + 벡터 인덱스를 만들어 search_notion이 로컬에서 답하도록 한다.
+#
+# 실행:
+#   python jia/notion_mirror.py          # 증분 동기화 (last_edited_time 기준)
+#   python jia/notion_mirror.py --full   # 전체 동기화 (삭제/권한 해제된 페이지 정리 포함)
+
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import functools
+import threading
+from array import array
+from datetime import datetime, timezone
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NOTION_API_BASE = os.getenv("NOTION_API_BASE", "https://api.notion.com/v1")
+NOTION_VERSION = "2022-06-28"
+DEFAULT_DB_PATH = os.getenv(
+    "NOTION_MIRROR_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "notion_mirror.db"),
+)
+
+# 블록 본문을 몇 단계 깊이까지 따라 내려갈지 (토글/하위 목록 등)
+MAX_BLOCK_DEPTH = 3
+# 벡터 인덱스용 청크 크기 (문자 수)
+CHUNK_SIZE = 800
+# 검색어 임베딩 요청 제한 시간(초). 재시도 없이 이 안에 못 받으면 전문 검색만으로 답합니다.
+QUERY_EMBED_TIMEOUT = float(os.getenv("NOTION_MIRROR_EMBED_TIMEOUT", "2"))
+# 검색어 임베딩이 한 번 실패하면(오프라인 등) 이 시간(초) 동안은 시도하지 않고 전문 검색만 사용
+EMBED_RETRY_AFTER = 300
+# 텍스트를 추출할 블록 타입
+TEXT_BLOCK_TYPES = (
+    "paragraph", "heading_1", "heading_2", "heading_3",
+    "bulleted_list_item", "numbered_list_item", "to_do",
+    "toggle", "quote", "callout", "code",
+)
+
+
+# -----------------------------
+# 1) 로컬 저장소 (SQLite)
+# -----------------------------
+def open_mirror(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """미러 DB를 열고 필요한 테이블을 만듭니다."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS pages (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            url TEXT,
+            last_edited_time TEXT NOT NULL,
+            content TEXT NOT NULL,
+            synced_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            page_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            vector BLOB,
+            PRIMARY KEY (page_id, idx)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """)
+    # 한글은 조사가 뒤에 붙으므로 unicode61 + 접두어 검색("성과"*)으로 충분히 잡힌다.
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts "
+        "USING fts5(page_id UNINDEXED, title, content, tokenize='unicode61')"
+    )
+    return conn
+
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else default
+
+
+def _set_meta(conn, key, value):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+
+
+def _delete_page(conn, page_id):
+    conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+    conn.execute("DELETE FROM pages_fts WHERE page_id = ?", (page_id,))
+    conn.execute("DELETE FROM chunks WHERE page_id = ?", (page_id,))
+
+
+# -----------------------------
+# 2) Notion API 호출
+# -----------------------------
+def _headers(api_key):
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Notion-Version": NOTION_VERSION,
+        "Content-Type": "application/json",
+    }
+
+
+def page_title(page: dict) -> str:
+    """Notion의 복잡한 제목 구조에서 제목 문자열을 꺼냅니다."""
+    for prop in page.get("properties", {}).values():
+        if prop.get("id") == "title" or prop.get("type") == "title":
+            return "".join(t.get("plain_text", "") for t in prop.get("title", [])) or "제목 없음"
+    return "제목 없음"
+
+
+def iter_search_pages(client: httpx.Client):
+    """search API를 커서로 끝까지 넘기며 페이지를 최신 수정순으로 돌려줍니다."""
+    payload = {
+        "filter": {"value": "page", "property": "object"},
+        "sort": {"direction": "descending", "timestamp": "last_edited_time"},
+        "page_size": 100,
+    }
+    while True:
+        resp = client.post(f"{NOTION_API_BASE}/search", json=payload)
+        resp.raise_for_status()
+        data = resp.json()
+        for page in data.get("results", []):
+            yield page
+        if not data.get("has_more"):
+            return
+        payload["start_cursor"] = data["next_cursor"]
+
+
+def fetch_page_text(client: httpx.Client, block_id: str, depth: int = 0) -> str:
+    """페이지(블록)의 하위 블록들을 따라가며 본문 텍스트를 모읍니다."""
+    lines = []
+    params = {"page_size": 100}
+    while True:
+        resp = client.get(f"{NOTION_API_BASE}/blocks/{block_id}/children", params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        for block in data.get("results", []):
+            body = block.get(block.get("type"), {})
+            if block.get("type") in TEXT_BLOCK_TYPES:
+                text = "".join(t.get("plain_text", "") for t in body.get("rich_text", []))
+                if text:
+                    lines.append(text)
+            if block.get("has_children") and depth < MAX_BLOCK_DEPTH:
+                child_text = fetch_page_text(client, block["id"], depth + 1)
+                if child_text:
+                    lines.append(child_text)
+        if not data.get("has_more"):
+            break
+        params["start_cursor"] = data["next_cursor"]
+    return "\n".join(lines)
+
+
+# -----------------------------
+# 3) 벡터 인덱스
+# -----------------------------
+def _split_chunks(text: str):
+    return [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)] or [""]
+
+
+def _get_embeddings(**kwargs):
+    """OpenAIEmbeddings를 돌려줍니다. 키가 없거나 패키지가 없으면 None (FTS만 사용)."""
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    try:
+        from langchain_openai import OpenAIEmbeddings
+    except ImportError:
+        return None
+    return OpenAIEmbeddings(**kwargs)
+
+
+def _pack_vector(vec) -> bytes:
+    """정규화한 float32 바이트열로 저장합니다. (JSON 대비 약 1/5 크기, 읽을 때 파싱 없음, 내적 = 코사인 유사도)"""
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return array("f", (x / norm for x in vec)).tobytes()
+
+
+def _unpack_vector(value):
+    if isinstance(value, str):
+        # 예전 형식(JSON 문자열, 정규화 전)
+        vec = json.loads(value)
+        norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+        return array("f", (x / norm for x in vec))
+    vec = array("f")
+    vec.frombytes(value)
+    return vec
+
+
+def _index_page(conn, page_id, title, content, embeddings):
+    conn.execute("DELETE FROM pages_fts WHERE page_id = ?", (page_id,))
+    conn.execute(
+        "INSERT INTO pages_fts (page_id, title, content) VALUES (?, ?, ?)",
+        (page_id, title, content),
+    )
+    conn.execute("DELETE FROM chunks WHERE page_id = ?", (page_id,))
+    chunks = _split_chunks(f"{title}\n{content}")
+    vectors = [None] * len(chunks)
+    if embeddings is not None:
+        try:
+            vectors = embeddings.embed_documents(chunks)
+        except Exception as e:
+            print(f"   ⚠️ 임베딩 실패 ({title}): {e} → 전문 검색만 사용")
+    conn.executemany(
+        "INSERT INTO chunks (page_id, idx, text, vector) VALUES (?, ?, ?, ?)",
+        [
+            (page_id, i, chunk, _pack_vector(vec) if vec is not None else None)
+            for i, (chunk, vec) in enumerate(zip(chunks, vectors))
+        ],
+    )
+
+
+# -----------------------------
+# 4) 동기화
+# -----------------------------
+def sync(db_path: str = DEFAULT_DB_PATH, full: bool = False) -> dict:
+    """
+    Notion 워크스페이스를 로컬 미러로 동기화합니다.
+    - 증분: 마지막 동기화 시점보다 이후에 수정된 페이지만 본문을 다시 받습니다.
+      (search 결과가 last_edited_time 내림차순이므로, 더 오래된 페이지가 나오면 중단)
+    - 전체(full): 모든 페이지를 확인하고, 더 이상 보이지 않는 페이지는 미러에서 지웁니다.
+    """
+    api_key = os.getenv("NOTION_API_KEY")
+    if not api_key:
+        raise RuntimeError("NOTION_API_KEY가 환경변수에 없습니다.")
+
+    conn = open_mirror(db_path)
+    watermark = None if full else _get_meta(conn, "watermark")
+    known = {
+        row["id"]: row["last_edited_time"]
+        for row in conn.execute("SELECT id, last_edited_time FROM pages")
+    }
+    embeddings = _get_embeddings()
+    now = datetime.now(timezone.utc).isoformat()
+    stats = {"seen": 0, "updated": 0, "deleted": 0}
+    seen_ids = set()
+    newest = watermark
+
+    with httpx.Client(headers=_headers(api_key), timeout=30.0) as client:
+        for page in iter_search_pages(client):
+            edited = page["last_edited_time"]
+            # ISO8601(UTC, 동일 포맷)이므로 문자열 비교로 시간 비교가 됩니다.
+            if watermark and edited < watermark:
+                break
+            stats["seen"] += 1
+            seen_ids.add(page["id"])
+            if newest is None or edited > newest:
+                newest = edited
+            if known.get(page["id"]) == edited:
+                continue
+
+            title = page_title(page)
+            content = fetch_page_text(client, page["id"])
+            conn.execute(
+                "INSERT INTO pages (id, title, url, last_edited_time, content, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, url = excluded.url, "
+                "last_edited_time = excluded.last_edited_time, content = excluded.content, "
+                "synced_at = excluded.synced_at",
+                (page["id"], title, page.get("url", ""), edited, content, now),
+            )
+            _index_page(conn, page["id"], title, content, embeddings)
+            conn.commit()
+            stats["updated"] += 1
+            print(f"   📄 동기화: {title}")
+
+    if full:
+        for page_id in set(known) - seen_ids:
+            _delete_page(conn, page_id)
+            stats["deleted"] += 1
+
+    if newest:
+        _set_meta(conn, "watermark", newest)
+    _set_meta(conn, "last_sync", now)
+    conn.commit()
+    conn.close()
+    return stats
+
+
+# -----------------------------
+# 5) 로컬 검색
+# -----------------------------
+def _open_readonly(db_path: str) -> sqlite3.Connection:
+    """검색용 읽기 전용 연결. (테이블 생성 없이, 동기화 중인 DB를 건드리지 않음)"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _file_version(db_path: str):
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _has_pages(db_path: str, version) -> bool:
+    try:
+        conn = _open_readonly(db_path)
+    except sqlite3.Error:
+        return False
+    try:
+        return conn.execute("SELECT 1 FROM pages LIMIT 1").fetchone() is not None
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+def has_mirror(db_path: str = DEFAULT_DB_PATH) -> bool:
+    """
+    미러 DB가 있고 페이지가 한 개 이상 들어 있는지 확인합니다.
+    search_notion이 호출마다 부르므로 파일이 바뀌지 않았으면 (수정 시각, 크기 기준) 이전 결과를 씁니다.
+    """
+    version = _file_version(db_path)
+    return version is not None and _has_pages(os.path.abspath(db_path), version)
+
+
+def _fts_query(query: str) -> str:
+    # 각 단어를 접두어 검색으로 바꿉니다. ("프로젝트" → "프로젝트"* 는 "프로젝트를"도 매칭)
+    # 따옴표만 있는 검색어 등으로 단어가 남지 않으면 빈 문자열 (MATCH를 실행하지 않음)
+    terms = [t.replace('"', "") for t in query.split()]
+    return " OR ".join(f'"{t}"*' for t in terms if t)
+
+
+try:
+    import numpy as _np
+except ImportError:  # numpy가 없으면 순수 파이썬 내적으로 계산
+    _np = None
+
+_vector_cache = {}  # db 경로 -> (파일 버전, page_id 목록, 벡터 행렬 또는 목록)
+_vector_cache_lock = threading.Lock()
+_embed_down_until = 0.0
+
+
+def _load_vectors(conn, db_path: str):
+    """청크 벡터를 한 번 읽어 메모리에 둡니다. DB 파일이 바뀌면(동기화 후) 다시 읽습니다."""
+    version = _file_version(db_path)
+    key = os.path.abspath(db_path)
+    with _vector_cache_lock:
+        cached = _vector_cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+    page_ids, vectors = [], []
+    for row in conn.execute("SELECT page_id, vector FROM chunks WHERE vector IS NOT NULL"):
+        page_ids.append(row["page_id"])
+        vectors.append(_unpack_vector(row["vector"]))
+    if _np is not None and vectors:
+        vectors = _np.array(vectors, dtype=_np.float32)
+    with _vector_cache_lock:
+        _vector_cache[key] = (version, page_ids, vectors)
+    return page_ids, vectors
+
+
+@functools.lru_cache(maxsize=256)
+def _query_vector(query: str):
+    """검색어 임베딩 (재시도 없이 QUERY_EMBED_TIMEOUT 안에). 성공한 결과만 캐시되고 실패는 예외로 나갑니다."""
+    # 검색어는 짧으므로 길이 검사(tiktoken 인코딩 파일 필요)를 하지 않습니다.
+    embeddings = _get_embeddings(timeout=QUERY_EMBED_TIMEOUT, max_retries=0, check_embedding_ctx_length=False)
+    return tuple(embeddings.embed_query(query))
+
+
+def _vector_ranking(conn, query, limit, db_path: str = DEFAULT_DB_PATH):
+    global _embed_down_until
+    if not os.getenv("OPENAI_API_KEY") or time.monotonic() < _embed_down_until:
+        return []
+    page_ids, vectors = _load_vectors(conn, db_path)
+    if not page_ids:
+        return []
+    try:
+        qvec = _query_vector(query)
+    except Exception as e:
+        # 오프라인 등으로 쿼리 임베딩이 불가능하면 한동안 전문 검색만 사용
+        _embed_down_until = time.monotonic() + EMBED_RETRY_AFTER
+        print(f"   ⚠️ 검색어 임베딩 실패: {e} → {EMBED_RETRY_AFTER}초 동안 전문 검색만 사용")
+        return []
+    norm = math.sqrt(sum(x * x for x in qvec)) or 1.0
+    if _np is not None:
+        scores = (vectors @ _np.asarray(qvec, dtype=_np.float32) / norm).tolist()
+    else:
+        scores = [sum(x * y for x, y in zip(vec, qvec)) / norm for vec in vectors]
+    best = {}
+    for page_id, score in zip(page_ids, scores):
+        if score > best.get(page_id, -1.0):
+            best[page_id] = score
+    return sorted(best, key=best.get, reverse=True)[:limit]
+
+
+def search_local(query: str, limit: int = 10, db_path: str = DEFAULT_DB_PATH) -> list:
+    """
+    로컬 미러에서 검색합니다.
+    전문 검색(bm25)과 벡터 검색 결과를 Reciprocal Rank Fusion으로 합칩니다.
+    검색어 임베딩을 제한 시간 안에 받지 못하면(오프라인 등) 전문 검색만으로 답합니다.
+    검색어가 비어 있으면 최근 수정된 페이지를 돌려줍니다.
+    """
+    conn = _open_readonly(db_path)
+    try:
+        if not query.strip():
+            rows = conn.execute(
+                "SELECT id, title, url, content FROM pages "
+                "ORDER BY last_edited_time DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [dict(r) for r in rows]
+
+        match = _fts_query(query)
+        fts_ids = [
+            row["page_id"] for row in conn.execute(
+                "SELECT page_id FROM pages_fts WHERE pages_fts MATCH ? "
+                "ORDER BY bm25(pages_fts) LIMIT ?",
+                (match, limit * 2),
+            )
+        ] if match else []
+        vec_ids = _vector_ranking(conn, query, limit * 2, db_path)
+
+        scores = {}
+        for ranking in (fts_ids, vec_ids):
+            for rank, page_id in enumerate(ranking):
+                scores[page_id] = scores.get(page_id, 0.0) + 1.0 / (60 + rank)
+
+        results = []
+        for page_id in sorted(scores, key=scores.get, reverse=True)[:limit]:
+            row = conn.execute(
+                "SELECT id, title, url, content FROM pages WHERE id = ?", (page_id,)
+            ).fetchone()
+            if row:
+                results.append(dict(row))
+        return results
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notion 워크스페이스 로컬 미러 동기화")
+    parser.add_argument("--full", action="store_true", help="전체 동기화 (삭제된 페이지 정리)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="미러 DB 경로")
+    args = parser.parse_args()
+
+    print(f"🔄 Notion 동기화 시작 ({'전체' if args.full else '증분'}) → {args.db}")
+    try:
+        result = sync(args.db, full=args.full)
+    except Exception as e:
+        print(f"❌ 동기화 실패: {e}")
+        sys.exit(1)
+    print(f"✅ 완료: 확인 {result['seen']}개 / 갱신 {result['updated']}개 / 삭제 {result['deleted']}개")
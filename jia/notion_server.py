@@ -2,18 +2,31 @@
 from mcp.server.fastmcp import FastMCP
 import httpx
 import os
+import sys
+import asyncio
+
+# 프로젝트 루트를 sys.path에 추가 (jia.notion_mirror import용)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jia.notion_mirror import has_mirror, search_local, NOTION_API_BASE
+from pilsang.server_env import getenv as server_getenv
 
 # 1. 서버 이름 정의
 mcp = FastMCP("MyNotionServer")
 
 # 2. 도구 만들기: Notion 검색 기능
 @mcp.tool()
-async def search_notion(query: str) -> str:
+async def search_notion(query: str, limit: int = 10) -> str:
     """
     Notion 전체에서 페이지를 검색합니다. 
     프로젝트 이름, 성과, 문서 내용을 찾을 때 사용하세요.
     """
-    api_key = os.getenv("NOTION_API_KEY")
+    # 로컬 미러(jia/notion_mirror.py로 동기화)가 있으면 네트워크 없이 바로 답합니다.
+    if has_mirror():
+        return await asyncio.to_thread(_search_mirror, query, limit)
+
+    # in-process로 붙으면 서버 설정의 env가 이 호출에만 적용됩니다. (pilsang/server_env.py)
+    api_key = server_getenv("NOTION_API_KEY")
     if not api_key:
         return "Error: NOTION_API_KEY가 환경변수에 없습니다."
 
@@ -25,13 +38,13 @@ async def search_notion(query: str) -> str:
     
     payload = {
         "query": query,
-        "page_size": 5, # 상위 5개만 검색
+        "page_size": min(limit, 100),
         "sort": {"direction": "descending", "timestamp": "last_edited_time"}
     }
 
     try:
         async with httpx.AsyncClient() as client:
-            resp = await client.post("https://api.notion.com/v1/search", headers=headers, json=payload)
+            resp = await client.post(f"{NOTION_API_BASE}/search", headers=headers, json=payload)
             
             if resp.status_code != 200:
                 return f"Notion API Error ({resp.status_code}): {resp.text}"
@@ -61,6 +74,22 @@ async def search_notion(query: str) -> str:
     except Exception as e:
         return f"검색 중 에러 발생: {str(e)}"
 
+def _search_mirror(query: str, limit: int) -> str:
+    """로컬 미러 검색 결과를 원격 검색과 같은 형식으로 정리합니다."""
+    try:
+        pages = search_local(query, limit=limit)
+    except Exception as e:
+        return f"검색 중 에러 발생: {str(e)}"
+
+    if not pages:
+        return "검색 결과가 없습니다."
+
+    results = []
+    for page in pages:
+        snippet = " ".join(page["content"].split())[:200]
+        results.append(f"- [문서] {page['title']}\n  URL: {page['url']}\n  내용: {snippet}")
+    return "\n".join(results)
+
 # 3. 서버 실행
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+Google Docs 일괄 내보내기.
+
+코호트 단위로 완성된 결과(자기소개서 + 면접 질문)를 모아 한 번에 Google Docs로 올립니다.
+- 크기가 제한된 워커 풀에서 문서별 create / batchUpdate를 동시에 진행 (스레드마다 Docs 서비스 1개)
+- 모든 API 요청은 토큰 버킷을 거치므로 분당 한도(사용자 쿼터)를 넘지 않음. 429/5xx는 Retry-After 또는 지수 백오프 후 재시도
+- 항목 키(key)마다 doc_sync로 같은 문서를 유지 (재실행 시 변경분만 반영)
+- 완료/실패를 매니페스트(JSONL)에 기록하므로, 중간에 실패해도 다시 실행하면 남은 항목만 처리
+  (완료로 기록된 항목도 제목/본문 해시가 바뀌었으면 다시 내보냄)
+
+입력 JSONL 한 줄: {"key": "지원자/공고 키", "title": "문서 제목", "content": "본문"}
+
+실행:
+    python jinwook/bulk_export.py results.jsonl --workers 8 --quota 300
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from googleapiclient.errors import HttpError
+
+from jinwook.google_auth import SCOPES, get_credential_holder
+from jinwook.doc_sync import write_document
+
+# Docs API 사용자별 분당 요청 한도 (Google Cloud Console 쿼터에 맞춰 조정)
+QUOTA_PER_MINUTE = int(os.getenv('GOOGLE_DOCS_QUOTA_PER_MINUTE', '300'))
+DEFAULT_WORKERS = int(os.getenv('GOOGLE_DOCS_EXPORT_WORKERS', '8'))
+MAX_RETRIES = 5
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """분당 rate개의 토큰이 일정하게 채워지는 버킷. acquire()는 토큰이 생길 때까지 기다립니다."""
+
+    def __init__(self, rate_per_minute: float, burst: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, int(rate_per_minute // 60) or 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after_seconds(value):
+    """
+    Retry-After 헤더 값(초 또는 HTTP-date)을 기다릴 초로 바꿉니다.
+    해석할 수 없으면 None (지수 백오프 사용)
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _ThrottledRequest:
+    """HttpRequest.execute()를 토큰 버킷 + 재시도로 감쌉니다."""
+
+    def __init__(self, request, bucket: TokenBucket, stats: dict):
+        self._request = request
+        self._bucket = bucket
+        self._stats = stats
+
+    def execute(self, *args, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            self._bucket.acquire()
+            try:
+                return self._request.execute(*args, **kwargs)
+            except HttpError as e:
+                status = int(getattr(e.resp, 'status', 0) or 0)
+                if status not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+                    raise
+                self._stats['retried'] += 1
+                retry_after = _retry_after_seconds(e.resp.get('retry-after') if hasattr(e.resp, 'get') else None)
+                delay = retry_after if retry_after is not None else min(32, 2 ** attempt) + random.random()
+                time.sleep(delay)
+
+
+class _ThrottledCollection:
+    def __init__(self, collection, bucket: TokenBucket, stats: dict):
+        self._collection = collection
+        self._bucket = bucket
+        self._stats = stats
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        def _call(*args, **kwargs):
+            return _ThrottledRequest(method(*args, **kwargs), self._bucket, self._stats)
+        return _call
+
+
+class ThrottledDocsService:
+    """documents()의 모든 요청이 같은 토큰 버킷을 거치도록 Docs 서비스 객체를 감쌉니다."""
+
+    def __init__(self, service, bucket: TokenBucket, stats: dict):
+        self._service = service
+        self._bucket = bucket
+        self._stats = stats
+
+    def documents(self):
+        return _ThrottledCollection(self._service.documents(), self._bucket, self._stats)
+
+
+def _load_manifest(path: str) -> dict:
+    """key -> 마지막 기록. 나중 줄이 앞 줄을 덮어씁니다."""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 중간에 끊긴 마지막 줄
+            done[record['key']] = record
+    return done
+
+
+def content_hash(item: dict) -> str:
+    """문서에 쓰이는 내용(제목 + 본문)의 해시. 매니페스트에 남겨 재실행 시 바뀐 항목을 찾습니다."""
+    payload = json.dumps([item.get('title') or item['key'], item['content']], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def export_documents(items: list, workers: int = DEFAULT_WORKERS, quota_per_minute: int = QUOTA_PER_MINUTE,
+                     manifest_path: str = None, auth=None) -> dict:
+    """
+    items([{"key", "title", "content"}])를 Google Docs로 내보냅니다.
+    manifest_path에 같은 내용(content_hash)으로 완료 기록된 key는 건너뜁니다.
+    반환: {"done": [...], "failed": [...], "skipped": n, "retried": n, "elapsed": 초}
+    """
+    auth = auth or get_credential_holder(SCOPES)
+    bucket = TokenBucket(quota_per_minute)
+    stats = {'retried': 0}
+    previous = _load_manifest(manifest_path)
+    pending = [item for item in items
+               if not (previous.get(item['key'], {}).get('status') == 'done'
+                       and previous[item['key']].get('content_hash') == content_hash(item))]
+    manifest_lock = threading.Lock()
+    manifest = open(manifest_path, 'a', encoding='utf-8') if manifest_path else None
+
+    def _record(record: dict):
+        if manifest is None:
+            return
+        with manifest_lock:
+            manifest.write(json.dumps(record, ensure_ascii=False) + '\n')
+            manifest.flush()
+
+    def _export(item: dict) -> dict:
+        service = ThrottledDocsService(auth.get_docs_service(), bucket, stats)
+        result = write_document(service, item['key'], item.get('title') or item['key'], item['content'])
+        record = {'key': item['key'], 'status': 'done', 'content_hash': content_hash(item),
+                  'document_id': result['document_id'], 'created': result['created'],
+                  'requests': result['requests']}
+        _record(record)
+        return record
+
+    start = time.perf_counter()
+    done, failed = [], []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='docs-export') as executor:
+            futures = {executor.submit(_export, item): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    done.append(future.result())
+                except Exception as e:
+                    record = {'key': item['key'], 'status': 'failed', 'error': str(e)}
+                    _record(record)
+                    failed.append(record)
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    return {
+        'done': done,
+        'failed': failed,
+        'skipped': len(items) - len(pending),
+        'retried': stats['retried'],
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def _read_items(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="완성된 결과를 Google Docs로 일괄 내보내기")
+    parser.add_argument("items", help="입력 JSONL ({key, title, content} 한 줄에 하나)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시 작업 수")
+    parser.add_argument("--quota", type=int, default=QUOTA_PER_MINUTE, help="분당 API 요청 한도")
+    parser.add_argument("--manifest", default=None, help="진행 기록 JSONL (기본: <items>.manifest.jsonl)")
+    args = parser.parse_args()
+
+    items = _read_items(args.items)
+    manifest_path = args.manifest or f"{os.path.splitext(args.items)[0]}.manifest.jsonl"
+    summary = export_documents(items, args.workers, args.quota, manifest_path)
+
+    print(f"📤 완료 {len(summary['done'])}건 / 실패 {len(summary['failed'])}건 / "
+          f"이전 실행에서 완료 {summary['skipped']}건 | 재시도 {summary['retried']}회 | {summary['elapsed']:.1f}s")
+    for record in summary['failed']:
+        print(f"   ❌ {record['key']}: {record['error']}")
+    if summary['failed']:
+        print(f"   다시 실행하면 실패한 항목만 처리합니다. (매니페스트: {manifest_path})")
+        sys.exit(1)
@@ -0,0 +1,220 @@
+"""
+Google Docs 변경분 반영(diff 기반 in-place 업데이트).
+
+지원자/공고별 키(doc_key)마다 문서 하나를 계속 사용합니다.
+마지막으로 쓴 본문과 revisionId를 로컬 상태 파일에 남겨 두었다가, 다음 실행에서는
+새 본문과의 차이만 deleteContentRange / insertText 요청으로 만들어 batchUpdate 한 번에 보냅니다.
+
+- 요청은 문서 뒤쪽부터 적용되도록 정렬하므로 앞쪽 인덱스가 밀리지 않습니다.
+- 인덱스는 Docs API 규칙대로 UTF-16 code unit 기준, 본문은 인덱스 1부터 시작합니다.
+- writeControl.requiredRevisionId로 마지막으로 쓴 revision을 지정합니다. 그 사이 누가 문서를
+  직접 고쳤다면 실제 본문을 다시 읽어 그 기준으로 diff를 만들고 한 번 더 시도합니다.
+- 문서가 삭제되었으면(404) 새로 만듭니다.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from difflib import SequenceMatcher
+
+from googleapiclient.errors import HttpError
+
+from jinwook.google_auth import file_lock
+
+# doc_key별 상태 파일(JSON) 저장 위치
+SYNC_STATE_DIR = os.getenv(
+    'GOOGLE_DOCS_SYNC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.doc_sync')
+)
+# 줄 단위 diff에서 바뀐 블록이 이 길이(문자)보다 짧으면 글자 단위로 한 번 더 좁힙니다.
+CHAR_DIFF_LIMIT = 4000
+
+# 실제 본문을 다시 읽을 때 필요한 필드만 요청
+BODY_FIELDS = 'revisionId,body(content(endIndex,paragraph(elements(textRun(content)))))'
+
+
+def _u16_len(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _opcodes(old: str, new: str):
+    """
+    (tag, i1, i2, j1, j2) 목록 (인덱스는 파이썬 문자열 기준).
+    먼저 줄 단위로 비교하고, 바뀐 블록이 작으면 그 안에서 글자 단위로 다시 비교합니다.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_pos = [0]
+    for line in old_lines:
+        old_pos.append(old_pos[-1] + len(line))
+    new_pos = [0]
+    for line in new_lines:
+        new_pos.append(new_pos[-1] + len(line))
+
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            continue
+        a1, a2, b1, b2 = old_pos[i1], old_pos[i2], new_pos[j1], new_pos[j2]
+        if tag == 'replace' and (a2 - a1) + (b2 - b1) <= CHAR_DIFF_LIMIT:
+            matcher = SequenceMatcher(None, old[a1:a2], new[b1:b2], autojunk=False)
+            for sub_tag, k1, k2, l1, l2 in matcher.get_opcodes():
+                if sub_tag != 'equal':
+                    yield sub_tag, a1 + k1, a1 + k2, b1 + l1, b1 + l2
+        else:
+            yield tag, a1, a2, b1, b2
+
+
+def build_update_requests(old: str, new: str) -> list:
+    """
+    old 본문을 new 본문으로 바꾸는 최소한의 batchUpdate 요청 목록.
+    본문 끝의 (삭제할 수 없는) 줄바꿈은 old/new에 포함하지 않습니다.
+    """
+    ops = list(_opcodes(old, new))
+    # 파이썬 인덱스 -> Docs 인덱스(UTF-16, 1부터) 변환을 위해 앞에서부터 누적 길이를 계산
+    u16_at = {}
+    cursor, units = 0, 0
+    for pos in sorted({i for op in ops for i in (op[1], op[2])}):
+        units += _u16_len(old[cursor:pos])
+        cursor = pos
+        u16_at[pos] = units + 1
+
+    requests = []
+    for tag, i1, i2, j1, j2 in reversed(ops):
+        if tag in ('delete', 'replace'):
+            requests.append({'deleteContentRange': {
+                'range': {'startIndex': u16_at[i1], 'endIndex': u16_at[i2]}
+            }})
+        if tag in ('insert', 'replace'):
+            requests.append({'insertText': {
+                'location': {'index': u16_at[i1]},
+                'text': new[j1:j2]
+            }})
+    return requests
+
+
+def _state_path(doc_key: str) -> str:
+    digest = hashlib.sha256(doc_key.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(SYNC_STATE_DIR, f"{digest}.json")
+
+
+def _load_state(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_state(path: str, state: dict):
+    fd, tmp_path = tempfile.mkstemp(prefix='.doc-sync-', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_body(service, document_id: str):
+    """
+    (revisionId, 본문 텍스트, 본문 끝 인덱스). 본문 텍스트는 끝의 줄바꿈을 제외합니다.
+    표 등 텍스트가 아닌 요소가 섞여 있어 인덱스를 재구성할 수 없으면 본문 텍스트는 None입니다.
+    """
+    document = service.documents().get(documentId=document_id, fields=BODY_FIELDS).execute()
+    content = document.get('body', {}).get('content', [])
+    text = ''.join(
+        run['textRun']['content']
+        for element in content if 'paragraph' in element
+        for run in element['paragraph'].get('elements', []) if 'textRun' in run
+    )
+    end_index = content[-1]['endIndex'] if content else 1
+    if _u16_len(text) + 1 != end_index or not text.endswith('\n'):
+        return document.get('revisionId'), None, end_index
+    return document.get('revisionId'), text[:-1], end_index
+
+
+def _create(service, title: str, content: str):
+    """새 문서를 만들고 본문을 씁니다. (document_id, revision_id)"""
+    document = service.documents().create(body={'title': title}).execute()
+    document_id, revision_id = document.get('documentId'), document.get('revisionId')
+    if content:
+        result = service.documents().batchUpdate(
+            documentId=document_id,
+            body={'requests': build_update_requests('', content)}
+        ).execute()
+        revision_id = (result.get('writeControl') or {}).get('requiredRevisionId')
+    return document_id, revision_id
+
+
+def _is_stale_revision(error: HttpError) -> bool:
+    """requiredRevisionId가 현재 revision과 달라 거절된 경우"""
+    return int(getattr(error.resp, 'status', 0) or 0) == 400 and b'FAILED_PRECONDITION' in (error.content or b'')
+
+
+def _is_not_found(error: HttpError) -> bool:
+    return int(getattr(error.resp, 'status', 0) or 0) == 404
+
+
+def _count(requests: list):
+    """(삭제한 글자 수, 삽입한 글자 수) - UTF-16 기준"""
+    deleted = sum(r['deleteContentRange']['range']['endIndex'] - r['deleteContentRange']['range']['startIndex']
+                  for r in requests if 'deleteContentRange' in r)
+    inserted = sum(_u16_len(r['insertText']['text']) for r in requests if 'insertText' in r)
+    return deleted, inserted
+
+
+def write_document(service, doc_key: str, title: str, content: str) -> dict:
+    """
+    doc_key의 문서 본문을 content로 맞춥니다. (처음이거나 문서가 지워졌으면 새로 생성)
+    반환: {"document_id", "created", "requests", "deleted", "inserted"}
+    deleted / inserted는 UTF-16 기준 글자 수입니다.
+    """
+    os.makedirs(SYNC_STATE_DIR, exist_ok=True)
+    path = _state_path(doc_key)
+
+    with file_lock(path):
+        state = _load_state(path)
+        requests = None
+        if state is not None:
+            document_id, revision_id = state['document_id'], state['revision_id']
+            base_text, end_index = state['text'], None
+            for attempt in range(2):
+                if base_text is not None:
+                    requests = build_update_requests(base_text, content)
+                else:
+                    # 본문을 텍스트로 재구성할 수 없으면 전체를 지우고 다시 씁니다.
+                    requests = ([{'deleteContentRange': {'range': {'startIndex': 1, 'endIndex': end_index - 1}}}]
+                                if end_index > 2 else []) + build_update_requests('', content)
+                if not requests:
+                    break
+                body = {'requests': requests}
+                if revision_id:
+                    body['writeControl'] = {'requiredRevisionId': revision_id}
+                try:
+                    result = service.documents().batchUpdate(documentId=document_id, body=body).execute()
+                    revision_id = (result.get('writeControl') or {}).get('requiredRevisionId')
+                    break
+                except HttpError as e:
+                    if _is_not_found(e):
+                        requests = None  # 문서가 지워졌으므로 아래에서 새로 만듭니다.
+                        break
+                    if not _is_stale_revision(e) or attempt == 1:
+                        raise
+                    # 마지막으로 쓴 뒤 누군가 문서를 고쳤으므로 실제 본문을 기준으로 다시 계산합니다.
+                    revision_id, base_text, end_index = _read_body(service, document_id)
+
+        if requests is None:
+            document_id, revision_id = _create(service, title, content)
+            requests = build_update_requests('', content)
+            created = True
+        else:
+            created = False
+
+        _save_state(path, {'doc_key': doc_key, 'document_id': document_id,
+                           'revision_id': revision_id, 'text': content})
+        deleted, inserted = _count(requests)
+        return {'document_id': document_id, 'created': created,
+                'requests': len(requests), 'deleted': deleted, 'inserted': inserted}
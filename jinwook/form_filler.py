@@ -1,40 +1,26 @@
 ﻿import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-import pickle
+
+# 프로젝트 루트를 sys.path에 추가 (jinwook.google_auth import용)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jinwook.google_auth import SCOPES, get_credential_holder
+from jinwook.doc_sync import write_document
 
 # 환경 변수 로드
 load_dotenv()
 
-# Google Docs API 스코프 (쓰기 권한 포함)
-SCOPES = ['https://www.googleapis.com/auth/documents']
-
 class FormFiller:
     def __init__(self):
         self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         self.google_creds = None
+        self._auth = get_credential_holder(SCOPES)
     
     def get_google_credentials(self):
-        """Google API 인증"""
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.google_creds = pickle.load(token)
-        
-        if not self.google_creds or not self.google_creds.valid:
-            if self.google_creds and self.google_creds.expired and self.google_creds.refresh_token:
-                self.google_creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                self.google_creds = flow.run_local_server(port=0)
-            
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.google_creds, token)
-        
+        """Google API 인증 (메모리에 캐시된 credentials 사용, 만료 전 미리 갱신)"""
+        self.google_creds = self._auth.get_credentials()
         return self.google_creds
     
     def generate_interview_prep(self, self_intro_content, custom_prompt=None):
@@ -70,10 +56,18 @@ class FormFiller:
         
         return response.choices[0].message.content
     
-    def create_google_doc(self, title, content):
-        """Google Docs 문서 생성"""
-        creds = self.get_google_credentials()
-        service = build('docs', 'v1', credentials=creds)
+    def create_google_doc(self, title, content, doc_key=None):
+        """Google Docs 문서 생성 (doc_key를 주면 같은 문서에 변경분만 반영)"""
+        service = self._auth.get_docs_service()
+
+        if doc_key:
+            result = write_document(service, doc_key, title, content)
+            if result['created']:
+                print(f"문서 생성됨: https://docs.google.com/document/d/{result['document_id']}/edit")
+            else:
+                print(f"기존 문서 갱신: 요청 {result['requests']}개 "
+                      f"(삭제 {result['deleted']}자, 삽입 {result['inserted']}자)")
+            return result['document_id']
         
         # 새 문서 생성
         document = service.documents().create(body={'title': title}).execute()
@@ -100,12 +94,12 @@ class FormFiller:
         
         return document_id
     
-    def process(self, self_intro_content, interview_prompt=None, doc_title="자기소개서 및 면접 준비 자료"):
+    def process(self, self_intro_content, interview_prompt=None, doc_title="자기소개서 및 면접 준비 자료", doc_key=None):
         """
         전체 프로세스:
         1. 입력받은 자기소개서 내용 확인
         2. 자기소개서 바탕으로 면접 질문 생성
-        3. 하나의 Google Doc에 통합하여 저장
+        3. 하나의 Google Doc에 통합하여 저장 (doc_key를 주면 같은 문서를 갱신)
         """
         print("\n" + "="*60)
         print("📝 자기소개서 처리 및 면접 질문 생성 시작")
@@ -128,7 +122,7 @@ class FormFiller:
         
         # 3. Google Docs 생성
         print("3. Google Docs에 작성 중...")
-        doc_id = self.create_google_doc(doc_title, final_content)
+        doc_id = self.create_google_doc(doc_title, final_content, doc_key)
         
         print("\n" + "="*60)
         print("🎉 프로세스 완료!")
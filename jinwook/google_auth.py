@@ -0,0 +1,220 @@
+import os
+import json
+import pickle
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.http import build_http
+
+# 파일 잠금은 구글 라이브러리 없이도 쓸 수 있도록 pilsang/file_lock.py에 있습니다. (기존 import 경로 유지)
+from pilsang.file_lock import file_lock  # noqa: F401
+
+# Google Docs API 스코프 (쓰기 권한 포함)
+SCOPES = ['https://www.googleapis.com/auth/documents']
+
+TOKEN_PATH = 'token.pickle'
+CLIENT_SECRETS_PATH = 'credentials.json'
+
+# 로컬 대역 Docs API 주소 (예: http://127.0.0.1:8765/). 설정 시 인증 없이 해당 주소로 요청합니다.
+DOCS_API_ENDPOINT = os.getenv('GOOGLE_DOCS_API_ENDPOINT')
+
+# 만료 이 시간 전부터 미리 갱신 (요청 도중 만료되어 재시도하는 일을 막기 위함)
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+@lru_cache(maxsize=None)
+def _static_discovery_doc(api: str, version: str):
+    """google-api-python-client에 포함된 정적 discovery 문서를 한 번만 읽어 파싱합니다."""
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+        doc = get_static_doc(api, version)
+    except ImportError:
+        doc = None
+    return json.loads(doc) if doc else None
+
+
+class _DocsResource:
+    """공유 documents() 리소스에 스레드 전용 http를 붙여 요청을 만듭니다."""
+
+    def __init__(self, resource, http):
+        self._resource = resource
+        self._http = http
+
+    def __getattr__(self, name):
+        method = getattr(self._resource, name)
+
+        def _call(*args, **kwargs):
+            request = method(*args, **kwargs)
+            request.http = self._http
+            return request
+        return _call
+
+
+class _DocsService:
+    """
+    스레드별 Docs 서비스 핸들.
+    googleapiclient는 service.documents()를 부를 때마다 discovery 문서로 리소스 객체를 새로 만들므로
+    (호출당 수십~수백 ms의 CPU, GIL 점유) 서비스/리소스는 프로세스에 하나만 만들어 공유하고,
+    스레드 안전하지 않은 httplib2 연결만 스레드마다 따로 씁니다. (googleapiclient 권장 방식)
+    """
+
+    def __init__(self, service, documents, http):
+        self._service = service
+        self._documents = _DocsResource(documents, http)
+
+    def documents(self):
+        return self._documents
+
+    def __getattr__(self, name):
+        return getattr(self._service, name)
+
+
+class GoogleCredentialHolder:
+    """
+    Google 인증 정보와 Docs 서비스 객체를 메모리에 들고 있는 클래스.
+    - token.pickle은 처음 한 번만 읽고, 이후에는 메모리의 credentials를 사용
+    - 만료 REFRESH_MARGIN 전에 미리 갱신
+    - 갱신은 토큰 파일 잠금 안에서 수행하여, 여러 프로세스가 있어도 만료당 한 번만 갱신 (나머지는 디스크에서 새 토큰을 읽음)
+    - Docs 서비스는 프로세스에 한 번만 만들고, 스레드 안전하지 않은 httplib2 연결만 스레드별로 재사용
+    """
+
+    def __init__(self, scopes=SCOPES, token_path=TOKEN_PATH, client_secrets_path=CLIENT_SECRETS_PATH):
+        self.scopes = list(scopes)
+        self.token_path = token_path
+        self.client_secrets_path = client_secrets_path
+        self._creds = None
+        self._generation = 0  # credentials 객체가 바뀔 때마다 증가 (스레드별 서비스 재생성용)
+        self._lock = threading.RLock()
+        self._shared = None  # (generation, service, documents 리소스) - 모든 스레드가 공유
+        self._local = threading.local()
+
+    @staticmethod
+    def _needs_refresh(creds) -> bool:
+        if not creds or not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth의 expiry는 naive UTC datetime입니다.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - REFRESH_MARGIN <= now
+
+    def _read_token_file(self):
+        """디스크의 토큰을 읽습니다. 없거나 (예전 방식 동시 쓰기로) 깨져 있으면 None."""
+        if not os.path.exists(self.token_path):
+            return None
+        try:
+            with open(self.token_path, 'rb') as token:
+                return pickle.load(token)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            print(f"⚠️ {self.token_path}를 읽을 수 없습니다. 다시 갱신합니다.")
+            return None
+
+    def _load_token(self):
+        self._creds = self._read_token_file()
+
+    def _save_token(self):
+        """임시 파일에 쓴 뒤 os.replace로 교체합니다. (다른 프로세스는 항상 완전한 파일만 봄)"""
+        directory = os.path.dirname(os.path.abspath(self.token_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.token-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as token:
+                pickle.dump(self._creds, token)
+                token.flush()
+                os.fsync(token.fileno())
+            os.replace(tmp_path, self.token_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _refresh_or_login(self):
+        """
+        프로세스 간 single-flight 갱신.
+        토큰 파일 잠금을 잡은 뒤 디스크를 다시 읽어, 다른 프로세스가 이미 갱신했다면 그 토큰을 쓰고
+        아니면 이 프로세스가 한 번만 갱신해서 원자적으로 저장합니다.
+        """
+        with file_lock(self.token_path):
+            on_disk = self._read_token_file()
+            if on_disk is not None and not self._needs_refresh(on_disk):
+                # 다른 프로세스가 이미 갱신해 두었으므로 그 토큰을 그대로 사용합니다.
+                self._creds = on_disk
+                self._generation += 1
+                return
+            if self._creds is None:
+                self._creds = on_disk
+
+            if self._creds and self._creds.refresh_token:
+                # 같은 객체를 갱신하므로 스레드별 서비스는 그대로 재사용됩니다.
+                self._creds.refresh(Request())
+            else:
+                if not os.path.exists(self.client_secrets_path):
+                    raise FileNotFoundError(
+                        "credentials.json 파일이 필요합니다. "
+                        "Google Cloud Console에서 다운로드하세요."
+                    )
+                flow = InstalledAppFlow.from_client_secrets_file(self.client_secrets_path, self.scopes)
+                self._creds = flow.run_local_server(port=0)
+                self._generation += 1
+            self._save_token()
+
+    def get_credentials(self):
+        """유효한 credentials를 돌려줍니다. (필요할 때만 디스크 읽기 / 갱신)"""
+        if DOCS_API_ENDPOINT:
+            # 로컬 대역(stand-in) Docs API를 쓸 때는 인증이 필요 없습니다.
+            from google.auth.credentials import AnonymousCredentials
+            if self._creds is None:
+                self._creds = AnonymousCredentials()
+            return self._creds
+        with self._lock:
+            if self._creds is None:
+                self._load_token()
+                self._generation += 1
+            if self._needs_refresh(self._creds):
+                self._refresh_or_login()
+            return self._creds
+
+    def _build_service(self, creds):
+        client_options = {'api_endpoint': DOCS_API_ENDPOINT} if DOCS_API_ENDPOINT else None
+        doc = _static_discovery_doc('docs', 'v1')
+        if doc is not None:
+            return build_from_document(doc, credentials=creds, client_options=client_options)
+        return build('docs', 'v1', credentials=creds, client_options=client_options)
+
+    def get_docs_service(self):
+        """
+        현재 스레드의 Docs 서비스 핸들을 돌려줍니다.
+        서비스 객체는 (정적 discovery 문서로) 프로세스에 한 번만 만들고, 스레드마다 http 연결만 따로 둡니다.
+        """
+        with self._lock:
+            creds = self.get_credentials()
+            generation = self._generation
+            if self._shared is None or self._shared[0] != generation:
+                service = self._build_service(creds)
+                self._shared = (generation, service, service.documents())
+            _, service, documents = self._shared
+        cached = getattr(self._local, 'docs_service', None)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        handle = _DocsService(service, documents, AuthorizedHttp(creds, http=build_http()))
+        self._local.docs_service = (generation, handle)
+        return handle
+
+
+_holders = {}
+_holders_lock = threading.Lock()
+
+
+def get_credential_holder(scopes=SCOPES, token_path=TOKEN_PATH) -> GoogleCredentialHolder:
+    """(스코프, 토큰 경로)별로 프로세스에 하나뿐인 GoogleCredentialHolder를 돌려줍니다."""
+    key = (tuple(scopes), os.path.abspath(token_path))
+    with _holders_lock:
+        if key not in _holders:
+            _holders[key] = GoogleCredentialHolder(scopes, token_path)
+        return _holders[key]
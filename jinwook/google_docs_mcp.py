@@ -1,12 +1,14 @@
 ﻿import asyncio
 from mcp.server import Server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 import os
-import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# 프로젝트 루트를 sys.path에 추가 (jinwook.google_auth import용)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jinwook.google_auth import get_credential_holder
 
 # Google Docs API 스코프
 SCOPES = ['https://www.googleapis.com/auth/documents.readonly']
@@ -15,30 +17,17 @@ class GoogleDocsMCPServer:
     def __init__(self):
         self.server = Server("google-docs-mcp")
         self.creds = None
+        self._auth = get_credential_holder(SCOPES)
+        # Google API(동기 execute())는 이벤트 루프를 막지 않도록 크기가 제한된 스레드 풀에서 실행합니다.
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('GOOGLE_DOCS_MAX_WORKERS', '8')),
+            thread_name_prefix='google-docs'
+        )
         self._setup_handlers()
     
     def _get_credentials(self):
-        """Google API 인증 처리"""
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.creds = pickle.load(token)
-        
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                if not os.path.exists('credentials.json'):
-                    raise FileNotFoundError(
-                        "credentials.json 파일이 필요합니다. "
-                        "Google Cloud Console에서 다운로드하세요."
-                    )
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                self.creds = flow.run_local_server(port=0)
-            
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.creds, token)
-        
+        """Google API 인증 처리 (메모리에 캐시된 credentials 사용, 만료 전 미리 갱신)"""
+        self.creds = self._auth.get_credentials()
         return self.creds
     
     def _setup_handlers(self):
@@ -72,14 +61,20 @@ class GoogleDocsMCPServer:
             else:
                 raise ValueError(f"Unknown tool: {name}")
     
+    def _fetch_document(self, document_id: str):
+        """문서 가져오기 (동기, 스레드 풀에서 실행)"""
+        service = self._auth.get_docs_service()
+        return service.documents().get(documentId=document_id).execute()
+    
+    async def _run_blocking(self, func, *args):
+        """동기 함수를 서버 전용 스레드 풀에서 실행합니다."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
     async def _read_google_doc(self, document_id: str):
         """Google Docs 문서 읽기"""
         try:
-            creds = self._get_credentials()
-            service = build('docs', 'v1', credentials=creds)
-            
-            # 문서 가져오기
-            document = service.documents().get(documentId=document_id).execute()
+            document = await self._run_blocking(self._fetch_document, document_id)
             
             # 텍스트 추출
             content = []
@@ -115,4 +110,4 @@ class GoogleDocsMCPServer:
 
 if __name__ == "__main__":
     server = GoogleDocsMCPServer()
-    asyncio.run(server.run())
+    asyncio.run(server.run())
@@ -1,74 +1,115 @@
 import asyncio
 import os
-import pickle
+import sys
+import threading
+from collections import OrderedDict
 from mcp.server import Server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 sys.path에 추가 (jinwook.google_auth import용)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jinwook.google_auth import SCOPES, get_credential_holder
+from jinwook.doc_sync import write_document
+
 # 환경 변수 로드
 load_dotenv()
 
-# Google Docs API 스코프 (쓰기 권한 포함)
-SCOPES = ['https://www.googleapis.com/auth/documents']
+# 본문 텍스트 추출에 필요한 필드만 요청 (스타일/인덱스 등 나머지 응답은 받지 않음)
+DOC_TEXT_FIELDS = 'documentId,revisionId,title,body(content(paragraph(elements(textRun(content)))))'
+# 캐시 확인용: revisionId만 받아 오는 가벼운 요청
+DOC_REVISION_FIELDS = 'revisionId'
+# 본문 텍스트 캐시에 보관할 최대 문서 수
+DOC_TEXT_CACHE_SIZE = int(os.getenv('GOOGLE_DOCS_TEXT_CACHE_SIZE', '256'))
+
 
 class GoogleDocsMCPServer:
     def __init__(self):
         self.server = Server("google-docs-mcp")
         self.creds = None
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self._auth = get_credential_holder(SCOPES)
+        # 핸들러가 이벤트 루프를 막지 않도록 OpenAI는 비동기 클라이언트,
+        # Google API(동기 execute())는 크기가 제한된 스레드 풀에서 실행합니다.
+        self.openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('GOOGLE_DOCS_MAX_WORKERS', '8')),
+            thread_name_prefix='google-docs'
+        )
+        # 문서 revision이 같으면 본문도 같으므로 documentId -> (revisionId, 제목, 본문)으로 캐시합니다.
+        self._doc_text_cache = OrderedDict()
+        self._doc_text_lock = threading.Lock()
         self._setup_handlers()
     
     def _get_credentials(self):
-        """Google API 인증 처리"""
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.creds = pickle.load(token)
-        
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                if not os.path.exists('credentials.json'):
-                    raise FileNotFoundError(
-                        "credentials.json 파일이 필요합니다. "
-                        "Google Cloud Console에서 다운로드하세요."
-                    )
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                self.creds = flow.run_local_server(port=0)
-            
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.creds, token)
-        
+        """Google API 인증 처리 (메모리에 캐시된 credentials 사용, 만료 전 미리 갱신)"""
+        self.creds = self._auth.get_credentials()
         return self.creds
     
-    def _read_google_doc(self, document_id: str):
-        """Google Docs 문서 읽기"""
-        creds = self._get_credentials()
-        service = build('docs', 'v1', credentials=creds)
-        
-        document = service.documents().get(documentId=document_id).execute()
-        
-        # 텍스트 추출
+    @staticmethod
+    def _extract_text(document: dict) -> str:
+        """documents.get 응답에서 본문 텍스트만 이어 붙입니다."""
         content = []
         for element in document.get('body', {}).get('content', []):
             if 'paragraph' in element:
                 for text_run in element['paragraph'].get('elements', []):
                     if 'textRun' in text_run:
                         content.append(text_run['textRun']['content'])
-        
-        full_text = ''.join(content)
-        return full_text
-    
-    def _create_google_doc(self, title: str, content: str):
-        """Google Docs 문서 생성"""
-        creds = self._get_credentials()
-        service = build('docs', 'v1', credentials=creds)
+        return ''.join(content)
+
+    def _cached_doc_text(self, document_id: str, revision_id: str = None):
+        """캐시된 (revisionId, 제목, 본문). revision_id를 주면 그 revision일 때만 돌려줍니다."""
+        with self._doc_text_lock:
+            entry = self._doc_text_cache.get(document_id)
+            if entry is None or (revision_id is not None and entry[0] != revision_id):
+                return None
+            self._doc_text_cache.move_to_end(document_id)
+            return entry
+
+    def _store_doc_text(self, document_id: str, revision_id: str, title: str, text: str):
+        with self._doc_text_lock:
+            self._doc_text_cache[document_id] = (revision_id, title, text)
+            self._doc_text_cache.move_to_end(document_id)
+            while len(self._doc_text_cache) > DOC_TEXT_CACHE_SIZE:
+                self._doc_text_cache.popitem(last=False)
+
+    def _fetch_doc_text(self, document_id: str):
+        """
+        Google Docs 문서의 (제목, 본문)을 읽습니다.
+        이 문서를 읽은 적이 있으면 revisionId만 먼저 확인해, 바뀌지 않았으면 본문을 다시 받지 않습니다.
+        """
+        documents = self._auth.get_docs_service().documents()
+
+        if self._cached_doc_text(document_id) is not None:
+            probe = documents.get(documentId=document_id, fields=DOC_REVISION_FIELDS).execute()
+            cached = self._cached_doc_text(document_id, probe.get('revisionId'))
+            if cached is not None:
+                return cached[1], cached[2]
+
+        document = documents.get(documentId=document_id, fields=DOC_TEXT_FIELDS).execute()
+        title, text = document.get('title', ''), self._extract_text(document)
+        self._store_doc_text(document_id, document.get('revisionId'), title, text)
+        return title, text
+
+    def _read_google_doc(self, document_id: str):
+        """Google Docs 문서 읽기"""
+        return self._fetch_doc_text(document_id)[1]
+
+    def _create_google_doc(self, title: str, content: str, doc_key: str = None):
+        """
+        Google Docs 문서 생성.
+        doc_key를 주면 그 키의 문서를 계속 사용하고, 이전에 쓴 내용과 달라진 부분만 반영합니다.
+        """
+        service = self._auth.get_docs_service()
+
+        if doc_key:
+            result = write_document(service, doc_key, title, content)
+            if not result['created']:
+                print(f"📝 기존 문서 갱신: 요청 {result['requests']}개 "
+                      f"(삭제 {result['deleted']}자, 삽입 {result['inserted']}자)")
+            return result['document_id']
         
         # 새 문서 생성
         document = service.documents().create(body={'title': title}).execute()
@@ -93,7 +134,12 @@ class GoogleDocsMCPServer:
         
         return document_id
     
-    def _fill_form_with_ai(self, form_template: str, user_prompt: str):
+    async def _run_blocking(self, func, *args):
+        """동기 함수를 서버 전용 스레드 풀에서 실행합니다."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def _fill_form_with_ai(self, form_template: str, user_prompt: str):
         """OpenAI GPT로 양식 채우기"""
         prompt = f"""
 다음은 양식 템플릿입니다:
@@ -105,7 +151,7 @@ class GoogleDocsMCPServer:
 위 양식을 사용자 요청에 맞게 채워주세요. 양식의 구조를 유지하면서 내용을 작성해주세요.
 """
         
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "당신은 양식을 채우는 전문가입니다."},
@@ -115,7 +161,7 @@ class GoogleDocsMCPServer:
         
         return response.choices[0].message.content
     
-    def _generate_interview_prep(self, base_content: str, user_prompt: str):
+    async def _generate_interview_prep(self, base_content: str, user_prompt: str):
         """기존 자기소개서를 바탕으로 면접 준비 자료 생성"""
         prompt = f"""
 다음은 작성된 자기소개서입니다:
@@ -127,7 +173,7 @@ class GoogleDocsMCPServer:
 위 자기소개서를 바탕으로 사용자 요청에 맞는 면접 준비 자료를 작성해주세요.
 """
         
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "당신은 면접 준비를 도와주는 커리어 코치입니다."},
@@ -158,6 +204,21 @@ class GoogleDocsMCPServer:
                         "required": ["document_id"]
                     }
                 ),
+                Tool(
+                    name="read_google_docs",
+                    description="여러 Google Docs 문서를 한 번에 읽어옵니다 (동시 요청, 바뀌지 않은 문서는 캐시 사용)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "document_ids": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Google Docs 문서 ID 목록 (URL의 /d/ 뒤 부분)"
+                            }
+                        },
+                        "required": ["document_ids"]
+                    }
+                ),
                 Tool(
                     name="create_documents",
                     description="양식 템플릿과 프롬프트를 바탕으로 자기소개서와 면접 준비 자료를 생성합니다",
@@ -184,6 +245,10 @@ class GoogleDocsMCPServer:
                                 "type": "string",
                                 "description": "문서 제목 (선택사항)",
                                 "default": "자기소개서 및 면접 준비 자료"
+                            },
+                            "doc_key": {
+                                "type": "string",
+                                "description": "지원자/공고별 문서 키 (선택사항). 지정하면 새 문서를 만들지 않고 같은 문서의 변경분만 갱신"
                             }
                         },
                         "required": ["form_template", "cover_letter_prompt", "interview_prep_prompt"]
@@ -196,12 +261,15 @@ class GoogleDocsMCPServer:
             """도구 실행"""
             if name == "read_google_doc":
                 return await self._handle_read_google_doc(arguments["document_id"])
+            elif name == "read_google_docs":
+                return await self._handle_read_google_docs(arguments["document_ids"])
             elif name == "create_documents":
                 return await self._handle_create_documents(
                     arguments["form_template"],
                     arguments["cover_letter_prompt"],
                     arguments["interview_prep_prompt"],
-                    arguments.get("doc_title", "자기소개서 및 면접 준비 자료")
+                    arguments.get("doc_title", "자기소개서 및 면접 준비 자료"),
+                    arguments.get("doc_key")
                 )
             else:
                 raise ValueError(f"Unknown tool: {name}")
@@ -209,7 +277,7 @@ class GoogleDocsMCPServer:
     async def _handle_read_google_doc(self, document_id: str):
         """Google Docs 문서 읽기 핸들러"""
         try:
-            full_text = self._read_google_doc(document_id)
+            full_text = await self._run_blocking(self._read_google_doc, document_id)
             
             return [TextContent(
                 type="text",
@@ -222,15 +290,36 @@ class GoogleDocsMCPServer:
                 text=f"오류 발생: {str(e)}"
             )]
     
+    async def _handle_read_google_docs(self, document_ids: list):
+        """여러 문서 읽기 핸들러 (스레드 풀에서 동시에 요청, 문서별 오류는 해당 문서에만 표시)"""
+        document_ids = list(dict.fromkeys(document_ids))  # 중복 ID는 한 번만 요청
+        results = await asyncio.gather(
+            *[self._run_blocking(self._fetch_doc_text, doc_id) for doc_id in document_ids],
+            return_exceptions=True
+        )
+
+        sections = []
+        for doc_id, result in zip(document_ids, results):
+            if isinstance(result, Exception):
+                sections.append(f"=== {doc_id} ===\n오류 발생: {str(result)}")
+            else:
+                title, text = result
+                sections.append(f"=== {title} ({doc_id}) ===\n{text}")
+
+        return [TextContent(
+            type="text",
+            text="\n\n".join(sections)
+        )]
+    
     async def _handle_create_documents(self, form_template: str, cover_letter_prompt: str, 
-                                      interview_prep_prompt: str, doc_title: str):
+                                      interview_prep_prompt: str, doc_title: str, doc_key: str = None):
         """자기소개서 + 면접 준비 자료 생성 핸들러 (단일 문서)"""
         try:
             # 1단계: 자기소개서 생성
-            cover_letter = self._fill_form_with_ai(form_template, cover_letter_prompt)
+            cover_letter = await self._fill_form_with_ai(form_template, cover_letter_prompt)
             
             # 2단계: 면접 준비 자료 생성
-            interview_prep = self._generate_interview_prep(cover_letter, interview_prep_prompt)
+            interview_prep = await self._generate_interview_prep(cover_letter, interview_prep_prompt)
             
             # 3단계: 내용 통합
             final_content = f"""[자기소개서]
@@ -242,7 +331,7 @@ class GoogleDocsMCPServer:
 {interview_prep}
 """
             # 4단계: Google Doc 생성
-            doc_id = self._create_google_doc(doc_title, final_content)
+            doc_id = await self._run_blocking(self._create_google_doc, doc_title, final_content, doc_key)
             
             result_text = f"""
 ✅ 문서 생성 완료!
@@ -0,0 +1,140 @@
+"""
+Google Docs 변경분 반영(jinwook/doc_sync.py) 테스트.
+
+Docs API 대신 benchmarks/stubs/docs_api.py의 로컬 대역 서버(FakeDocsBackend)를 띄워
+실제 googleapiclient 서비스로 요청을 보냅니다. (네트워크 / 인증 불필요)
+
+실행:
+    python -m pytest jinwook/test_doc_sync.py
+"""
+
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+
+from benchmarks.stubs.docs_api import start_docs_stub
+from jinwook import doc_sync
+from jinwook.doc_sync import build_update_requests, write_document
+
+DRAFT = "[자기소개서 문항 1] 지원 동기\n성능 개선 경험\n\n[자기소개서 문항 2] 협업\n리뷰 문화를 만들었습니다.\n"
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    """(서비스, FakeDocsBackend). 상태 파일은 테스트마다 새 폴더에 둡니다."""
+    monkeypatch.setattr(doc_sync, "SYNC_STATE_DIR", str(tmp_path / "doc_sync"))
+    server = start_docs_stub()
+    service = build("docs", "v1", credentials=AnonymousCredentials(),
+                    client_options={"api_endpoint": server.url}, static_discovery=True)
+    yield service, server.backend
+    server.stop()
+
+
+def _apply(backend, old: str, new: str) -> str:
+    """old 본문 문서에 build_update_requests(old, new)를 적용한 결과 본문."""
+    doc_id = backend.create("diff")["documentId"]
+    backend.docs[doc_id]["text"] = old + "\n"
+    status, payload = backend.batch_update(doc_id, {"requests": build_update_requests(old, new)})
+    assert status == 200, payload
+    return backend.text_of(doc_id)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("", DRAFT),
+    (DRAFT, ""),
+    (DRAFT, DRAFT.replace("성능 개선", "응답 시간 단축")),
+    (DRAFT, DRAFT + "[자기소개서 문항 3] 포부\n데이터 파이프라인\n"),
+    ("첫 줄\n둘째 줄\n셋째 줄", "둘째 줄\n첫 줄\n넷째 줄"),
+    # UTF-16 기준 인덱스: BMP 밖 문자(이모지)는 2 code unit
+    ("🚀 배포 자동화\n완료", "🚀🚀 배포 자동화 😀\n완료!"),
+])
+def test_build_update_requests_reaches_new_text(docs, old, new):
+    _, backend = docs
+    assert _apply(backend, old, new) == new
+
+
+def test_build_update_requests_random_edits(docs):
+    _, backend = docs
+    rng = random.Random(7)
+    alphabet = ["가", "나", "a", "b", "\n", " ", "😀"]
+    for _ in range(50):
+        old = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        new = list(old)
+        for _ in range(rng.randint(1, 5)):
+            pos = rng.randint(0, len(new))
+            if new and rng.random() < 0.5:
+                del new[min(pos, len(new) - 1)]
+            else:
+                new.insert(pos, rng.choice(alphabet))
+        new = "".join(new)
+        assert _apply(backend, old, new) == new
+
+
+def test_identical_content_sends_no_requests():
+    assert build_update_requests(DRAFT, DRAFT) == []
+
+
+def test_write_document_creates_then_updates_in_place(docs):
+    service, backend = docs
+
+    first = write_document(service, "kim:internship", "자소서", DRAFT)
+    assert first["created"]
+    doc_id = first["document_id"]
+    assert backend.text_of(doc_id) == DRAFT
+
+    revised = DRAFT.replace("리뷰 문화를", "코드 리뷰 문화를 팀에")
+    second = write_document(service, "kim:internship", "자소서", revised)
+
+    assert not second["created"] and second["document_id"] == doc_id
+    assert backend.text_of(doc_id) == revised
+    assert backend.calls["create"] == 1
+    # 바뀐 부분만 보냅니다.
+    assert second["deleted"] < 10 and second["inserted"] < 20
+
+    batch_updates = backend.calls["batchUpdate"]
+    unchanged = write_document(service, "kim:internship", "자소서", revised)
+    assert unchanged["requests"] == 0
+    assert backend.calls["batchUpdate"] == batch_updates
+
+
+def test_write_document_rebases_on_outside_edit(docs):
+    service, backend = docs
+    doc_id = write_document(service, "kim:internship", "자소서", DRAFT)["document_id"]
+
+    # 마지막으로 쓴 뒤 누군가 문서를 직접 고쳐 revision이 바뀐 경우
+    status, _ = backend.batch_update(doc_id, {"requests": [{"insertText": {"location": {"index": 1}, "text": "메모\n"}}]})
+    assert status == 200
+
+    revised = DRAFT.replace("협업", "협업 경험")
+    result = write_document(service, "kim:internship", "자소서", revised)
+
+    assert result["document_id"] == doc_id
+    assert backend.text_of(doc_id) == revised
+    assert backend.calls["get"] >= 1
+
+
+def test_write_document_recreates_deleted_document(docs):
+    service, backend = docs
+    doc_id = write_document(service, "kim:internship", "자소서", DRAFT)["document_id"]
+    del backend.docs[doc_id]
+
+    result = write_document(service, "kim:internship", "자소서", DRAFT + "추가\n")
+
+    assert result["created"] and result["document_id"] != doc_id
+    assert backend.text_of(result["document_id"]) == DRAFT + "추가\n"
+
+
+def test_doc_keys_keep_separate_documents(docs):
+    service, backend = docs
+    a = write_document(service, "kim:internship", "자소서", DRAFT)
+    b = write_document(service, "kim:newgrad", "자소서", DRAFT)
+
+    assert a["document_id"] != b["document_id"]
+    assert backend.calls["create"] == 2
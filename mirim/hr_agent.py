@@ -5,14 +5,20 @@
 # 결과를 출력하는지 빠르게 확인하는 단일 실행 스크립트
 
 import os
-from typing import TypedDict
+import re
+import functools
+from typing import TypedDict, Optional
 from dotenv import load_dotenv
 
+# API 키는 import 시점이 아니라 hr_agent 호출 시점에 확인합니다. (키 없이도 모듈을 불러올 수 있게)
 load_dotenv()
 
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise RuntimeError("`.env`에 OPENAI_API_KEY(또는 openai_api_key) 설정이 없습니다.")
+
+@functools.lru_cache(maxsize=4)
+def _client(api_key: str):
+    """API 키별 OpenAI 클라이언트 (연결 풀을 호출 사이에 재사용)"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
 
 # -----------------------------
 # 1) State 정의
@@ -20,6 +26,7 @@ if not api_key:
 class AgentState(TypedDict):
     current_text: str
     retry_count: int
+    scores: Optional[dict]  # 출력 전용: 평가 기준 ①~⑤ 점수 {1: 4, 2: 3, ...} (점수 줄이 없으면 None)
 
 
 # -----------------------------
@@ -85,6 +92,8 @@ HR_PROMPT = """
 - 평가 이유를 설명하지 마십시오.
 - 부족한 점을 "다음 생성에서 반드시 반영해야 할 작성 지시(message)"로 변환하십시오.
 - 문항 제목([자기소개서 문항 n])과 '+' 형식의 지시는 유지하십시오.
+- 보완이 필요한 문항만 출력하십시오. 이미 기준을 충족한 문항은 제목도 출력하지 마십시오.
+  (출력되지 않은 문항은 다음 생성에서 그대로 유지됩니다.)
 - 지시는 추상적 표현을 피하고, 실행 가능한 수준으로 구체화하십시오.
 
 (예: ❌ 경험을 더 구체적으로 쓰세요
@@ -94,19 +103,46 @@ HR_PROMPT = """
 [출력 형식 – 반드시 준수]
 
 - 첫 줄: [PASS] 또는 [REVISE] 중 하나만 출력
-- [REVISE]일 때만, 다음 줄부터
+- 둘째 줄: 평가 기준별 점수를 아래 형식 그대로 출력 (각 1~5 정수, 5가 가장 좋음, [PASS]/[REVISE] 모두 항상 출력)
+  [SCORES] ①=n ②=n ③=n ④=n ⑤=n
+- [REVISE]일 때만, 셋째 줄부터
   '수정된 자기소개서 문항 및 작성 지시(message)'를 출력
-- [PASS]일 때는 첫 줄만 출력하고 다른 문장은 절대 출력하지 마십시오
+- [PASS]일 때는 두 줄만 출력하고 다른 문장은 절대 출력하지 마십시오
 """.strip()
 
 
 # -----------------------------
-# 3) HR Agent (OpenAI가 여기서 태그/수정지시 생성)
+# 3) 점수 줄 파싱
+# -----------------------------
+SCORES_LINE = re.compile(r"^\s*\[SCORES\](.*)$", re.MULTILINE)
+SCORE_ITEM = re.compile(r"([①②③④⑤1-5])\s*[=:]\s*(\d+(?:\.\d+)?)")
+CRITERIA = {"①": 1, "②": 2, "③": 3, "④": 4, "⑤": 5}
+
+
+def parse_scores(hr_out: str):
+    """
+    HR 출력에서 [SCORES] 줄을 찾아 ({기준 번호: 점수}, 점수 줄을 뺀 텍스트)를 돌려줍니다.
+    점수 줄이 없거나 다섯 기준이 모두 있지 않으면 점수는 None.
+    """
+    match = SCORES_LINE.search(hr_out)
+    if not match:
+        return None, hr_out
+    scores = {}
+    for key, value in SCORE_ITEM.findall(match.group(1)):
+        scores[CRITERIA.get(key) or int(key)] = min(5.0, max(1.0, float(value)))
+    end = match.end() + 1 if hr_out[match.end():match.end() + 1] == "\n" else match.end()
+    text = (hr_out[:match.start()] + hr_out[end:]).strip()
+    return (scores if len(scores) == 5 else None), text
+
+
+# -----------------------------
+# 4) HR Agent (OpenAI가 여기서 태그/수정지시 생성)
 # -----------------------------
 def hr_agent(state: AgentState) -> AgentState:
     """
     input: state["current_text"]  (하나)
     output: state["current_text"] (하나) -> 첫 줄 [PASS] 또는 [REVISE]
+            state["scores"] -> 평가 기준 ①~⑤ 점수 (점수 줄은 current_text에서 제거)
     retry_count 증가는 이 함수에서 하지 않음(외부에서 루프 발생 시 올림)
     """
     print("--- HR Agent ---")
@@ -116,20 +152,10 @@ def hr_agent(state: AgentState) -> AgentState:
         raise RuntimeError("환경변수 OPENAI_API_KEY가 없습니다. 먼저 설정하세요.")
 
     # OpenAI 호출 (Responses API)
-    try:
-        from openai import OpenAI
-    except ImportError as e:
-        raise ImportError(
-            "openai 패키지가 없습니다. 먼저 설치하세요: pip install openai"
-        ) from e
-
-    client = OpenAI(api_key=api_key)
+    client = _client(api_key)  # 호출마다 새 연결을 맺지 않도록 재사용
 
-    # [수정] retry_count가 3 이상이면 강제로 PASS 처리
-    # (무한 루프 방지 및 빠른 진행을 위함)
-    if state["retry_count"] >= 3:
-        print(f"⚠️ Retry limit reached ({state['retry_count']}). Forcing [PASS].")
-        return {"current_text": "[PASS]", "retry_count": state["retry_count"]}
+    # 재시도 한도는 여기서 강제 [PASS]로 끊지 않습니다. 항상 평가하고 점수를 돌려주며,
+    # 언제 멈출지(점수 정체 / 재시도 한도)와 어떤 초안을 쓸지는 호출하는 워크플로우가 정합니다.
 
     input_blob = state["current_text"]
 
@@ -162,6 +188,8 @@ def hr_agent(state: AgentState) -> AgentState:
                     parts.append(getattr(c, "text", ""))
         hr_out = "\n".join(parts).strip()
 
+    scores, hr_out = parse_scores(hr_out)
+
     # 방어 로직: 태그가 깨지면 강제 REVISE
     if not hr_out:
         hr_out = "[REVISE]\n문항 제목([자기소개서 문항 n])과 '+' 형식을 유지하여 작성 지시(message)만 재설계하십시오."
@@ -174,11 +202,11 @@ def hr_agent(state: AgentState) -> AgentState:
                 "문항 제목([자기소개서 문항 n])과 '+' 형식을 유지하여 작성 지시(message)만 재설계하십시오."
             )
 
-    return {"current_text": hr_out, "retry_count": state["retry_count"]}
+    return {"current_text": hr_out, "retry_count": state["retry_count"], "scores": scores}
 
 
 # -----------------------------
-# 4) 로컬 테스트용 실행
+# 5) 로컬 테스트용 실행
 # -----------------------------
 def main():
     # ✅ 여기 input을 네가 임의로 바꾸면서 테스트하면 됨 (입력은 딱 1개 텍스트 덩어리)
@@ -207,6 +235,7 @@ def main():
 
     print("\n===== HR OUTPUT =====")
     print(out_state["current_text"])
+    print(f"점수: {out_state['scores']}")
     print("=====================\n")
 
     # 태그 확인(분기 확인용)
@@ -4,17 +4,22 @@
 # - 면접관 LLM이 질문 5개를 생성하는지 확인
 
 import os
+import functools
 from typing import TypedDict
 from dotenv import load_dotenv
 
 # -----------------------------
 # 0) 환경 변수 로드
 # -----------------------------
+# API 키는 import 시점이 아니라 interview_agent 호출 시점에 확인합니다. (키 없이도 모듈을 불러올 수 있게)
 load_dotenv()
 
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("`.env`에 OPENAI_API_KEY가 설정되어 있지 않습니다.")
+
+@functools.lru_cache(maxsize=4)
+def _client(api_key: str):
+    """API 키별 OpenAI 클라이언트 (연결 풀을 호출 사이에 재사용)"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
 
 # -----------------------------
 # 1) State 정의 (HR과 동일한 구조)
@@ -91,9 +96,11 @@ def interview_agent(state: AgentState) -> AgentState:
     """
     print("--- Interviewer Agent ---")
 
-    from openai import OpenAI
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("`.env`에 OPENAI_API_KEY가 설정되어 있지 않습니다.")
 
-    client = OpenAI(api_key=API_KEY)
+    client = _client(api_key)  # 호출마다 새 연결을 맺지 않도록 재사용
 
     input_blob = state["current_text"]
 
@@ -0,0 +1,162 @@
+"""
+여러 지원자 × 공고를 한 이벤트 루프에서 동시에 실행하는 배치 실행기.
+
+매니페스트(JSONL) 한 줄이 실행 하나입니다.
+    {"candidate_id": "kim", "github_id": "kim-dev", "posting": "https://...", "questions": "data_for_rag/questions.docx"}
+    (posting / questions 생략 시 v_all의 기본 파일, doc_key 생략 시 "<candidate_id>:<공고 이름>")
+
+- 전체 동시 실행 수: --concurrency, 단계별 한도: --stage-limit mcp_agent=2 (CV_STAGE_LIMITS와 같은 형식)
+- 실행 ID(thread_id)는 작업 키에서 결정적으로 만들어지므로, 다시 실행하면 끝난 작업은 건너뛰고
+  실패한 작업은 체크포인트에서 이어서 실행합니다.
+- 작업이 끝날 때마다 <out>/status.jsonl에 상태를 한 줄씩 추가합니다. 결과 파일은 출력 싱크(CV_OUTPUT_DIR)에 저장됩니다.
+
+실행:
+    python pilsang/batch_runner.py manifest.jsonl --concurrency 4 --stage-limit mcp_agent=2
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pilsang.stage_limits import STAGE_LIMITS, set_stage_limits, parse_stage_limits
+from pilsang.tool_cache import release_tool_cache
+from pilsang import tracing
+from pilsang.blob_store import resolve
+from pilsang import v_all
+
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_out")
+
+
+def job_key(job: dict) -> str:
+    """작업 식별자: 지원자 + 공고 (같은 키는 같은 실행 ID / 같은 문서를 사용)"""
+    return job.get("doc_key") or v_all.default_doc_key(job["candidate_id"], job.get("posting"))
+
+
+def _thread_id(key: str) -> str:
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"cv-agent:{key}").hex
+
+
+def read_manifest(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class StatusLog:
+    """작업 상태를 JSONL로 남깁니다. 같은 키의 마지막 줄이 현재 상태입니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def latest(self) -> dict:
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    records[record["key"]] = record
+        return records
+
+    def append(self, record: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+async def execute_job(job: dict) -> dict:
+    """
+    작업 하나를 실행하고 결과 기록을 돌려줍니다. (예외를 던지지 않고 status="failed"로 기록)
+    같은 작업 키의 체크포인트가 중간에 멈춰 있으면 처음부터가 아니라 거기서 이어서 실행합니다.
+    """
+    key = job_key(job)
+    run_id = _thread_id(key)
+    config = {"configurable": {"thread_id": run_id}, "callbacks": tracing.callbacks()}
+    started = time.time()
+    inputs = v_all.new_run_state(
+        run_id, candidate_id=job.get("candidate_id"), doc_key=key, github_id=job.get("github_id"),
+        posting_source=job.get("posting"), question_source=job.get("questions"),
+    )
+    if v_all.get_saver() is not None:
+        snapshot = await v_all.get_app().aget_state(config)
+        if snapshot.values and snapshot.next:
+            inputs = None  # 이전 실행이 중간에 실패 -> 체크포인트에서 이어서 실행
+    record = {"key": key, "candidate_id": job.get("candidate_id"), "run_id": run_id,
+              "resumed": inputs is None, "started_at": started}
+    try:
+        final = {}
+        async for output in v_all.get_app().astream(inputs, config, stream_mode="values"):
+            final = output
+        record.update(status="done", retries=final.get("retry_count"),
+                      resume_chars=len(resolve(final.get("resume_text")) or ""),
+                      question_chars=len(resolve(final.get("question_text")) or ""),
+                      artifacts=final.get("artifacts"))
+    except Exception as e:
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+    finally:
+        release_tool_cache(run_id, job.get("candidate_id"))
+    record["elapsed"] = round(time.time() - started, 2)
+    return record
+
+
+async def run_job(job: dict, status: StatusLog, limit: asyncio.Semaphore) -> dict:
+    async with limit:
+        key = job_key(job)
+        status.append({"key": key, "candidate_id": job.get("candidate_id"), "run_id": _thread_id(key),
+                       "started_at": time.time(), "status": "running"})
+        record = await execute_job(job)
+        status.append(record)
+        print(f"[batch] {key}: {record['status']} ({record['elapsed']}s)")
+        return record
+
+
+async def run_batch(jobs: list, concurrency: int = 4, out_dir: str = DEFAULT_OUT_DIR, rerun: bool = False) -> list:
+    """jobs를 최대 concurrency개씩 동시에 실행합니다. 이미 끝난 작업은 rerun=True가 아니면 건너뜁니다."""
+    status = StatusLog(os.path.join(out_dir, "status.jsonl"))
+    previous = status.latest()
+    pending = [job for job in jobs if rerun or previous.get(job_key(job), {}).get("status") != "done"]
+    if len(pending) < len(jobs):
+        print(f"[batch] 이미 끝난 작업 {len(jobs) - len(pending)}개는 건너뜁니다.")
+
+    # 동기 노드(RAG/HR/면접/문서)는 스레드에서 실행되므로 기본 스레드 풀 크기가 숨은 한도가 되지 않게 늘립니다.
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max(8, concurrency * 2), thread_name_prefix="cv-node"))
+
+    # 원격 MCP 서버(GitHub 등) 세션은 작업마다 새로 띄우지 않고 배치가 끝날 때까지 공유합니다.
+    from pilsang.inprocess_mcp import enable_session_pool, close_session_pool
+    enable_session_pool()
+    limit = asyncio.Semaphore(concurrency)
+    try:
+        return await asyncio.gather(*[run_job(job, status, limit) for job in pending])
+    finally:
+        await close_session_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 지원자/공고에 대해 워크플로우를 동시에 실행")
+    parser.add_argument("manifest", help="작업 목록 JSONL")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 실행할 작업 수")
+    parser.add_argument("--stage-limit", action="append", default=[], metavar="NODE=N",
+                        help="단계별 동시 실행 한도 (여러 번 지정 가능)")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="상태 기록 디렉터리")
+    parser.add_argument("--rerun", action="store_true", help="이미 끝난 작업도 다시 실행")
+    args = parser.parse_args()
+
+    if args.stage_limit:
+        set_stage_limits({**STAGE_LIMITS, **parse_stage_limits(",".join(args.stage_limit))})
+
+    started = time.time()
+    results = asyncio.run(run_batch(read_manifest(args.manifest), args.concurrency, args.out, args.rerun))
+    done = sum(r["status"] == "done" for r in results)
+    print(f"\n[batch] 완료 {done} / 실패 {len(results) - done} | {time.time() - started:.1f}s "
+          f"(상태: {os.path.join(args.out, 'status.jsonl')})")
+    if done < len(results):
+        sys.exit(1)
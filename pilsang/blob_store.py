@@ -0,0 +1,140 @@
+"""
+내용 주소(content-addressed) 블롭 저장소.
+
+큰 값(자소서 초안, RAG 결과 등)을 sha256 해시를 이름으로 한 파일로 한 번만 저장합니다.
+같은 내용은 몇 번을 저장해도 파일 하나이므로, 단계마다 같은 텍스트가 반복되는 체크포인트도 작게 유지됩니다.
+
+- 위치: CV_BLOB_DIR (기본 pilsang/.blobs), <해시 앞 2자리>/<해시> 구조
+- 저장 시 zlib 압축, 임시 파일에 쓴 뒤 os.replace로 교체 (여러 프로세스가 동시에 써도 안전)
+
+워크플로우 상태의 큰 텍스트 필드(자소서 초안, RAG 분석, 면접 질문)도 여기에 두고,
+상태에는 "blob:<sha256>" 참조 문자열만 담습니다. (put_text / resolve)
+- 노드가 상태를 주고받거나 체크포인트에 저장할 때 수십 바이트만 복사되고, 텍스트는 실제로 필요한 노드에서만 읽습니다.
+- 참조는 평범한 문자열이라 그대로 직렬화되어 다른 프로세스로 보낼 수 있습니다. (같은 CV_BLOB_DIR를 볼 때)
+- CV_STATE_BLOBS=memory면 상태 텍스트를 프로세스 메모리에만 둡니다. 단일 프로세스 전용이며,
+  체크포인트에서 다른 프로세스가 이어서 실행할 수 없습니다. (기본 disk)
+"""
+
+import os
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+BLOB_DIR = os.getenv("CV_BLOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".blobs"))
+STATE_BLOBS = os.getenv("CV_STATE_BLOBS", "disk")
+# 이보다 짧은 텍스트("[PASS]", 짧은 오류 메시지 등)는 참조 없이 상태에 그대로 둡니다.
+STATE_INLINE_LIMIT = int(os.getenv("CV_STATE_INLINE_LIMIT", "256"))
+REF_PREFIX = "blob:"
+
+
+class BlobStore:
+    def __init__(self, root: str = BLOB_DIR):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def put(self, data: bytes) -> str:
+        """data를 저장하고 sha256 해시(hex)를 돌려줍니다. 이미 있으면 다시 쓰지 않습니다."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".blob-", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+
+class MemoryBlobStore:
+    """프로세스 안에서만 쓰는 같은 인터페이스의 저장소 (테스트 / 단일 프로세스 실행용)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def has(self, digest: str) -> bool:
+        return digest in self._data
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._data.setdefault(digest, data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return self._data[digest]
+
+
+_stores = {}
+
+
+def get_blob_store(root: str = None) -> BlobStore:
+    """디렉터리별로 BlobStore 하나를 공유합니다."""
+    root = os.path.abspath(root or BLOB_DIR)
+    if root not in _stores:
+        _stores[root] = BlobStore(root)
+    return _stores[root]
+
+
+# --- 상태 필드 참조 ---
+
+_memory_store = MemoryBlobStore()
+_resolved = OrderedDict()  # digest -> text (내용 주소이므로 무효화가 필요 없음)
+_resolved_lock = threading.Lock()
+RESOLVE_CACHE_SIZE = 64
+
+
+def _state_store():
+    return _memory_store if STATE_BLOBS == "memory" else get_blob_store()
+
+
+def is_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(REF_PREFIX) and len(value) == len(REF_PREFIX) + 64
+
+
+def put_text(text):
+    """긴 텍스트는 저장소에 넣고 참조를, 짧은 텍스트 / None / 이미 참조인 값은 그대로 돌려줍니다."""
+    if not isinstance(text, str) or is_ref(text) or len(text) < STATE_INLINE_LIMIT:
+        return text
+    digest = _state_store().put(text.encode("utf-8"))
+    _remember(digest, text)
+    return REF_PREFIX + digest
+
+
+def resolve(value):
+    """참조면 텍스트를 읽어 돌려주고, 아니면 값을 그대로 돌려줍니다. 최근에 읽은 텍스트는 메모리에서 바로 돌려줍니다."""
+    if not is_ref(value):
+        return value
+    digest = value[len(REF_PREFIX):]
+    with _resolved_lock:
+        if digest in _resolved:
+            _resolved.move_to_end(digest)
+            return _resolved[digest]
+    text = _state_store().get(digest).decode("utf-8")
+    _remember(digest, text)
+    return text
+
+
+def _remember(digest: str, text: str):
+    with _resolved_lock:
+        _resolved[digest] = text
+        _resolved.move_to_end(digest)
+        while len(_resolved) > RESOLVE_CACHE_SIZE:
+            _resolved.popitem(last=False)
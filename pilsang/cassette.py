@@ -0,0 +1,347 @@
+"""
+LLM / 임베딩 / 검색 / MCP 도구 호출 녹화·재생 (카세트).
+
+실제 실행 한 번의 외부 호출 결과를 카세트 파일(JSONL)에 녹화해 두고, 재생 모드에서는 네트워크 없이 그 결과를 돌려줍니다.
+오케스트레이션 오버헤드, 동시 실행 설정, 재시도 루프 동작을 비용 없이 같은 입력으로 반복 측정하는 용도입니다.
+
+- CV_CASSETTE_MODE: off (기본) / record / replay
+- CV_CASSETTE: 카세트 파일 (기본 pilsang/cassettes/cassette.jsonl). 녹화는 이어서 추가하므로 새로 녹화하려면 파일을 지우세요.
+- CV_CASSETTE_LATENCY: 재생할 때 녹화된 응답 시간에 곱할 배수 (기본 0 = 바로 응답, 1 = 녹화 당시 그대로)
+- CV_CASSETTE_STRICT=1: 요청이 녹화와 정확히 같지 않으면 CassetteMiss. 기본은 같은 종류(모델 / 도구)의 녹화를 순서대로 대신 돌려줌
+  (프롬프트를 바꾼 뒤에도 흐름은 그대로 재생해 보기 위함)
+
+녹화 대상:
+- OpenAI SDK chat.completions / responses / embeddings 의 create (LangChain을 거치는 호출 포함, 스트리밍은 녹화하지 않음)
+- retriever 검색 결과 (wrap_retriever). 재생할 때는 문서 로드 / 벡터 DB 생성 없이 녹화된 문서를 돌려줌
+- MCP 서버의 도구 목록과 도구 호출 결과 (record_tools / replay_tools). 재생할 때는 서버를 띄우지 않음
+
+카세트 내용 보기:
+    python pilsang/cassette.py [cassette.jsonl]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import functools
+import threading
+from collections import defaultdict, Counter
+from typing import Callable, Optional
+
+MODE = os.getenv("CV_CASSETTE_MODE", "off")
+CASSETTE_FILE = os.getenv("CV_CASSETTE", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cassettes", "cassette.jsonl"))
+LATENCY_SCALE = float(os.getenv("CV_CASSETTE_LATENCY", "0"))
+STRICT = os.getenv("CV_CASSETTE_STRICT", "0") == "1"
+
+# 키 계산에서 뺄 요청 인자 (같은 요청이라도 호출마다 달라질 수 있는 전송 옵션)
+_TRANSPORT_ARGS = {"extra_headers", "extra_query", "extra_body", "timeout"}
+_RAW_RESPONSE_HEADER = "X-Stainless-Raw-Response"
+
+
+class CassetteMiss(LookupError):
+    """재생 모드에서 요청에 맞는 녹화가 없음"""
+
+
+def recording() -> bool:
+    return MODE == "record"
+
+
+def replaying() -> bool:
+    return MODE == "replay"
+
+
+def request_key(kind: str, name: str, request) -> str:
+    payload = json.dumps([kind, name, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """녹화 파일 하나. 같은 요청이 여러 번 녹화되어 있으면 녹화된 순서대로 돌려줍니다. (다 쓰면 마지막 것을 반복)"""
+
+    def __init__(self, path: str = CASSETTE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(list)
+        self._by_route = defaultdict(list)
+        self._served = Counter()
+        self.hits = 0
+        self.fallbacks = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry: dict):
+        self._by_key[entry["key"]].append(entry)
+        self._by_route[(entry["kind"], entry["name"])].append(entry)
+
+    def record(self, kind: str, name: str, request, response, elapsed: float):
+        entry = {"kind": kind, "name": name, "key": request_key(kind, name, request),
+                 "request": request, "response": response, "elapsed_ms": round(elapsed * 1000, 1)}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._index(entry)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def lookup(self, kind: str, name: str, request) -> dict:
+        key = request_key(kind, name, request)
+        with self._lock:
+            entries, counter = self._by_key.get(key), key
+            if entries:
+                self.hits += 1
+            elif not STRICT and self._by_route.get((kind, name)):
+                entries, counter = self._by_route[(kind, name)], (kind, name)
+                self.fallbacks += 1
+            else:
+                raise CassetteMiss(f"{kind} {name}: 녹화된 응답이 없습니다 (key {key[:12]})")
+            index = self._served[counter]
+            self._served[counter] += 1
+        return entries[min(index, len(entries) - 1)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": sum(len(v) for v in self._by_key.values()), "hits": self.hits, "fallbacks": self.fallbacks}
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_FILE)
+        return _cassette
+
+
+def _delay(entry: dict) -> float:
+    return entry.get("elapsed_ms", 0) / 1000 * LATENCY_SCALE
+
+
+# --- OpenAI SDK ---
+
+class _ReplayedRawResponse:
+    """with_raw_response 호출(LangChain)에 돌려줄 응답. parse()와 headers만 씁니다."""
+
+    def __init__(self, parsed):
+        self._parsed = parsed
+        self.headers = {}
+
+    def parse(self, **kwargs):
+        return self._parsed
+
+
+def _sdk_request(kwargs: dict) -> dict:
+    return {k: v for k, v in kwargs.items() if k not in _TRANSPORT_ARGS}
+
+
+def _raw_mode(kwargs: dict) -> Optional[str]:
+    # with_raw_response는 "true"(또는 "raw"), with_streaming_response는 "stream"
+    return (kwargs.get("extra_headers") or {}).get(_RAW_RESPONSE_HEADER)
+
+
+def _passthrough(kwargs: dict) -> bool:
+    return MODE not in ("record", "replay") or bool(kwargs.get("stream")) or _raw_mode(kwargs) == "stream"
+
+
+def _dump(response) -> dict:
+    parsed = response.parse() if hasattr(response, "parse") and not hasattr(response, "usage") else response
+    return parsed.model_dump(mode="json")
+
+
+def _replayed(response_type, kwargs: dict, entry: dict):
+    parsed = response_type.model_validate(entry["response"])
+    return _ReplayedRawResponse(parsed) if _raw_mode(kwargs) in ("true", "raw") else parsed
+
+
+def _wrap_sync(method, name: str, kind: str, response_type):
+    @functools.wraps(method)
+    def _taped(self, *args, **kwargs):
+        if _passthrough(kwargs):
+            return method(self, *args, **kwargs)
+        request = _sdk_request(kwargs)
+        if replaying():
+            entry = get_cassette().lookup(kind, name, request)
+            time.sleep(_delay(entry))
+            return _replayed(response_type, kwargs, entry)
+        started = time.perf_counter()
+        response = method(self, *args, **kwargs)
+        get_cassette().record(kind, name, request, _dump(response), time.perf_counter() - started)
+        return response
+    _taped.__cv_cassette__ = True
+    return _taped
+
+
+def _wrap_async(method, name: str, kind: str, response_type):
+    @functools.wraps(method)
+    async def _taped(self, *args, **kwargs):
+        if _passthrough(kwargs):
+            return await method(self, *args, **kwargs)
+        request = _sdk_request(kwargs)
+        if replaying():
+            entry = get_cassette().lookup(kind, name, request)
+            await asyncio.sleep(_delay(entry))
+            return _replayed(response_type, kwargs, entry)
+        started = time.perf_counter()
+        response = await method(self, *args, **kwargs)
+        get_cassette().record(kind, name, request, _dump(response), time.perf_counter() - started)
+        return response
+    _taped.__cv_cassette__ = True
+    return _taped
+
+
+def install():
+    """
+    녹화 / 재생 모드면 OpenAI SDK 메서드를 감쌉니다. 여러 번 불러도 한 번만 적용됩니다.
+    tracing.instrument_openai()보다 먼저 불러야 재생된 응답에도 토큰 / 비용 span이 남습니다.
+    """
+    if MODE not in ("record", "replay"):
+        return
+    from openai.resources.chat import completions as chat_completions
+    from openai.resources import embeddings, responses
+    from openai.types import CreateEmbeddingResponse
+    from openai.types.chat import ChatCompletion
+    from openai.types.responses import Response
+
+    targets = [
+        (chat_completions.Completions, chat_completions.AsyncCompletions, "openai.chat.completions", "llm", ChatCompletion),
+        (responses.Responses, responses.AsyncResponses, "openai.responses", "llm", Response),
+        (embeddings.Embeddings, embeddings.AsyncEmbeddings, "openai.embeddings", "embedding", CreateEmbeddingResponse),
+    ]
+    for sync_cls, async_cls, name, kind, response_type in targets:
+        if not getattr(sync_cls.create, "__cv_cassette__", False):
+            sync_cls.create = _wrap_sync(sync_cls.create, name, kind, response_type)
+        if not getattr(async_cls.create, "__cv_cassette__", False):
+            async_cls.create = _wrap_async(async_cls.create, name, kind, response_type)
+
+
+# --- 검색 ---
+
+class _TapedRetriever:
+    """retriever.invoke(query) 결과를 녹화하거나, 녹화된 문서를 돌려줍니다. (재생할 때는 inner가 None)"""
+
+    def __init__(self, source: str, inner=None):
+        self.source = source
+        self.inner = inner
+
+    def invoke(self, query: str, config=None, **kwargs):
+        from langchain_core.documents import Document
+
+        if self.inner is None:
+            entry = get_cassette().lookup("retrieval", self.source, query)
+            time.sleep(_delay(entry))
+            return [Document(page_content=doc["page_content"], metadata=doc.get("metadata") or {})
+                    for doc in entry["response"]]
+        started = time.perf_counter()
+        documents = self.inner.invoke(query, config, **kwargs)
+        get_cassette().record("retrieval", self.source,
+                              query, [{"page_content": d.page_content, "metadata": d.metadata} for d in documents],
+                              time.perf_counter() - started)
+        return documents
+
+    async def ainvoke(self, query: str, config=None, **kwargs):
+        return await asyncio.to_thread(self.invoke, query, config, **kwargs)
+
+
+def wrap_retriever(source: str, build: Callable):
+    """
+    retriever를 녹화 / 재생용으로 감쌉니다. source는 검색 대상(공고, 문항 파일)을 나타내는 키입니다.
+    재생 모드에서는 build를 부르지 않으므로 문서 로드와 임베딩이 일어나지 않습니다.
+    """
+    if replaying():
+        return _TapedRetriever(source)
+    if recording():
+        return _TapedRetriever(source, build())
+    return build()
+
+
+# --- MCP 도구 ---
+
+def _tool_spec(tool) -> dict:
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    function = convert_to_openai_tool(tool)["function"]
+    return {"name": tool.name, "description": tool.description or "", "parameters": function.get("parameters") or {}}
+
+
+def _tool_result(result):
+    # MCP 어댑터 도구는 문자열 또는 content block 목록을 돌려줌. 그 밖의 객체는 문자열로 남깁니다.
+    try:
+        json.dumps(result)
+        return result
+    except (TypeError, ValueError):
+        return str(result)
+
+
+def record_tools(server: str, tools: list) -> list:
+    """녹화 모드면 서버의 도구 목록을 녹화하고, 호출 결과를 녹화하는 같은 이름/스키마의 도구로 감쌉니다."""
+    if not recording():
+        return tools
+    from langchain_core.tools import StructuredTool
+
+    get_cassette().record("tools", server, None, [_tool_spec(tool) for tool in tools], 0)
+    wrapped = []
+    for tool in tools:
+        async def _call(_tool=tool, **kwargs):
+            started = time.perf_counter()
+            result = await _tool.ainvoke(kwargs)
+            get_cassette().record("tool", f"{server}.{_tool.name}", kwargs, _tool_result(result),
+                                  time.perf_counter() - started)
+            return result
+
+        wrapped.append(StructuredTool(name=tool.name, description=tool.description,
+                                      args_schema=tool.args_schema, coroutine=_call))
+    return wrapped
+
+
+def replay_tools(server: str) -> list:
+    """녹화된 도구 목록으로 서버 없이 도구를 만듭니다. 호출하면 녹화된 결과를 돌려줍니다."""
+    from langchain_core.tools import StructuredTool
+
+    try:
+        specs = get_cassette().lookup("tools", server, None)["response"]
+    except CassetteMiss:
+        return []
+    tools = []
+    for spec in specs:
+        async def _call(_name=spec["name"], **kwargs):
+            entry = get_cassette().lookup("tool", f"{server}.{_name}", kwargs)
+            await asyncio.sleep(_delay(entry))
+            return entry["response"]
+
+        tools.append(StructuredTool(name=spec["name"], description=spec["description"],
+                                    args_schema=spec["parameters"], coroutine=_call))
+    return tools
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카세트 내용 요약")
+    parser.add_argument("path", nargs="?", default=CASSETTE_FILE, help="카세트 JSONL")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"카세트가 없습니다: {args.path}")
+        sys.exit(1)
+    routes = defaultdict(lambda: {"count": 0, "distinct": set(), "elapsed_ms": 0.0})
+    with open(args.path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                route = routes[(entry["kind"], entry["name"])]
+                route["count"] += 1
+                route["distinct"].add(entry["key"])
+                route["elapsed_ms"] += entry.get("elapsed_ms", 0)
+
+    print(f"{'kind':<10}{'name':<40}{'calls':>7}{'distinct':>10}{'recorded(s)':>13}")
+    for (kind, name), route in sorted(routes.items()):
+        print(f"{kind:<10}{name:<40}{route['count']:>7}{len(route['distinct']):>10}{route['elapsed_ms'] / 1000:>13.2f}")
+    total = sum(route["elapsed_ms"] for route in routes.values()) / 1000
+    print(f"\n녹화된 외부 호출 시간 합계: {total:.2f}s (CV_CASSETTE_LATENCY=1로 재생하면 이 시간을 그대로 기다림)")
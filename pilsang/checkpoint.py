@@ -0,0 +1,299 @@
+"""
+LangGraph 워크플로우용 SQLite 체크포인터.
+
+노드가 끝날 때마다 상태를 SQLite(CV_CHECKPOINT_DB, 기본 pilsang/checkpoints.db)에 저장하므로,
+docs_agent나 HR 호출에서 실패해도 이미 끝난 RAG / MCP 단계를 다시 돌리지 않고 이어서 실행할 수 있습니다.
+
+- 채널 값은 버전별로 한 번만 저장하고, BLOB_INLINE_LIMIT보다 큰 값은 내용 주소 블롭 저장소(blob_store)에 넣습니다.
+  (단계마다 그대로 넘어가는 resume_text 등은 블롭 하나를 공유)
+- thread_id = 실행 ID(run_id). 재개는 v_all.py --resume <thread_id> [--from <node>]
+- CV_CHECKPOINT=0이면 체크포인터 없이 컴파일합니다.
+"""
+
+import os
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+from pilsang.blob_store import BlobStore, get_blob_store
+
+CHECKPOINT_DB = os.getenv("CV_CHECKPOINT_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints.db"))
+CHECKPOINT_ENABLED = os.getenv("CV_CHECKPOINT", "1") != "0"
+# 직렬화 결과가 이보다 크면(바이트) 블롭 저장소에 넣고 해시만 기록
+BLOB_INLINE_LIMIT = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channel_values (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    blob_digest TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    blob_digest TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    동기/비동기 그래프 실행 모두에서 쓸 수 있는 SQLite 체크포인터.
+    비동기 메서드는 같은 연결을 스레드에서 사용합니다. (연결 하나 + 잠금)
+    """
+
+    def __init__(self, db_path: str = CHECKPOINT_DB, blob_store: Optional[BlobStore] = None, *, serde=None):
+        super().__init__(serde=serde)
+        self.db_path = db_path
+        self.blobs = blob_store or get_blob_store()
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # import 시점이 아니라 처음 사용할 때 DB를 엽니다.
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # --- 값 직렬화 (큰 값은 블롭 저장소로) ---
+
+    def _dump(self, value) -> tuple:
+        """(type, 인라인 값, 블롭 해시)"""
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) > BLOB_INLINE_LIMIT:
+            return type_, None, self.blobs.put(data)
+        return type_, data, None
+
+    def _load(self, type_: str, data, digest: Optional[str]):
+        if digest:
+            data = self.blobs.get(digest)
+        return self.serde.loads_typed((type_, data))
+
+    # --- 조회 ---
+
+    def _channel_values(self, thread_id: str, checkpoint_ns: str, versions: dict) -> dict:
+        values = {}
+        for channel, version in versions.items():
+            row = self.conn.execute(
+                "SELECT type, value, blob_digest FROM channel_values "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row and row[0] != "empty":
+                values[channel] = self._load(*row)
+        return values
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint_data, metadata_type, metadata_data = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_data))
+        checkpoint["channel_values"] = self._channel_values(thread_id, checkpoint_ns, checkpoint["channel_versions"])
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value, blob_digest FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self._load(t, v, d)) for task_id, channel, t, v, d in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                item = self._to_tuple(thread_id, checkpoint_ns, row)
+                if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                results.append(item)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    # --- 저장 ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+
+        channel_rows = []
+        for channel, version in new_versions.items():
+            if channel in values:
+                type_, data, digest = self._dump(values[channel])
+            else:
+                type_, data, digest = "empty", None, None
+            channel_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, data, digest))
+        type_, checkpoint_data = self.serde.dumps_typed(stored)
+        metadata_type, metadata_data = self.serde.dumps_typed(
+            {**{k: v for k, v in config.get("metadata", {}).items() if not k.startswith("__")}, **metadata}
+        )
+
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO channel_values VALUES (?, ?, ?, ?, ?, ?, ?)", channel_rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_data, metadata_type, metadata_data),
+            )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data, digest = self._dump(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, task_path,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, data, digest))
+        # 특수 채널(오류, 인터럽트 등)은 덮어쓰고, 일반 쓰기는 처음 기록만 유지합니다.
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self._lock, self.conn:
+            self.conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self.conn:
+            for table in ("checkpoints", "channel_values", "writes"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    # --- 비동기 (그래프를 astream으로 실행할 때 사용) ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # --- 재개(resume)용 ---
+
+    def list_threads(self, limit: int = 20) -> list:
+        """최근 실행(thread) 목록: [(thread_id, 체크포인트 수, 마지막 checkpoint_id)]"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT thread_id, COUNT(*), MAX(checkpoint_id) FROM checkpoints WHERE checkpoint_ns = '' "
+                "GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+
+def get_checkpointer() -> Optional[SqliteCheckpointSaver]:
+    """CV_CHECKPOINT=0이면 None (체크포인트 없이 실행)."""
+    return SqliteCheckpointSaver(CHECKPOINT_DB) if CHECKPOINT_ENABLED else None
@@ -0,0 +1,130 @@
+"""
+HR 재시도 루프의 점수 기반 조기 종료.
+
+HR Agent가 평가 기준 ①~⑤마다 1~5점을 매기면, 검토마다 평균 점수를 기록하고
+최고 점수가 더 이상 의미 있게 오르지 않을 때(정체) 재작성-재검토 루프를 멈춥니다.
+멈출 때는 마지막 초안이 아니라 지금까지 가장 점수가 높았던 초안이 면접/문서 단계로 넘어갑니다.
+
+- CV_HR_MIN_GAIN (기본 0.2): 검토 한 번당 최고 평균 점수가 이만큼 오르지 않으면 개선 없음으로 봄
+- CV_HR_PATIENCE (기본 1): 개선 없는 검토가 연속 이 횟수만큼 나오면 종료
+- 점수 줄이 없는 검토는 판단에서 빼므로, 그때는 기존 재시도 한도만 적용됩니다.
+- 수렴 곡선은 CV_CONVERGENCE_LOG (기본 pilsang/traces/convergence.jsonl)에 검토마다 한 줄씩 기록
+
+곡선 보기:
+    python pilsang/convergence.py [convergence.jsonl] [--run RUN_ID]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict, Counter
+from typing import Optional
+
+MIN_GAIN = float(os.getenv("CV_HR_MIN_GAIN", "0.2"))
+PATIENCE = int(os.getenv("CV_HR_PATIENCE", "1"))
+CONVERGENCE_LOG = os.getenv("CV_CONVERGENCE_LOG", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "traces", "convergence.jsonl"))
+
+_write_lock = threading.Lock()
+
+
+def mean_score(scores: Optional[dict]) -> Optional[float]:
+    if not scores:
+        return None
+    return round(sum(scores.values()) / len(scores), 3)
+
+
+def record_review(history: list, retry_count: int, scores: Optional[dict]) -> list:
+    """검토 결과를 이력에 더한 새 목록을 돌려줍니다. (LangGraph 상태는 새 값으로 교체)"""
+    return list(history or []) + [{
+        "retry": retry_count,
+        "scores": {str(k): v for k, v in (scores or {}).items()} or None,
+        "mean": mean_score(scores),
+    }]
+
+
+def should_stop(history: list, min_gain: float = None, patience: int = None) -> Optional[str]:
+    """
+    점수 이력을 보고 재시도를 멈춰야 하면 이유를, 아니면 None을 돌려줍니다.
+    최고 평균 점수가 min_gain 이상 오르지 못한 검토가 patience번 연속이면 정체로 판단합니다.
+    """
+    min_gain = MIN_GAIN if min_gain is None else min_gain
+    patience = PATIENCE if patience is None else patience
+    means = [entry["mean"] for entry in history or [] if entry.get("mean") is not None]
+    if len(means) < 2:
+        return None
+
+    stale = 0
+    best = means[0]
+    for value in means[1:]:
+        gain = value - best
+        stale = stale + 1 if gain < min_gain else 0
+        best = max(best, value)
+    if stale >= patience:
+        last_gain = means[-1] - max(means[:-1])
+        return f"plateau (gain {last_gain:+.2f} < {min_gain:.2f} for {stale} review(s))"
+    return None
+
+
+def best_review(history: list) -> Optional[int]:
+    """가장 평균 점수가 높은 검토의 인덱스 (점수가 같으면 먼저 나온 것)"""
+    scored = [(entry["mean"], -i) for i, entry in enumerate(history or []) if entry.get("mean") is not None]
+    return -max(scored)[1] if scored else None
+
+
+def curve(history: list) -> str:
+    return " → ".join("?" if entry.get("mean") is None else f"{entry['mean']:.2f}" for entry in history or [])
+
+
+def log_review(run_id: Optional[str], history: list, decision: str):
+    """검토 한 번의 점수와 결정(pass / retry / stop: ...)을 수렴 로그에 한 줄 추가합니다."""
+    entry = history[-1]
+    previous = [e["mean"] for e in history[:-1] if e.get("mean") is not None]
+    record = {
+        "run_id": run_id,
+        "time": time.time(),
+        "review": len(history),
+        **entry,
+        "gain": round(entry["mean"] - max(previous), 3) if previous and entry.get("mean") is not None else None,
+        "decision": decision,
+    }
+    with _write_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(CONVERGENCE_LOG)), exist_ok=True)
+        with open(CONVERGENCE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_log(path: str = CONVERGENCE_LOG) -> dict:
+    """수렴 로그를 실행별 검토 목록으로 읽습니다."""
+    runs = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                runs[record["run_id"]].append(record)
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HR 점수 수렴 곡선 보기")
+    parser.add_argument("path", nargs="?", default=CONVERGENCE_LOG, help="수렴 로그 JSONL")
+    parser.add_argument("--run", help="특정 실행만 보기")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"수렴 로그가 없습니다: {args.path}")
+        sys.exit(1)
+    runs = load_log(args.path)
+    if args.run:
+        runs = {args.run: runs.get(args.run, [])}
+
+    outcomes = Counter()
+    for run_id, reviews in runs.items():
+        final = reviews[-1]["decision"] if reviews else "-"
+        outcomes[final.split(":")[0]] += 1
+        print(f"{run_id}  [{curve(reviews)}]  검토 {len(reviews)}회, {final}")
+    total_reviews = sum(len(reviews) for reviews in runs.values())
+    print(f"\n실행 {len(runs)}개, 평균 검토 {total_reviews / max(1, len(runs)):.2f}회, 결과 {dict(outcomes)}")
@@ -0,0 +1,37 @@
+"""
+프로세스 사이 파일 잠금.
+
+같은 파일을 여러 프로세스(큐 워커, 일괄 내보내기, 토큰 갱신)가 함께 쓸 때 사용합니다.
+표준 라이브러리만 쓰므로 구글 클라이언트 등 무거운 의존성 없이 어디서나 불러올 수 있습니다.
+"""
+
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str):
+    """파일 옆의 .lock 파일에 배타 잠금을 겁니다. (같은 머신의 모든 프로세스 사이에서 유효)"""
+    lock_path = f"{os.path.abspath(path)}.lock"
+    with open(lock_path, 'a+b') as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK은 약 10초 후 포기하므로 다시 시도
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,230 @@
+"""
+파이썬 MCP 서버용 in-process transport.
+
+jia/notion_server.py(FastMCP)나 jinwook.googlmcp.GoogleDocsMCPServer 같은 파이썬 서버를
+서브프로세스 + stdio JSON-RPC로 띄우지 않고, 같은 프로세스에서 서버의 도구 핸들러를 직접 호출하는
+LangChain 도구로 만들어 줍니다. (인터프리터 기동, import, 직렬화 비용 제거)
+
+서버 설정 딕셔너리에서 서버별로 선택합니다:
+
+    server_config = {
+        "github": {"transport": "stdio", "command": "npx", ...},      # 기존 방식
+        "notion": {
+            "transport": "inprocess",
+            "target": "jia.notion_server:mcp",                       # "모듈:객체" (FastMCP, Server, 또는 .server를 가진 클래스)
+            "env": {"NOTION_API_KEY": "..."},                         # 선택: 이 서버의 도구 호출 동안만 적용 (pilsang/server_env.py)
+        },
+    }
+    client = HybridMCPClient(server_config)
+    tools = await client.get_tools()
+
+원격(stdio 등) 서버는 기본적으로 도구 호출마다 세션을 새로 엽니다. (stdio면 호출마다 서버 프로세스 기동)
+작업 서버처럼 오래 떠 있는 프로세스에서는 enable_session_pool()을 켜 두면 서버별 세션 하나를
+프로세스 수명 동안 열어 두고 모든 실행이 같이 씁니다. (close_session_pool()로 정리)
+"""
+
+import json
+import asyncio
+import importlib
+from typing import Optional
+
+from mcp import types
+from mcp.server.lowlevel import Server
+from langchain_core.tools import StructuredTool, ToolException
+
+from pilsang.server_env import scoped_env
+
+# target 문자열 -> 저수준 Server 인스턴스 (프로세스당 한 번만 만들어 재사용)
+_servers = {}
+
+
+def resolve_server(target: str) -> Server:
+    """
+    "모듈:객체" 문자열에서 저수준 mcp Server를 찾습니다.
+    - FastMCP 인스턴스: 내부의 _mcp_server 사용
+    - 클래스(GoogleDocsMCPServer 등): 인스턴스를 만든 뒤 .server 사용
+    """
+    if target in _servers:
+        return _servers[target]
+
+    module_name, _, attr = target.partition(":")
+    obj = getattr(importlib.import_module(module_name), attr)
+    if isinstance(obj, type):
+        obj = obj()
+    if hasattr(obj, "_mcp_server"):
+        obj = obj._mcp_server
+    elif isinstance(getattr(obj, "server", None), Server):
+        obj = obj.server
+    if not isinstance(obj, Server):
+        raise TypeError(f"{target}에서 MCP 서버를 찾을 수 없습니다: {type(obj).__name__}")
+
+    _servers[target] = obj
+    return obj
+
+
+def _content_to_text(content: list) -> str:
+    parts = []
+    for item in content:
+        if isinstance(item, types.TextContent):
+            parts.append(item.text)
+        else:
+            parts.append(item.model_dump_json())
+    return "\n".join(parts)
+
+
+async def load_inprocess_tools(server: Server, env: Optional[dict] = None) -> list:
+    """
+    서버의 list_tools / call_tool 핸들러를 직접 호출하는 StructuredTool 목록을 만듭니다.
+    env는 os.environ을 바꾸지 않고 핸들러가 실행되는 동안만 적용됩니다. (server_env.getenv로 읽힘)
+    """
+    with scoped_env(env):
+        listed = await server.request_handlers[types.ListToolsRequest](
+            types.ListToolsRequest(method="tools/list")
+        )
+    call_handler = server.request_handlers[types.CallToolRequest]
+
+    tools = []
+    for tool in listed.root.tools:
+        async def _call(_name=tool.name, **arguments):
+            with scoped_env(env):
+                result = await call_handler(types.CallToolRequest(
+                    method="tools/call",
+                    params=types.CallToolRequestParams(name=_name, arguments=arguments),
+                ))
+            result = result.root
+            text = _content_to_text(result.content)
+            if result.isError:
+                raise ToolException(text)
+            return text
+
+        tools.append(StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=_call,
+        ))
+    return tools
+
+
+class HybridMCPClient:
+    """
+    MultiServerMCPClient와 같은 get_tools 인터페이스를 제공하는 클라이언트.
+    transport가 "inprocess"인 서버는 같은 프로세스에서 직접 호출하고,
+    나머지는 MultiServerMCPClient에 맡깁니다.
+    """
+
+    def __init__(self, connections: dict, pool: Optional["SessionPool"] = None):
+        self.inprocess = {n: c for n, c in connections.items() if c.get("transport") == "inprocess"}
+        self.remote_connections = {n: c for n, c in connections.items() if c.get("transport") != "inprocess"}
+        self.pool = pool if pool is not None else _session_pool
+        if self.remote_connections and self.pool is None:
+            from langchain_mcp_adapters.client import MultiServerMCPClient
+            self.remote = MultiServerMCPClient(self.remote_connections)
+        else:
+            self.remote = None
+
+    async def get_tools(self, *, server_name: Optional[str] = None) -> list:
+        if server_name is not None:
+            if server_name in self.inprocess:
+                return await self._inprocess_tools(server_name)
+            return await self._remote_tools(server_name)
+
+        tools = []
+        for name in self.inprocess:
+            tools.extend(await self._inprocess_tools(name))
+        for name in self.remote_connections:
+            tools.extend(await self._remote_tools(name))
+        return tools
+
+    async def _remote_tools(self, name: str) -> list:
+        if self.pool is not None:
+            return await self.pool.get_tools(name, self.remote_connections[name])
+        return await self.remote.get_tools(server_name=name)
+
+    async def _inprocess_tools(self, name: str) -> list:
+        connection = self.inprocess[name]
+        return await load_inprocess_tools(resolve_server(connection["target"]), connection.get("env"))
+
+
+# --- 원격 서버 세션 풀 ---
+
+class _PooledSession:
+    """
+    세션 하나를 전용 태스크에서 열어 두고 close()까지 유지합니다.
+    (stdio 클라이언트는 연 태스크에서 닫아야 하므로 작업 태스크가 아니라 전용 태스크가 세션을 소유)
+    """
+
+    def __init__(self, name: str, connection: dict):
+        self.name = name
+        self.connection = connection
+        self.ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self.task = asyncio.create_task(self._run(), name=f"mcp-session-{name}")
+
+    async def _run(self):
+        from langchain_mcp_adapters.sessions import create_session
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self.ready.set_result(await load_mcp_tools(session, server_name=self.name))
+                await self._stop.wait()
+        except Exception as e:
+            if not self.ready.done():
+                self.ready.set_exception(e)
+            else:
+                print(f"[mcp pool] {self.name} 세션 종료: {e}")
+
+    @property
+    def alive(self) -> bool:
+        return not self.task.done()
+
+    async def close(self):
+        self._stop.set()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+class SessionPool:
+    """(서버 이름, 연결 설정)마다 세션 하나를 열어 두고 도구 목록을 공유합니다. 세션이 죽으면 다음 요청에서 다시 엽니다."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = asyncio.Lock()
+
+    async def get_tools(self, name: str, connection: dict) -> list:
+        key = f"{name}:{json.dumps(connection, sort_keys=True, default=str)}"
+        async with self._lock:
+            pooled = self._sessions.get(key)
+            if pooled is None or not pooled.alive:
+                pooled = self._sessions[key] = _PooledSession(name, connection)
+        try:
+            return await asyncio.shield(pooled.ready)
+        except Exception:
+            async with self._lock:
+                if self._sessions.get(key) is pooled:
+                    del self._sessions[key]
+            raise
+
+    async def close(self):
+        async with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(*(pooled.close() for pooled in sessions))
+
+
+_session_pool: Optional[SessionPool] = None
+
+
+def enable_session_pool() -> SessionPool:
+    """이후 만드는 HybridMCPClient가 원격 세션을 공유하게 합니다. (실행 중인 이벤트 루프에서 호출)"""
+    global _session_pool
+    if _session_pool is None:
+        _session_pool = SessionPool()
+    return _session_pool
+
+
+async def close_session_pool():
+    global _session_pool
+    pool, _session_pool = _session_pool, None
+    if pool is not None:
+        await pool.close()
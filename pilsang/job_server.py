@@ -0,0 +1,364 @@
+"""
+워크플로우 작업 서버 (HTTP + Server-Sent Events).
+
+`python pilsang/v_all.py`를 요청마다 새로 띄우면 import / 그래프 컴파일 / RAG 인덱스 / MCP 서버 기동 /
+LLM 연결을 매번 다시 하므로, 한 프로세스를 띄워 두고 작업마다 이것들을 재사용합니다.
+- 그래프는 시작할 때 한 번 컴파일, RAG 인덱스는 (공고, 문항 파일)별로 캐시 (jaebeom.rag.cached_retriever)
+- 원격 MCP 서버(GitHub 등) 세션은 서버 수명 동안 열어 둠 (inprocess_mcp.enable_session_pool)
+- LLM 클라이언트는 프로세스 안에서 재사용
+
+API:
+    POST /jobs                      {"candidate_id", "github_id", "posting", "questions", "doc_key"} -> 202 {"job_id", ...}
+    GET  /jobs                      최근 작업 목록
+    GET  /jobs/{id}                 상태 / 노드 진행 / 결과 파일 목록
+    GET  /jobs/{id}/events          진행 상황 SSE (status / node / llm / tool / done / failed). Last-Event-ID로 이어 받기
+    GET  /jobs/{id}/artifacts/{md|docx|json}
+    GET  /metrics                   작업 지연 p50 / p95, 노드별 지연, 상태별 작업 수
+
+동시 실행 작업 수: --concurrency (CV_SERVER_CONCURRENCY), 단계별 한도는 CV_STAGE_LIMITS를 그대로 따릅니다.
+작업 ID가 곧 실행 ID(thread_id)이므로 실패한 작업은 `python pilsang/v_all.py --resume <job_id>`로 이어서 실행할 수 있습니다.
+
+실행:
+    python pilsang/job_server.py --port 8100 --concurrency 4
+    curl -X POST localhost:8100/jobs -d '{"candidate_id": "kim", "github_id": "kim-dev"}'
+    curl -N localhost:8100/jobs/<job_id>/events
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import contextlib
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, FileResponse, StreamingResponse
+from starlette.routing import Route
+
+from pilsang import v_all, tracing
+from pilsang.batch_runner import job_key
+from pilsang.blob_store import resolve
+from pilsang.tool_cache import release_tool_cache
+from pilsang.inprocess_mcp import enable_session_pool, close_session_pool
+
+SERVER_CONCURRENCY = int(os.getenv("CV_SERVER_CONCURRENCY", "4"))
+MAX_JOBS = int(os.getenv("CV_SERVER_MAX_JOBS", "1000"))  # 메모리에 남겨 둘 작업 수 (끝난 작업부터 정리)
+LATENCY_WINDOW = 1000  # 지연 통계에 쓰는 최근 표본 수
+KEEPALIVE_SECONDS = 15
+JOB_FIELDS = ("candidate_id", "github_id", "posting", "questions", "doc_key")
+ARTIFACT_TYPES = {"md": "text/markdown; charset=utf-8", "json": "application/json",
+                  "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+
+def percentile(values, q: float):
+    """nearest-rank 백분위수 (값이 없으면 None)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+class Job:
+    def __init__(self, job_id: str, request: dict):
+        self.id = job_id
+        self.request = request
+        self.key = job_key(request)
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.nodes = []
+        self.tokens = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0}
+        self.artifacts = {}
+        self.error = None
+        self.events = []
+        self._subscribers = set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def emit(self, event: str, data: dict):
+        """이벤트를 기록하고 구독 중인 SSE 스트림에 보냅니다. (이벤트 루프 스레드에서만 호출)"""
+        item = {"id": len(self.events), "event": event, "data": {"job_id": self.id, "time": time.time(), **data}}
+        self.events.append(item)
+        for queue in self._subscribers:
+            queue.put_nowait(item)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def summary(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "job_id": self.id, "key": self.key, "status": self.status, "request": self.request,
+            "created": self.created, "started": self.started, "finished": self.finished,
+            "queue_seconds": round((self.started or end) - self.created, 3),
+            "elapsed_seconds": round(end - self.created, 3),
+            "nodes": self.nodes, "tokens": self.tokens, "error": self.error,
+            "artifacts": {kind: f"/jobs/{self.id}/artifacts/{kind}" for kind in self.artifacts if kind in ARTIFACT_TYPES},
+            "url": self.artifacts.get("url"),
+        }
+
+
+class JobService:
+    def __init__(self, concurrency: int = SERVER_CONCURRENCY):
+        self.jobs = {}
+        self.concurrency = concurrency
+        self._limit = None
+        self._loop = None
+        self._tasks = set()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.node_latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    async def start(self):
+        """그래프 컴파일, 무거운 모듈 import, MCP 세션 풀을 미리 준비합니다."""
+        self._loop = asyncio.get_running_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(max_workers=max(8, self.concurrency * 4),
+                                                           thread_name_prefix="cv-node"))
+        self._limit = asyncio.Semaphore(self.concurrency)
+        started = time.time()
+        v_all.get_app()
+        await asyncio.to_thread(_warm_imports)
+        enable_session_pool()
+        tracing.add_listener(self._on_span)
+        print(f"[server] ready in {time.time() - started:.1f}s (concurrency {self.concurrency})")
+
+    async def stop(self):
+        tracing.remove_listener(self._on_span)
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await close_session_pool()
+
+    def submit(self, request: dict) -> Job:
+        job = Job(uuid.uuid4().hex, request)
+        self.jobs[job.id] = job
+        self._prune()
+        job.emit("status", {"status": job.status})
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(0, len(self.jobs) - MAX_JOBS)]:
+            del self.jobs[job.id]
+
+    async def _run(self, job: Job):
+        async with self._limit:
+            job.status, job.started = "running", time.time()
+            job.emit("status", {"status": job.status, "queue_seconds": round(job.started - job.created, 3)})
+            request = job.request
+            inputs = v_all.new_run_state(
+                job.id, candidate_id=request.get("candidate_id"), doc_key=job.key, github_id=request.get("github_id"),
+                posting_source=request.get("posting"), question_source=request.get("questions"),
+            )
+            config = {"configurable": {"thread_id": job.id}, "callbacks": tracing.callbacks()}
+            final = {}
+            try:
+                async for mode, chunk in v_all.get_app().astream(inputs, config, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        final = chunk
+                        continue
+                    for node in chunk:
+                        job.nodes.append({"node": node, "finished": time.time()})
+                        job.emit("node", {"node": node, "index": len(job.nodes),
+                                          "elapsed_seconds": round(time.time() - job.started, 3)})
+                job.artifacts = final.get("artifacts") or {}
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status, job.error = "failed", "cancelled"
+                raise
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+            finally:
+                job.finished = time.time()
+                release_tool_cache(job.id, request.get("candidate_id"))
+                if job.status == "done":
+                    self.latencies.append(job.finished - job.created)
+                job.emit(job.status, {
+                    "status": job.status, "error": job.error, "elapsed_seconds": round(job.finished - job.created, 3),
+                    "resume_chars": len(resolve(final.get("resume_text")) or ""),
+                    "artifacts": job.summary()["artifacts"], "url": job.artifacts.get("url"),
+                })
+
+    def _on_span(self, item: dict):
+        # span은 노드 스레드에서 끝나므로 작업 상태 변경은 이벤트 루프로 넘깁니다.
+        if item["trace_id"] in self.jobs and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._record_span, item)
+
+    def _record_span(self, item: dict):
+        job = self.jobs.get(item["trace_id"])
+        if job is None:
+            return
+        attrs = item["attributes"]
+        if item["kind"] == "node":
+            self.node_latencies[item["name"]].append(item["duration_ms"] / 1000)
+        elif item["kind"] in ("llm", "embedding"):
+            for key in job.tokens:
+                job.tokens[key] += attrs.get(key) or 0
+            job.emit("llm", {"name": item["name"], "model": attrs.get("model"), "duration_ms": item["duration_ms"],
+                             **{key: attrs.get(key) for key in job.tokens}, "totals": dict(job.tokens),
+                             "error": item["error"]})
+        elif item["kind"] == "tool":
+            job.emit("tool", {"name": item["name"], "duration_ms": item["duration_ms"], "error": item["error"]})
+
+    def metrics(self) -> dict:
+        counts = defaultdict(int)
+        for job in self.jobs.values():
+            counts[job.status] += 1
+
+        def _stats(values):
+            values = list(values)
+            return {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+                    "max": max(values) if values else None}
+
+        return {
+            "jobs": dict(counts),
+            "concurrency": self.concurrency,
+            "job_latency_seconds": _stats(self.latencies),
+            "node_latency_seconds": {node: _stats(values) for node, values in self.node_latencies.items()},
+        }
+
+
+def _warm_imports():
+    # 첫 작업이 import 비용을 내지 않도록 노드에서 쓰는 무거운 모듈을 미리 불러옵니다.
+    import jaebeom.rag  # noqa: F401
+    import langchain_openai  # noqa: F401
+    import langchain_community.document_loaders  # noqa: F401
+    import langchain_chroma  # noqa: F401
+    import langgraph.prebuilt  # noqa: F401
+    import langchain_mcp_adapters.client  # noqa: F401
+
+
+# --- HTTP ---
+
+service = JobService()
+
+
+def _job_or_404(request: Request):
+    job = service.jobs.get(request.path_params["job_id"])
+    if job is None:
+        return None, JSONResponse({"error": "job not found"}, status_code=404)
+    return job, None
+
+
+async def submit_job(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "request body must be JSON"}, status_code=400)
+    if not isinstance(body, dict) or not (body.get("candidate_id") or body.get("doc_key")):
+        return JSONResponse({"error": "candidate_id (or doc_key) is required"}, status_code=400)
+    job = service.submit({field: body[field] for field in JOB_FIELDS if body.get(field)})
+    return JSONResponse({"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}",
+                         "events_url": f"/jobs/{job.id}/events"}, status_code=202)
+
+
+async def list_jobs(request: Request):
+    limit = int(request.query_params.get("limit", "50"))
+    jobs = sorted(service.jobs.values(), key=lambda job: job.created, reverse=True)[:limit]
+    return JSONResponse({"jobs": [{k: v for k, v in job.summary().items() if k not in ("nodes", "request")}
+                                  for job in jobs]})
+
+
+async def get_job(request: Request):
+    job, error = _job_or_404(request)
+    return error or JSONResponse(job.summary())
+
+
+async def job_events(request: Request):
+    job, error = _job_or_404(request)
+    if error:
+        return error
+    try:
+        last_id = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        last_id = -1
+
+    async def stream():
+        queue = job.subscribe()  # 재생 전에 구독해야 그 사이 이벤트를 놓치지 않음
+        sent = last_id
+        try:
+            backlog = list(job.events)
+            while True:
+                if backlog:
+                    item = backlog.pop(0)
+                else:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                if item["id"] <= sent:
+                    continue
+                sent = item["id"]
+                yield f"id: {item['id']}\nevent: {item['event']}\ndata: {json.dumps(item['data'], ensure_ascii=False)}\n\n"
+                if item["event"] in ("done", "failed"):
+                    break
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def get_artifact(request: Request):
+    job, error = _job_or_404(request)
+    if error:
+        return error
+    kind = request.path_params["kind"]
+    path = job.artifacts.get(kind)
+    if kind not in ARTIFACT_TYPES or not path or not os.path.exists(path):
+        return JSONResponse({"error": f"artifact '{kind}' not available", "status": job.status}, status_code=404)
+    return FileResponse(path, media_type=ARTIFACT_TYPES[kind], filename=os.path.basename(path))
+
+
+async def get_metrics(request: Request):
+    return JSONResponse(service.metrics())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await service.start()
+    try:
+        yield
+    finally:
+        await service.stop()
+
+
+app = Starlette(routes=[
+    Route("/jobs", submit_job, methods=["POST"]),
+    Route("/jobs", list_jobs, methods=["GET"]),
+    Route("/jobs/{job_id}", get_job, methods=["GET"]),
+    Route("/jobs/{job_id}/events", job_events, methods=["GET"]),
+    Route("/jobs/{job_id}/artifacts/{kind}", get_artifact, methods=["GET"]),
+    Route("/metrics", get_metrics, methods=["GET"]),
+], lifespan=lifespan)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="워크플로우 작업 서버 (HTTP + SSE)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--concurrency", type=int, default=SERVER_CONCURRENCY, help="동시에 실행할 작업 수")
+    args = parser.parse_args()
+
+    service.concurrency = args.concurrency
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,131 @@
+"""
+MCP Agent(ReAct)용 메시지 히스토리 관리.
+
+create_react_agent는 매 단계마다 누적된 메시지 전체를 LLM에 다시 보냅니다.
+GitHub 도구는 큰 JSON / 파일 내용을 돌려주므로, 단계가 깊어질수록 프롬프트가 계속 커집니다.
+이 모듈은 pre_model_hook으로 LLM 입력만 다음처럼 줄입니다. (그래프 상태의 원본 메시지는 그대로 유지)
+
+- 고정(pinned): 시스템 메시지와 첫 작업 메시지(Human)는 항상 유지
+- 슬라이딩 윈도우: 최근 KEEP_RECENT_TOOL_ROUNDS번의 도구 호출 라운드만 원문(상한 적용)으로 유지
+- 오래된 도구 결과: 핵심 필드만 뽑은 짧은 요약으로 대체
+- 전체 예산: 그래도 MAX_INPUT_CHARS를 넘으면 가장 오래된 라운드부터 제거
+"""
+
+import os
+import json
+
+from langchain_core.messages import ToolMessage, SystemMessage, HumanMessage
+
+# 최근 도구 결과 1개의 원문 최대 길이(문자)
+MAX_TOOL_CHARS = int(os.getenv("CV_MAX_TOOL_CHARS", "6000"))
+# 오래된 도구 결과 요약 길이(문자)
+STALE_TOOL_CHARS = 400
+# 원문을 유지할 최근 도구 호출 라운드 수
+KEEP_RECENT_TOOL_ROUNDS = 2
+# LLM 입력 전체 예산(문자). 한글/코드 혼합 기준 대략 1토큰 ≈ 2~4문자
+MAX_INPUT_CHARS = int(os.getenv("CV_MAX_INPUT_CHARS", "60000"))
+
+# JSON 결과에서 근거로 쓸 만한 필드
+KEEP_JSON_FIELDS = (
+    "name", "full_name", "path", "html_url", "url", "description", "language",
+    "message", "sha", "date", "title", "total_count", "stargazers_count",
+)
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return str(content)
+
+
+def _extract_json(value, depth: int = 0):
+    """JSON에서 KEEP_JSON_FIELDS만 남긴 작은 구조를 만듭니다."""
+    if depth > 3:
+        return None
+    if isinstance(value, dict):
+        picked = {k: v for k, v in value.items() if k in KEEP_JSON_FIELDS and not isinstance(v, (dict, list))}
+        for k, v in value.items():
+            if isinstance(v, (dict, list)) and k in ("items", "commit", "repository", "author"):
+                nested = _extract_json(v, depth + 1)
+                if nested:
+                    picked[k] = nested
+        return picked
+    if isinstance(value, list):
+        items = [x for x in (_extract_json(v, depth + 1) for v in value[:10]) if x]
+        if len(value) > 10:
+            items.append(f"... 외 {len(value) - 10}개")
+        return items
+    return None
+
+
+def compact_tool_output(content, limit: int) -> str:
+    """도구 결과를 limit 문자 이내로 줄입니다. JSON이면 핵심 필드만 추립니다."""
+    text = _text(content)
+    if len(text) <= limit:
+        return text
+    try:
+        extracted = json.dumps(_extract_json(json.loads(text)), ensure_ascii=False)
+        if extracted and extracted not in ("null", "{}", "[]"):
+            text = extracted
+    except (ValueError, TypeError):
+        pass
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n...[생략: 원문 {len(_text(content))}자]"
+
+
+def _split_rounds(messages: list):
+    """고정 메시지(앞부분)와 '라운드' 목록으로 나눕니다. 라운드 = AI 메시지 + 그 뒤의 ToolMessage들."""
+    pinned_end = 0
+    while pinned_end < len(messages) and isinstance(messages[pinned_end], SystemMessage):
+        pinned_end += 1
+    if pinned_end < len(messages) and isinstance(messages[pinned_end], HumanMessage):
+        pinned_end += 1
+
+    rounds = []
+    for msg in messages[pinned_end:]:
+        # ToolMessage는 항상 자신을 호출한 AI 메시지와 같은 라운드에 둡니다. (OpenAI 요청 규칙)
+        if isinstance(msg, ToolMessage) and rounds:
+            rounds[-1].append(msg)
+        else:
+            rounds.append([msg])
+    return messages[:pinned_end], rounds
+
+
+def _round_chars(round_msgs: list) -> int:
+    return sum(len(_text(m.content)) for m in round_msgs)
+
+
+def window_messages(messages: list) -> list:
+    """LLM에 보낼 메시지 목록을 예산 안으로 줄여 돌려줍니다."""
+    pinned, rounds = _split_rounds(messages)
+    tool_round_idx = [i for i, r in enumerate(rounds) if any(isinstance(m, ToolMessage) for m in r)]
+    recent = set(tool_round_idx[-KEEP_RECENT_TOOL_ROUNDS:])
+
+    compacted = []
+    for i, round_msgs in enumerate(rounds):
+        limit = MAX_TOOL_CHARS if i in recent else STALE_TOOL_CHARS
+        new_round = []
+        for msg in round_msgs:
+            if isinstance(msg, ToolMessage):
+                short = compact_tool_output(msg.content, limit)
+                if short != msg.content:
+                    msg = msg.model_copy(update={"content": short})
+            new_round.append(msg)
+        compacted.append(new_round)
+
+    budget = MAX_INPUT_CHARS - _round_chars(pinned)
+    # 마지막 라운드는 항상 남기고, 예산을 넘으면 가장 오래된 라운드부터 버립니다.
+    while len(compacted) > 1 and sum(_round_chars(r) for r in compacted) > budget:
+        compacted.pop(0)
+
+    return pinned + [m for r in compacted for m in r]
+
+
+def pre_model_hook(state: dict) -> dict:
+    """create_react_agent(pre_model_hook=...)용: 상태는 그대로 두고 LLM 입력만 바꿉니다."""
+    return {"llm_input_messages": window_messages(state["messages"])}
@@ -0,0 +1,269 @@
+"""
+docs_agent 결과 저장(출력 싱크).
+
+워크플로우 마지막 단계가 원격 API를 기다리지 않도록, 결과는 기본적으로 로컬 파일로만 씁니다.
+Google Docs 업로드가 필요하면 업로드 큐에 넣어 두었다가 나중에 한꺼번에 동기화합니다.
+
+CV_DOCS_SINK (기본 "queue")
+- "local":  Markdown / DOCX / JSON 파일만 작성
+- "queue":  local + 업로드 큐(JSONL)에 추가. `python pilsang/output_sink.py --sync`로 나중에 업로드
+- "google": local + 바로 Google Docs에 업로드 (doc_key별 같은 문서를 변경분만 갱신)
+
+파일은 CV_OUTPUT_DIR(기본 pilsang/output)에 <키>.md / .docx / .json 으로 저장합니다.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import glob
+import zipfile
+import argparse
+import tempfile
+from xml.sax.saxutils import escape
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pilsang.file_lock import file_lock
+
+OUTPUT_DIR = os.getenv("CV_OUTPUT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "output"))
+DOCS_SINK = os.getenv("CV_DOCS_SINK", "queue")
+UPLOAD_QUEUE_NAME = "upload_queue.jsonl"
+# 업로드 큐 / 처리용 배치에서 읽지 못한 줄을 모아 두는 파일 (직접 확인 후 삭제)
+REJECTED_QUEUE_NAME = "upload_queue.rejected.jsonl"
+SYNC_MANIFEST_NAME = "upload_queue.manifest.jsonl"
+DOC_TITLE = "Generated Resume & Questions"
+
+
+def render_text(resume: str, questions: str) -> str:
+    """Google Docs / 텍스트용 본문 (기존 docs_agent 형식 그대로)"""
+    return f"""[최종 자기소개서]
+{resume}
+
+==================================================
+
+[면접 대비 질문 리스트]
+{questions}
+"""
+
+
+def render_markdown(title: str, resume: str, questions: str) -> str:
+    return f"# {title}\n\n## 최종 자기소개서\n\n{resume}\n\n## 면접 대비 질문 리스트\n\n{questions}\n"
+
+
+def _docx_paragraph(line: str, style: str = None) -> str:
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    return f'<w:p>{props}<w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+
+
+def render_docx(path: str, title: str, resume: str, questions: str):
+    """python-docx 없이 최소 구성의 DOCX(OOXML zip)를 씁니다. 한 줄이 문단 하나입니다."""
+    paragraphs = [_docx_paragraph(title, "Title"), _docx_paragraph("최종 자기소개서", "Heading1")]
+    paragraphs += [_docx_paragraph(line) for line in resume.splitlines()]
+    paragraphs.append(_docx_paragraph("면접 대비 질문 리스트", "Heading1"))
+    paragraphs += [_docx_paragraph(line) for line in (questions or "").splitlines()]
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(paragraphs)}</w:body></w:document>'
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="word/document.xml"/>'
+        '</Relationships>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", content_types)
+        docx.writestr("_rels/.rels", rels)
+        docx.writestr("word/document.xml", document)
+
+
+def _slug(key: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", key, flags=re.UNICODE).strip("_") or "output"
+
+
+def _atomic_write(path: str, writer):
+    """임시 파일에 쓴 뒤 교체합니다. (읽는 쪽은 항상 완전한 파일만 봄)"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".out-", suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LocalFileSink:
+    """결과를 Markdown / DOCX / JSON 세 가지 파일로 한 번에 씁니다."""
+
+    def __init__(self, output_dir: str = OUTPUT_DIR):
+        self.output_dir = output_dir
+
+    def write(self, key: str, resume: str, questions: str, title: str = DOC_TITLE, metadata: dict = None) -> dict:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, _slug(key))
+        questions = questions or ""
+        paths = {"md": f"{base}.md", "docx": f"{base}.docx", "json": f"{base}.json"}
+
+        markdown = render_markdown(title, resume, questions)
+        payload = {"key": key, "title": title, "resume": resume, "questions": questions,
+                   "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **(metadata or {})}
+
+        def _write_text(text):
+            def _writer(tmp_path):
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+            return _writer
+
+        _atomic_write(paths["md"], _write_text(markdown))
+        _atomic_write(paths["json"], _write_text(json.dumps(payload, ensure_ascii=False, indent=2)))
+        _atomic_write(paths["docx"], lambda tmp_path: render_docx(tmp_path, title, resume, questions))
+        return {"paths": paths}
+
+
+class UploadQueueSink(LocalFileSink):
+    """
+    파일을 쓰고, Google Docs 업로드는 큐(JSONL)에 넣어 나중에 sync_upload_queue()로 처리합니다.
+    큐 추가는 파일 잠금 안에서 하므로 여러 워커 프로세스가 같은 출력 디렉터리를 써도 줄이 섞이지 않습니다.
+    """
+
+    def write(self, key: str, resume: str, questions: str, title: str = DOC_TITLE, metadata: dict = None) -> dict:
+        result = super().write(key, resume, questions, title, metadata)
+        entry = {"key": key, "title": title, "content": render_text(resume, questions or ""), "queued_at": time.time()}
+        queue_path = os.path.join(self.output_dir, UPLOAD_QUEUE_NAME)
+        with file_lock(queue_path), open(queue_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        result["queued"] = True
+        return result
+
+
+class GoogleDocsSink(LocalFileSink):
+    """파일을 쓰고 바로 Google Docs에 업로드합니다. (예전 동작, 원격 API 응답을 기다림)"""
+
+    def write(self, key: str, resume: str, questions: str, title: str = DOC_TITLE, metadata: dict = None) -> dict:
+        result = super().write(key, resume, questions, title, metadata)
+        # Google 라이브러리는 이 싱크를 쓸 때만 불러옵니다.
+        from jinwook.google_auth import SCOPES, get_credential_holder
+        from jinwook.doc_sync import write_document
+
+        service = get_credential_holder(SCOPES).get_docs_service()
+        written = write_document(service, key, title, render_text(resume, questions or ""))
+        result["document_id"] = written["document_id"]
+        result["url"] = f"https://docs.google.com/document/d/{written['document_id']}/edit"
+        return result
+
+
+SINKS = {
+    "local": LocalFileSink,
+    "queue": UploadQueueSink,
+    "google": GoogleDocsSink,
+}
+
+
+def get_output_sink(name: str = None, output_dir: str = OUTPUT_DIR):
+    name = name or DOCS_SINK
+    if name not in SINKS:
+        raise ValueError(f"알 수 없는 출력 싱크: {name} (사용 가능: {', '.join(SINKS)})")
+    return SINKS[name](output_dir)
+
+
+def _read_batch(batch_path: str, latest: dict, rejected: list):
+    """
+    처리용 배치 파일의 항목을 키별로 합칩니다. 같은 키는 queued_at이 가장 늦은 항목이 남습니다.
+    JSON으로 읽을 수 없거나 필드가 빠진 줄은 건너뛰고 rejected에 (파일, 줄 번호, 원문)으로 남깁니다.
+    """
+    with open(batch_path, "r", encoding="utf-8", errors="replace") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                queued_at = float(entry.get("queued_at") or 0)
+            except (ValueError, TypeError, AttributeError):
+                entry = None
+            if not isinstance(entry, dict) or "key" not in entry or "content" not in entry:
+                rejected.append((batch_path, lineno, line.rstrip("\n")))
+                continue
+            key = entry["key"]
+            if key not in latest or queued_at >= float(latest[key].get("queued_at") or 0):
+                latest[key] = entry
+
+
+def sync_upload_queue(output_dir: str = OUTPUT_DIR, workers: int = None, quota_per_minute: int = None) -> dict:
+    """
+    업로드 큐를 Google Docs로 동기화합니다.
+    큐 파일을 처리용 파일로 옮긴 뒤(그동안 들어오는 결과는 새 큐에 쌓임), 남아 있는 모든 처리용 파일을 합쳐
+    키별로 가장 늦게(queued_at) 들어온 결과만 내보냅니다. (예전 배치를 다시 시도해도 새 내용을 덮어쓰지 않음)
+    실패하면 처리용 파일과 매니페스트가 남아, 다음 실행에서 남은 항목부터 이어서 처리합니다.
+    읽을 수 없는 줄은 건너뛰고 upload_queue.rejected.jsonl에 옮겨 둡니다.
+    """
+    from jinwook.bulk_export import export_documents, DEFAULT_WORKERS, QUOTA_PER_MINUTE
+    queue_path = os.path.join(output_dir, UPLOAD_QUEUE_NAME)
+    with file_lock(queue_path):
+        if os.path.exists(queue_path):
+            os.replace(queue_path, os.path.join(output_dir, f"upload_queue.{int(time.time() * 1000)}.syncing.jsonl"))
+
+    batch_paths = sorted(glob.glob(os.path.join(output_dir, "upload_queue.*.syncing.jsonl")))
+    latest, rejected = {}, []
+    for batch_path in batch_paths:
+        _read_batch(batch_path, latest, rejected)
+    if rejected:
+        with open(os.path.join(output_dir, REJECTED_QUEUE_NAME), "a", encoding="utf-8") as f:
+            for batch_path, lineno, line in rejected:
+                print(f"⚠️ 업로드 큐의 깨진 줄을 건너뜀: {os.path.basename(batch_path)}:{lineno}")
+                f.write(line + "\n")
+
+    summary = {"done": 0, "failed": 0, "skipped": 0, "rejected": len(rejected)}
+    if not latest:
+        for batch_path in batch_paths:
+            os.remove(batch_path)
+        return summary
+
+    manifest_path = os.path.join(output_dir, SYNC_MANIFEST_NAME)
+    items = sorted(latest.values(), key=lambda entry: float(entry.get("queued_at") or 0))
+    result = export_documents(items, workers or DEFAULT_WORKERS, quota_per_minute or QUOTA_PER_MINUTE, manifest_path)
+    summary["done"] = len(result["done"])
+    summary["failed"] = len(result["failed"])
+    summary["skipped"] = result["skipped"]
+    if not result["failed"]:
+        for batch_path in batch_paths:
+            os.remove(batch_path)
+        # 예전 버전이 배치마다 남긴 매니페스트도 함께 정리합니다.
+        for path in [manifest_path] + glob.glob(os.path.join(output_dir, "upload_queue.*.manifest.jsonl")):
+            if os.path.exists(path):
+                os.remove(path)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="출력 싱크 도구")
+    parser.add_argument("--sync", action="store_true", help="업로드 큐를 Google Docs로 동기화")
+    parser.add_argument("--dir", default=OUTPUT_DIR, help="출력 디렉터리")
+    parser.add_argument("--workers", type=int, default=None, help="동시 업로드 수")
+    parser.add_argument("--quota", type=int, default=None, help="분당 API 요청 한도")
+    args = parser.parse_args()
+
+    if not args.sync:
+        parser.print_help()
+        sys.exit(0)
+    summary = sync_upload_queue(args.dir, args.workers, args.quota)
+    print(f"📤 업로드 완료 {summary['done']}건 / 실패 {summary['failed']}건 / 이전 실행에서 완료 {summary['skipped']}건"
+          + (f" / 깨진 줄 {summary['rejected']}건 ({REJECTED_QUEUE_NAME})" if summary["rejected"] else ""))
+    if summary["failed"]:
+        sys.exit(1)
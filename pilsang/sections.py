@@ -0,0 +1,69 @@
+"""
+자기소개서 문항 단위 처리 유틸리티.
+
+MCP Agent가 쓴 초안과 HR Agent의 [REVISE] 출력을 문항([자기소개서 문항 n] / [문항 n]) 단위로
+나누고, 수정된 문항만 원래 초안에 다시 끼워 넣는 데 사용합니다.
+"""
+
+import re
+
+# "[자기소개서 문항 1]" 과 "[문항 1]" 두 형식을 모두 인식합니다.
+# 모델이 마크다운으로 꾸민 헤더("### [문항 1]", "**[자기소개서 문항 1]**")도 같은 헤더로 봅니다.
+SECTION_HEADER = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]*)?(?:[*_]{1,2}[ \t]*)?\[(?:자기소개서\s*)?문항\s*(\d+)\]",
+    re.MULTILINE,
+)
+SECTION_SEPARATOR = "\n\n---\n\n"
+
+
+def _iter_blocks(text: str):
+    """(문항 번호, 문항 블록) 을 등장 순서대로 돌려줍니다. 첫 헤더 앞의 내용은 번호 0입니다."""
+    matches = list(SECTION_HEADER.finditer(text))
+    if not matches:
+        return
+    preamble = text[:matches[0].start()].strip()
+    if preamble:
+        yield 0, preamble
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        block = text[m.start():end].strip()
+        block = re.sub(r"\n\s*-{3,}\s*$", "", block).strip()
+        yield int(m.group(1)), block
+
+
+def split_sections(text: str) -> dict:
+    """
+    텍스트를 문항 번호 -> 문항 블록(헤더 포함) 딕셔너리로 나눕니다.
+    첫 헤더 앞의 내용은 키 0에 들어가며, 블록 끝의 구분선(---)은 제거합니다.
+    문항 헤더가 하나도 없으면 빈 딕셔너리를 돌려줍니다.
+    같은 문항 번호가 두 번 나오면 한쪽이 덮어써져 내용이 사라지므로 ValueError를 냅니다.
+    """
+    sections = {}
+    for n, block in _iter_blocks(text):
+        if n in sections:
+            raise ValueError(f"문항 {n} 헤더가 중복되었습니다.")
+        sections[n] = block
+    return sections
+
+
+def parse_revise_instructions(hr_text: str) -> dict:
+    """
+    HR Agent의 [REVISE] 출력에서 문항 번호 -> 작성 지시 딕셔너리를 만듭니다.
+    첫 줄의 태그는 무시하며, 문항 헤더가 없으면 빈 딕셔너리를 돌려줍니다.
+    같은 문항에 대한 지시가 여러 번 나오면 버리지 않고 순서대로 이어 붙입니다.
+    """
+    body = hr_text.strip()
+    if body.startswith("[REVISE]"):
+        body = body[len("[REVISE]"):]
+    instructions = {}
+    for n, block in _iter_blocks(body):
+        if n == 0 or not block:
+            continue
+        instructions[n] = f"{instructions[n]}\n\n{block}" if n in instructions else block
+    return instructions
+
+
+def splice_sections(draft_sections: dict, revised: dict) -> str:
+    """원래 문항 순서를 유지하면서 수정된 문항만 바꿔 끼운 전체 텍스트를 만듭니다."""
+    merged = [revised.get(n, block) for n, block in sorted(draft_sections.items())]
+    return SECTION_SEPARATOR.join(merged)
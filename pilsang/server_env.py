@@ -0,0 +1,37 @@
+"""
+in-process MCP 서버별 환경변수 범위.
+
+stdio 서버는 설정의 env를 자기 프로세스 환경으로 받지만, in-process 서버는 워크플로우와 같은 프로세스에서
+돌기 때문에 os.environ을 바꾸면 다른 서버와 동시에 실행 중인 다른 작업까지 영향을 받습니다.
+그래서 pilsang/inprocess_mcp.py는 도구 호출 동안만 contextvar에 서버의 env를 걸어 두고,
+서버 코드는 os.getenv 대신 이 모듈의 getenv로 읽습니다. (stdio로 띄우면 그대로 os.getenv와 같음)
+"""
+
+import os
+import contextlib
+import contextvars
+from typing import Optional
+
+_server_env = contextvars.ContextVar("mcp_server_env", default=None)
+
+
+def getenv(key: str, default: Optional[str] = None) -> Optional[str]:
+    """현재 in-process 서버의 env에 있으면 그 값을, 없으면 프로세스 환경변수를 돌려줍니다."""
+    env = _server_env.get()
+    if env is not None and key in env:
+        return env[key]
+    return os.getenv(key, default)
+
+
+@contextlib.contextmanager
+def scoped_env(env: Optional[dict]):
+    """with 블록(과 그 안에서 만든 태스크 / to_thread 호출) 동안만 env를 적용합니다. 값이 None인 항목은 무시합니다."""
+    values = {k: v for k, v in (env or {}).items() if v is not None}
+    if not values:
+        yield
+        return
+    token = _server_env.set({**(_server_env.get() or {}), **values})
+    try:
+        yield
+    finally:
+        _server_env.reset(token)
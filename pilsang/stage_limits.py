@@ -0,0 +1,65 @@
+"""
+워크플로우 단계(노드)별 동시 실행 한도.
+
+여러 실행을 한 이벤트 루프에서 동시에 돌릴 때, 비싼 단계(예: mcp_agent는 GitHub 서버 프로세스 +
+긴 ReAct 루프)만 따로 묶어 API 쿼터를 넘지 않게 합니다.
+
+- 한도: CV_STAGE_LIMITS="mcp_agent=2,hr_agent=8" 또는 set_stage_limits({...}). 지정하지 않은 단계는 무제한
+- limit_stage(name, fn)로 감싼 노드는 한도 안에서만 실행되며, 동기 노드는 스레드에서 실행되어 루프를 막지 않습니다.
+- 감싼 노드마다 추적 span(kind="node")이 생기고, 한도를 기다린 시간은 queue_ms로 기록됩니다. (pilsang/tracing.py)
+"""
+
+import os
+import time
+import asyncio
+import inspect
+import contextlib
+
+from pilsang import tracing
+
+
+def parse_stage_limits(spec: str) -> dict:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+STAGE_LIMITS = parse_stage_limits(os.getenv("CV_STAGE_LIMITS", ""))
+_semaphores = {}
+
+
+def set_stage_limits(limits: dict):
+    """단계별 한도를 바꿉니다. (실행 시작 전에 호출)"""
+    STAGE_LIMITS.clear()
+    STAGE_LIMITS.update(limits)
+    _semaphores.clear()
+
+
+def _semaphore(name: str):
+    limit = STAGE_LIMITS.get(name)
+    if not limit:
+        return contextlib.nullcontext()
+    if name not in _semaphores:
+        _semaphores[name] = asyncio.Semaphore(limit)
+    return _semaphores[name]
+
+
+def limit_stage(name: str, fn):
+    """노드 함수를 단계 한도 안에서 실행하는 비동기 노드로 감쌉니다. (실행 ID가 곧 trace_id)"""
+    is_async = inspect.iscoroutinefunction(fn)
+
+    async def _node(state):
+        async with tracing.span(name, "node", trace_id=state.get("run_id")) as node_span:
+            waited = time.perf_counter()
+            async with _semaphore(name):
+                node_span.set(queue_ms=round((time.perf_counter() - waited) * 1000, 2),
+                              retry_count=state.get("retry_count"))
+                if is_async:
+                    return await fn(state)
+                return await asyncio.to_thread(fn, state)
+
+    _node.__name__ = getattr(fn, "__name__", name)
+    _node.__doc__ = fn.__doc__
+    return _node
@@ -0,0 +1,63 @@
+"""
+체크포인터를 단 부모 그래프에서 RAG 서브그래프(jaebeom/rag.py)를 부르는 경우 테스트.
+
+RAG 서브그래프는 노드 안에서 호출되므로 부모의 체크포인터를 물려받아 자기 상태도 저장합니다.
+LLM은 benchmarks/stubs의 OpenAI 호환 대역 서버가, retriever는 직렬화할 수 없는 가짜 객체가 대신합니다.
+
+실행:
+    python -m pytest pilsang/test_checkpoint.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stubs.openai_api import start_openai_stub
+
+# jaebeom.rag는 import할 때 LLM 클라이언트를 만들므로 대역 서버 주소를 먼저 넣어 둡니다.
+_llm_stub = start_openai_stub(reply="스텁 분석 결과")
+os.environ["OPENAI_API_KEY"] = "stub"
+os.environ["OPENAI_BASE_URL"] = f"{_llm_stub.url}v1"
+
+from langchain_core.documents import Document
+from langgraph.graph import StateGraph, START, END
+
+import jaebeom.rag
+from pilsang import v_all
+from pilsang.blob_store import BlobStore
+from pilsang.checkpoint import SqliteCheckpointSaver
+
+
+class FakeRetriever:
+    """벡터 DB retriever 대역. 일반 객체라 체크포인트 직렬화(msgpack)가 불가능합니다."""
+
+    def invoke(self, query):
+        return [Document(page_content=f"{query} 관련 공고 내용")]
+
+
+def _checkpointed_rag_graph(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.db"), BlobStore(str(tmp_path / "blobs")))
+    graph = StateGraph(v_all.AgentState)
+    graph.add_node("rag_agent", v_all.rag_agent)
+    graph.add_edge(START, "rag_agent")
+    graph.add_edge("rag_agent", END)
+    return graph.compile(checkpointer=saver), saver
+
+
+def test_rag_subgraph_runs_under_parent_checkpointer(tmp_path, monkeypatch):
+    monkeypatch.setattr(v_all, "setup_retriever", lambda *args: FakeRetriever(), raising=False)
+    monkeypatch.setattr(jaebeom.rag, "setup_retriever", lambda *args: FakeRetriever())
+    app, saver = _checkpointed_rag_graph(tmp_path)
+    config = {"configurable": {"thread_id": "rag-test"}}
+
+    result = app.invoke({"resume_text": "", "retry_count": 0, "question_text": None}, config)
+
+    assert not result["resume_text"].startswith("RAG Failed"), result["resume_text"]
+    assert "--- [Job Analysis] ---\n스텁 분석 결과" in result["resume_text"]
+    # 서브그래프도 자기 네임스페이스로 체크포인트를 남기고, 부모 상태는 저장된 값으로 다시 읽힙니다.
+    namespaces = {row[0] for row in saver.conn.execute("SELECT DISTINCT checkpoint_ns FROM checkpoints")}
+    assert "" in namespaces and any(ns.startswith("rag_agent") for ns in namespaces)
+    assert app.get_state(config).values["resume_text"] == result["resume_text"]
+    # 실행이 끝나면 retriever 레지스트리에서 빠집니다.
+    assert jaebeom.rag._retrievers == {}
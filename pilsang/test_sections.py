@@ -0,0 +1,98 @@
+"""
+문항 단위 처리 유틸리티(pilsang/sections.py) 테스트.
+
+실행:
+    python -m pytest pilsang/test_sections.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pilsang.sections import SECTION_SEPARATOR, split_sections, parse_revise_instructions, splice_sections
+
+DRAFT = """[자기소개서 문항 1] 지원 동기
+저장소 A의 성능 개선 경험을 바탕으로 지원했습니다.
+
+---
+
+[자기소개서 문항 2] 협업 경험
+리뷰 문화를 만든 경험이 있습니다.
+
+---
+
+[자기소개서 문항 3] 입사 후 포부
+데이터 파이프라인을 맡고 싶습니다."""
+
+
+def test_split_sections_by_header():
+    sections = split_sections(DRAFT)
+
+    assert sorted(sections) == [1, 2, 3]
+    assert sections[1].startswith("[자기소개서 문항 1] 지원 동기")
+    # 블록 끝의 구분선은 떼어 냅니다.
+    assert not sections[1].endswith("---")
+    assert sections[3].endswith("맡고 싶습니다.")
+
+
+def test_split_sections_keeps_preamble_and_handles_no_headers():
+    sections = split_sections("안내 문구\n\n[문항 1] 제목\n본문")
+
+    assert sections[0] == "안내 문구"
+    assert sections[1] == "[문항 1] 제목\n본문"
+    assert split_sections("헤더 없는 텍스트") == {}
+
+
+@pytest.mark.parametrize("header", [
+    "**[자기소개서 문항 1]** 지원 동기",
+    "### [문항 1] 지원 동기",
+    "## **[자기소개서 문항 1] 지원 동기**",
+    "__[문항 1]__ 지원 동기",
+])
+def test_split_sections_accepts_markdown_headers(header):
+    sections = split_sections(f"{header}\n본문 1\n\n---\n\n[문항 2] 협업\n본문 2")
+
+    assert sorted(sections) == [1, 2]
+    assert sections[1] == f"{header}\n본문 1"
+
+
+def test_split_sections_rejects_duplicate_numbers():
+    with pytest.raises(ValueError, match="문항 1"):
+        split_sections("[문항 1] 첫 번째\n가\n\n[문항 1] 두 번째\n나")
+
+
+def test_parse_revise_instructions():
+    hr_text = """[REVISE]
+[문항 2] 협업 경험
+갈등 해결 과정을 구체적으로 쓰세요.
+
+[문항 3] 입사 후 포부
+수치 목표를 넣으세요."""
+
+    instructions = parse_revise_instructions(hr_text)
+
+    assert sorted(instructions) == [2, 3]
+    assert "갈등 해결" in instructions[2]
+    assert parse_revise_instructions("[REVISE]\n전반적으로 다듬으세요.") == {}
+
+
+def test_parse_revise_instructions_merges_duplicate_numbers():
+    instructions = parse_revise_instructions("[REVISE]\n[문항 1] 근거 추가\n\n**[문항 1]** 분량 줄이기")
+
+    assert list(instructions) == [1]
+    assert "근거 추가" in instructions[1] and "분량 줄이기" in instructions[1]
+
+
+def test_splice_sections_replaces_only_revised():
+    sections = split_sections(DRAFT)
+    revised = {2: "[자기소개서 문항 2] 협업 경험\n새로 쓴 내용"}
+
+    merged = splice_sections(sections, revised)
+    parts = merged.split(SECTION_SEPARATOR)
+
+    assert parts == [sections[1], revised[2], sections[3]]
+    # 다시 나눠도 같은 문항 구성이 나옵니다.
+    assert split_sections(merged) == {1: sections[1], 2: revised[2], 3: sections[3]}
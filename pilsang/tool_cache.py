@@ -0,0 +1,288 @@
+"""
+MCP 도구 결과 메모이제이션.
+
+prepare_retry -> mcp_agent 루프를 돌 때마다 같은 GitHub 검색 / Notion 조회가 반복되므로,
+(서버, 도구, 정규화된 인자)를 키로 결과를 저장해 두었다가 MCP 서버를 거치지 않고 돌려줍니다.
+
+- 실행(run) 범위: run_id마다 캐시 하나. 실행이 끝나면 release_tool_cache(run_id)로 정리합니다.
+- 지원자(candidate) 범위(선택): candidate_id를 주면 캐시를 디스크(CV_TOOL_CACHE_DIR)에 저장해
+  같은 지원자의 다음 실행에서도 재사용합니다. 같은 지원자의 실행 여러 개가 동시에 돌면 캐시 하나를 함께 쓰고,
+  마지막 실행이 release할 때 저장합니다. 저장은 파일 잠금 안에서 디스크의 내용과 합쳐서 하므로
+  여러 워커 프로세스가 같은 지원자를 처리해도 서로의 결과를 지우지 않습니다.
+- 무효화 규칙은 도구 이름 패턴(fnmatch)별 ToolCachePolicy로 설정합니다.
+  CV_TOOL_CACHE_POLICIES(JSON 문자열 또는 JSON 파일 경로) 또는 set_tool_cache_policies({...})로
+  기본 규칙 앞에 사용자 규칙을 더할 수 있습니다.
+  예) CV_TOOL_CACHE_POLICIES='{"search_code": {"ttl": 300}, "get_file_contents": {"cache": false}}'
+"""
+
+import os
+import json
+import time
+import asyncio
+import fnmatch
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from pilsang.file_lock import file_lock
+
+CACHE_DIR = os.getenv("CV_TOOL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tool_cache"))
+# 디스크에 저장된(지원자 범위) 결과의 최대 보존 시간(초). 기본 1일
+PERSIST_MAX_AGE = float(os.getenv("CV_TOOL_CACHE_MAX_AGE", "86400"))
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """
+    도구 하나(또는 이름 패턴)에 대한 캐시 규칙.
+    cache: False면 캐시하지 않음 (쓰기 도구 등)
+    ttl: 결과 유효 시간(초). None이면 캐시가 살아 있는 동안 계속 유효
+    invalidates_server: True면 이 도구를 호출할 때 같은 서버의 캐시를 모두 비움 (쓰기 후 읽기 일관성)
+    """
+    cache: bool = True
+    ttl: Optional[float] = None
+    invalidates_server: bool = False
+
+
+# 앞에서부터 처음 매칭되는 패턴의 규칙을 사용합니다.
+DEFAULT_POLICIES = {
+    "create_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "update_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "push_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "delete_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "merge_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "fork_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "add_*": ToolCachePolicy(cache=False, invalidates_server=True),
+    "search_notion": ToolCachePolicy(ttl=600),
+    "*": ToolCachePolicy(),
+}
+
+
+def load_policies(spec: str) -> dict:
+    """
+    JSON 문자열 또는 JSON 파일 경로에서 {패턴: ToolCachePolicy} 를 읽습니다.
+    값은 ToolCachePolicy 필드(cache / ttl / invalidates_server)를 담은 객체입니다.
+    """
+    spec = spec.strip()
+    if not spec:
+        return {}
+    if not spec.startswith("{"):
+        with open(spec, encoding="utf-8") as f:
+            spec = f.read()
+    policies = {}
+    for pattern, fields in json.loads(spec).items():
+        try:
+            policies[pattern] = ToolCachePolicy(**fields)
+        except TypeError as e:
+            raise ValueError(f"도구 캐시 규칙 '{pattern}'이 올바르지 않습니다: {e}") from e
+    return policies
+
+
+# 설정된 사용자 규칙. 이후 새로 만드는 캐시에 적용됩니다.
+CACHE_POLICIES = load_policies(os.getenv("CV_TOOL_CACHE_POLICIES", ""))
+
+
+def set_tool_cache_policies(policies: dict):
+    """사용자 캐시 규칙을 바꿉니다. (실행 시작 전에 호출, 이미 만들어진 캐시에는 적용되지 않음)"""
+    CACHE_POLICIES.clear()
+    CACHE_POLICIES.update(policies)
+
+
+def _normalize(value):
+    """인자 정규화: 문자열 공백 정리, 딕셔너리 키 정렬, None 값 제거."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(server: str, tool: str, args: dict) -> str:
+    normalized = json.dumps(_normalize(args), ensure_ascii=False, sort_keys=True, default=str)
+    return f"{server}:{tool}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]}"
+
+
+class ToolResultCache:
+    """(server, tool, 정규화된 args) -> 도구 결과 캐시."""
+
+    def __init__(self, policies: Optional[dict] = None, persist_path: Optional[str] = None):
+        # 사용자 규칙을 먼저 두어 기본 규칙보다 우선 매칭되게 합니다.
+        self.policies = dict(policies or {})
+        for pattern, policy in DEFAULT_POLICIES.items():
+            self.policies.setdefault(pattern, policy)
+        self.persist_path = persist_path
+        self.entries = {}   # key -> (저장 시각, 결과)
+        self.inflight = {}  # key -> Future (같은 호출이 동시에 들어오면 한 번만 실행)
+        self.invalidated = {}  # 서버 -> 마지막으로 캐시를 비운 시각 (저장 시 디스크의 예전 결과를 되살리지 않도록)
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.entries = self._load_persisted()
+
+    def _load_persisted(self) -> dict:
+        """디스크에 저장된 결과 중 PERSIST_MAX_AGE 안의 것. 파일이 없거나 깨졌으면 빈 딕셔너리."""
+        try:
+            with open(self.persist_path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        cutoff = time.time() - PERSIST_MAX_AGE
+        return {k: tuple(v) for k, v in stored.items() if v[0] >= cutoff}
+
+    def policy_for(self, tool: str) -> ToolCachePolicy:
+        for pattern, policy in self.policies.items():
+            if fnmatch.fnmatch(tool, pattern):
+                return policy
+        return ToolCachePolicy()
+
+    def get(self, key: str, policy: ToolCachePolicy):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if policy.ttl is not None and time.time() - stored_at > policy.ttl:
+            del self.entries[key]
+            return None
+        return entry
+
+    def put(self, key: str, result):
+        self.entries[key] = (time.time(), result)
+
+    def invalidate_server(self, server: str):
+        prefix = f"{server}:"
+        self.invalidated[server] = time.time()
+        for key in [k for k in self.entries if k.startswith(prefix)]:
+            del self.entries[key]
+
+    def save(self):
+        """
+        디스크의 결과와 합쳐 저장합니다. (같은 키는 더 최근 결과, 이 캐시에서 비운 서버의 예전 결과는 제외)
+        잠금 안에서 고유한 임시 파일에 쓴 뒤 교체하므로 여러 프로세스가 동시에 저장해도 안전합니다.
+        """
+        if not self.persist_path:
+            return
+        directory = os.path.dirname(self.persist_path)
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(self.persist_path):
+            merged = {}
+            for key, entry in self._load_persisted().items():
+                if entry[0] > self.invalidated.get(key.split(":", 1)[0], 0):
+                    merged[key] = entry
+            for key, entry in self.entries.items():
+                if key not in merged or entry[0] >= merged[key][0]:
+                    merged[key] = entry
+            fd, tmp_path = tempfile.mkstemp(prefix=".tool-cache-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, self.persist_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    async def call(self, server: str, tool, args: dict):
+        """캐시를 거쳐 도구를 호출합니다."""
+        policy = self.policy_for(tool.name)
+        if policy.invalidates_server:
+            self.invalidate_server(server)
+        if not policy.cache:
+            return await tool.ainvoke(args)
+
+        key = make_key(server, tool.name, args)
+        entry = self.get(key, policy)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        if key in self.inflight:
+            self.hits += 1
+            return await asyncio.shield(self.inflight[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await tool.ainvoke(args)
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # 기다리는 쪽이 없으면 "Future exception was never retrieved" 경고가 나므로 소비해 둡니다.
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+
+def wrap_tools(tools: list, server: str, cache: ToolResultCache) -> list:
+    """MCP 도구들을 같은 이름/스키마를 가진 캐시 경유 도구로 감쌉니다."""
+    from langchain_core.tools import StructuredTool  # release_tool_cache만 쓰는 곳에서는 불러오지 않음
+
+    wrapped = []
+    for tool in tools:
+        async def _call(_tool=tool, **kwargs):
+            return await cache.call(server, _tool, kwargs)
+
+        wrapped.append(StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=_call,
+        ))
+    return wrapped
+
+
+# --- 실행 / 지원자 범위 레지스트리 ---
+
+_caches = {}
+_holders = {}  # 범위 -> 그 캐시를 쓰는 run_id 집합 (마지막 실행이 release할 때 저장 / 정리)
+_registry_lock = threading.Lock()
+
+
+def _scope(run_id: str, candidate_id: Optional[str]) -> str:
+    return f"candidate:{candidate_id}" if candidate_id else f"run:{run_id}"
+
+
+def candidate_cache_path(candidate_id: str) -> str:
+    """지원자 캐시 파일 경로. candidate_id는 외부 입력이므로 파일 이름에는 해시만 씁니다."""
+    digest = hashlib.sha256(str(candidate_id).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def get_tool_cache(run_id: str, candidate_id: Optional[str] = None, policies: Optional[dict] = None) -> ToolResultCache:
+    """
+    run_id(또는 candidate_id)에 해당하는 캐시를 돌려줍니다. 없으면 만듭니다.
+    같은 실행이 여러 번 불러도(재시도마다 mcp_agent) 한 번만 등록되며, release_tool_cache(run_id, ...)로 풉니다.
+    policies를 주지 않으면 설정된 사용자 규칙(CACHE_POLICIES)을 씁니다.
+    """
+    scope = _scope(run_id, candidate_id)
+    with _registry_lock:
+        if scope not in _caches:
+            persist_path = candidate_cache_path(candidate_id) if candidate_id else None
+            _caches[scope] = ToolResultCache(CACHE_POLICIES if policies is None else policies, persist_path)
+        _holders.setdefault(scope, set()).add(run_id)
+        return _caches[scope]
+
+
+def release_tool_cache(run_id: str, candidate_id: Optional[str] = None):
+    """
+    실행이 끝났을 때 캐시를 놓습니다. 같은 범위를 쓰는 실행이 남아 있으면 그대로 두고,
+    마지막 실행이 놓을 때 정리합니다. (지원자 범위 캐시는 이때 디스크에 저장)
+    """
+    scope = _scope(run_id, candidate_id)
+    with _registry_lock:
+        holders = _holders.get(scope)
+        if holders is None or run_id not in holders:
+            return
+        holders.discard(run_id)
+        if holders:
+            return
+        del _holders[scope]
+        cache = _caches.pop(scope, None)
+    if cache is not None:
+        cache.save()
@@ -0,0 +1,139 @@
+"""
+작업 단계별 도구 부분집합 선택.
+
+server-github는 스무 개가 넘는 도구를 노출하고, 모든 도구의 JSON 스키마가 ReAct 매 단계마다
+LLM에 함께 전송됩니다. 자소서 작성에는 검색 / 읽기 / 커밋 조회 정도만 필요하므로,
+
+1) 단계(phase)별 정적 허용 목록(allowlist)
+2) 작업 내용과 도구 설명의 임베딩 유사도 상위 몇 개(shortlist)
+
+의 합집합만 에이전트에 넘겨 단계당 프롬프트 토큰과 지연을 줄입니다.
+절약된 스키마 토큰은 출력하고, CV_TOOL_ROUTER_LOG가 설정되어 있으면 JSONL로 기록합니다.
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import hashlib
+import functools
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+PHASE_ALLOWLISTS = {
+    "create": {
+        "search_repositories", "search_code", "get_file_contents", "list_commits",
+        "find_evidence", "repo_overview", "search_notion",
+    },
+    "revise": {
+        "search_code", "get_file_contents", "list_commits",
+        "find_evidence", "search_notion",
+    },
+}
+# 허용 목록 밖에서 유사도로 추가할 최대 도구 수 / 최소 유사도
+SHORTLIST_SIZE = 2
+MIN_SIMILARITY = 0.35
+
+ROUTER_LOG_PATH = os.getenv("CV_TOOL_ROUTER_LOG")
+# 0이면 임베딩 전에 tiktoken으로 길이를 검사하지 않습니다. (OpenAI 호환 로컬 서버용)
+EMBEDDING_CTX_CHECK = os.getenv("CV_EMBEDDING_CTX_CHECK", "1") != "0"
+
+# 도구 설명 임베딩 캐시: sha256(설명) -> 벡터 (프로세스 수명 동안 재사용)
+_description_vectors = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding():
+    # 인코딩 파일을 받지 못하면(오프라인 등) 호출마다 다시 내려받으려 하지 않도록 실패도 기억합니다.
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding is not None else len(text) // 4
+
+
+def schema_tokens(tool) -> int:
+    """도구 하나의 함수 스키마(LLM에 실제로 전달되는 형태)의 토큰 수 추정치."""
+    return _count_tokens(json.dumps(convert_to_openai_tool(tool), ensure_ascii=False))
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _embed_task(texts: dict, keys: dict, task_text: str) -> list:
+    """빠진 도구 설명 벡터를 채우고 작업 내용 벡터를 돌려줍니다. (네트워크 + tiktoken, 워커 스레드에서 실행)"""
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(check_embedding_ctx_length=EMBEDDING_CTX_CHECK)
+
+    missing = [name for name in texts if keys[name] not in _description_vectors]
+    if missing:
+        vectors = embeddings.embed_documents([texts[name] for name in missing])
+        for name, vec in zip(missing, vectors):
+            _description_vectors[keys[name]] = vec
+    return embeddings.embed_query(task_text[:2000])
+
+
+async def _similarity_shortlist(tools: list, task_text: str, exclude: set) -> list:
+    """작업 내용과 설명이 가까운 도구를 SHORTLIST_SIZE개까지 고릅니다. 임베딩이 불가능하면 빈 목록."""
+    candidates = [t for t in tools if t.name not in exclude]
+    if not candidates or not task_text.strip() or not os.getenv("OPENAI_API_KEY"):
+        return []
+    texts = {t.name: f"{t.name}: {t.description}" for t in candidates}
+    keys = {name: hashlib.sha256(text.encode("utf-8")).hexdigest() for name, text in texts.items()}
+    try:
+        # OpenAIEmbeddings의 async 경로도 길이 검사(tiktoken)는 동기로 하므로 통째로 스레드에서 돌립니다.
+        task_vec = await asyncio.to_thread(_embed_task, texts, keys, task_text)
+    except Exception as e:
+        print(f"   ⚠️ 도구 유사도 계산 실패: {e} → 허용 목록만 사용")
+        return []
+
+    scored = sorted(
+        ((_cosine(task_vec, _description_vectors[keys[t.name]]), t) for t in candidates),
+        key=lambda pair: pair[0], reverse=True,
+    )
+    return [t for score, t in scored[:SHORTLIST_SIZE] if score >= MIN_SIMILARITY]
+
+
+async def select_tools(tools: list, phase: str, task_text: str = "") -> list:
+    """
+    단계와 작업 내용에 맞는 최소 도구 부분집합을 돌려줍니다.
+    async 노드(mcp_agent) 안에서 부르므로 임베딩 요청과 토큰 계산(tiktoken 로드)이 이벤트 루프를 막지 않게 합니다.
+    """
+    allowlist = PHASE_ALLOWLISTS.get(phase)
+    if allowlist is None:
+        return tools
+
+    selected = [t for t in tools if t.name in allowlist]
+    selected += await _similarity_shortlist(tools, task_text, exclude=allowlist)
+    if not selected:
+        # 허용 목록과 하나도 맞지 않으면(서버 도구 이름이 바뀐 경우 등) 전체를 넘깁니다.
+        return tools
+
+    tokens = await asyncio.to_thread(lambda: [schema_tokens(t) for t in tools])
+    chosen = {id(t) for t in selected}
+    full = sum(tokens)
+    kept = sum(n for t, n in zip(tools, tokens) if id(t) in chosen)
+    print(f"   🧰 도구 선택({phase}): {len(selected)}/{len(tools)}개, "
+          f"스키마 토큰 {kept}/{full} (단계당 {full - kept} 절약)")
+    if ROUTER_LOG_PATH:
+        with open(ROUTER_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "ts": time.time(),
+                "phase": phase,
+                "tools_total": len(tools),
+                "tools_selected": [t.name for t in selected],
+                "schema_tokens_total": full,
+                "schema_tokens_selected": kept,
+                "schema_tokens_saved_per_step": full - kept,
+            }, ensure_ascii=False) + "\n")
+    return selected
@@ -0,0 +1,410 @@
+"""
+실행 추적(span) - 어느 단계에서 시간과 비용이 쓰이는지 기록합니다.
+
+- 노드 span: 모든 워크플로우 노드 (stage_limits.limit_stage에서 생성). 단계 한도 대기 시간은 queue_ms
+- LLM / 임베딩 span: OpenAI SDK 호출 (chat.completions / responses / embeddings)을 직접 감싸므로
+  LangChain을 거치든 SDK를 직접 쓰든 모두 기록. 토큰(prompt / completion / cached)과 예상 비용(USD) 포함
+- 검색 / 도구 span: LangChain 콜백(callbacks())으로 retriever, MCP 도구 호출 기록
+- 부모 span은 contextvars로 전달되므로 asyncio.gather / asyncio.to_thread 안의 호출도 올바른 노드 아래에 붙습니다.
+- OpenAI 요청에는 trace_id(= 실행 ID)를 TRACE_HEADER 헤더로 실어 보냅니다. (서버 / 프록시 로그와 실행을 맞춰 보기 위함)
+
+출력: CV_TRACE_FILE (기본 pilsang/traces/spans.jsonl), 한 줄에 span 하나
+- CV_TRACE_FORMAT=jsonl (기본): 평평한 JSON
+- CV_TRACE_FORMAT=otlp: OTLP/JSON (resourceSpans) 형식. OpenTelemetry Collector의 otlpjsonfile 수신기로 읽을 수 있음
+CV_TRACE=0이면 기록하지 않습니다.
+add_listener(fn)로 끝난 span을 같은 프로세스에서 받아볼 수 있습니다. (예: 작업 서버의 진행 상황 스트리밍)
+
+집계:
+    python pilsang/tracing.py [spans.jsonl] [--run RUN_ID]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import functools
+import threading
+import contextvars
+from collections import defaultdict
+from typing import Optional
+
+TRACE_ENABLED = os.getenv("CV_TRACE", "1") != "0"
+TRACE_FILE = os.getenv("CV_TRACE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces", "spans.jsonl"))
+TRACE_FORMAT = os.getenv("CV_TRACE_FORMAT", "jsonl")
+SERVICE_NAME = "cv-agent"
+TRACE_HEADER = "X-CV-Trace-Id"
+
+# 100만 토큰당 USD (입력, 캐시된 입력, 출력). 모델 이름은 가장 긴 접두사로 찾습니다.
+# CV_MODEL_PRICES(JSON 파일 경로)로 덮어쓸 수 있습니다: {"model": [input, cached_input, output]}
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-4": (30.00, 30.00, 60.00),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.13, 0.0),
+    "text-embedding-ada-002": (0.10, 0.10, 0.0),
+}
+if os.getenv("CV_MODEL_PRICES"):
+    with open(os.environ["CV_MODEL_PRICES"], "r", encoding="utf-8") as f:
+        MODEL_PRICES.update({k: tuple(v) for k, v in json.load(f).items()})
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """예상 비용(USD). 가격표에 없는 모델이면 None."""
+    matches = [name for name in MODEL_PRICES if (model or "").startswith(name)]
+    if not matches:
+        return None
+    price_in, price_cached, price_out = MODEL_PRICES[max(matches, key=len)]
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * price_in + cached_tokens * price_cached + completion_tokens * price_out) / 1_000_000
+
+
+# --- span ---
+
+_current_span = contextvars.ContextVar("cv_current_span", default=None)
+_write_lock = threading.Lock()
+_listeners = []
+
+
+class Span:
+    """
+    with / async with 로 쓰는 span. 끝날 때 파일에 한 줄로 기록됩니다.
+    trace_id를 주지 않으면 부모 span의 trace_id를 이어받습니다.
+    """
+
+    def __init__(self, name: str, kind: str = "internal", trace_id: str = None, attributes: dict = None,
+                 parent: "Span" = None):
+        parent = parent if parent is not None else _current_span.get()
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id or (parent.trace_id if parent else uuid.uuid4().hex)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.end = None
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def finish(self, error: BaseException = None):
+        self.end = time.time()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.finish(exc)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 2),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def span(name: str, kind: str = "internal", trace_id: str = None, **attributes) -> Span:
+    return Span(name, kind, trace_id, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_otlp(item: dict) -> dict:
+    attributes = {**item["attributes"], "cv.kind": item["kind"], "cv.duration_ms": item["duration_ms"]}
+    otlp_span = {
+        "traceId": item["trace_id"],
+        "spanId": item["span_id"],
+        "name": item["name"],
+        "kind": 3 if item["kind"] in ("llm", "embedding", "tool") else 1,  # CLIENT / INTERNAL
+        "startTimeUnixNano": str(int(item["start"] * 1e9)),
+        "endTimeUnixNano": str(int(item["end"] * 1e9)),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None],
+        "status": {"code": 2, "message": item["error"]} if item["error"] else {"code": 1},
+    }
+    if item["parent_span_id"]:
+        otlp_span["parentSpanId"] = item["parent_span_id"]
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "pilsang.tracing"}, "spans": [otlp_span]}],
+    }]}
+
+
+def add_listener(fn):
+    """끝난 span마다 fn(span_dict)을 부릅니다. span을 끝낸 스레드에서 불리므로 fn은 스레드 안전해야 합니다."""
+    _listeners.append(fn)
+
+
+def remove_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def export(finished: Span):
+    item = finished.to_dict()
+    for listener in list(_listeners):
+        try:
+            listener(item)
+        except Exception as e:
+            print(f"[tracing] listener error: {e}")
+    if not TRACE_ENABLED:
+        return
+    line = json.dumps(_to_otlp(item) if TRACE_FORMAT == "otlp" else item, ensure_ascii=False, default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# --- OpenAI SDK 계측 ---
+
+def _usage_attributes(model: str, usage) -> dict:
+    """chat.completions / responses / embeddings의 usage를 같은 이름으로 맞춥니다."""
+    if usage is None:
+        return {}
+    get = (lambda obj, name: obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None))
+    prompt = get(usage, "prompt_tokens") or get(usage, "input_tokens") or 0
+    completion = get(usage, "completion_tokens") or get(usage, "output_tokens") or 0
+    details = get(usage, "prompt_tokens_details") or get(usage, "input_tokens_details")
+    cached = (get(details, "cached_tokens") if details is not None else 0) or 0
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": cached,
+        "cost_usd": estimate_cost(model, prompt, completion, cached),
+    }
+
+
+def _record_response(current: Span, kwargs: dict, response):
+    # LangChain은 with_raw_response로 호출하므로 파싱된 객체를 꺼내서 봅니다. (parse 결과는 SDK가 캐시)
+    parsed = response.parse() if hasattr(response, "parse") and not hasattr(response, "usage") else response
+    model = getattr(parsed, "model", None) or kwargs.get("model")
+    current.set(model=model, **_usage_attributes(model, getattr(parsed, "usage", None)))
+
+
+def _with_trace_header(kwargs: dict) -> dict:
+    """현재 span의 trace_id를 요청 헤더에 더합니다. (호출자가 준 extra_headers는 유지)"""
+    current = _current_span.get()
+    if current is None:
+        return kwargs
+    return dict(kwargs, extra_headers={**(kwargs.get("extra_headers") or {}), TRACE_HEADER: current.trace_id})
+
+
+def _wrap_sync(method, name: str, kind: str):
+    @functools.wraps(method)
+    def _traced(self, *args, **kwargs):
+        kwargs = _with_trace_header(kwargs)
+        if not TRACE_ENABLED or kwargs.get("stream"):
+            return method(self, *args, **kwargs)
+        with Span(name, kind, attributes={"model": kwargs.get("model")}) as current:
+            response = method(self, *args, **kwargs)
+            _record_response(current, kwargs, response)
+            return response
+    _traced.__cv_traced__ = True
+    return _traced
+
+
+def _wrap_async(method, name: str, kind: str):
+    @functools.wraps(method)
+    async def _traced(self, *args, **kwargs):
+        kwargs = _with_trace_header(kwargs)
+        if not TRACE_ENABLED or kwargs.get("stream"):
+            return await method(self, *args, **kwargs)
+        async with Span(name, kind, attributes={"model": kwargs.get("model")}) as current:
+            response = await method(self, *args, **kwargs)
+            _record_response(current, kwargs, response)
+            return response
+    _traced.__cv_traced__ = True
+    return _traced
+
+
+def instrument_openai():
+    """OpenAI SDK의 생성/임베딩 메서드에 span을 붙입니다. 여러 번 불러도 한 번만 적용됩니다."""
+    try:
+        from openai.resources.chat import completions as chat_completions
+        from openai.resources import embeddings, responses
+    except ImportError:
+        return
+    targets = [
+        (chat_completions.Completions, chat_completions.AsyncCompletions, "openai.chat.completions", "llm"),
+        (responses.Responses, responses.AsyncResponses, "openai.responses", "llm"),
+        (embeddings.Embeddings, embeddings.AsyncEmbeddings, "openai.embeddings", "embedding"),
+    ]
+    for sync_cls, async_cls, name, kind in targets:
+        if not getattr(sync_cls.create, "__cv_traced__", False):
+            sync_cls.create = _wrap_sync(sync_cls.create, name, kind)
+        if not getattr(async_cls.create, "__cv_traced__", False):
+            async_cls.create = _wrap_async(async_cls.create, name, kind)
+
+
+# --- LangChain 콜백 (검색 / 도구) ---
+
+class _TracingCallbacks:
+    """retriever / 도구 호출을 span으로 기록합니다. (LLM 호출은 SDK 계측에서 기록하므로 여기서는 제외)"""
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, parent_run_id, name: str, kind: str, **attributes):
+        with self._lock:
+            parent = self._spans.get(parent_run_id)
+        started = Span(name, kind, attributes=attributes, parent=parent)
+        with self._lock:
+            self._spans[run_id] = started
+
+    def _end(self, run_id, error: BaseException = None, **attributes):
+        with self._lock:
+            ended = self._spans.pop(run_id, None)
+        if ended is not None:
+            ended.set(**attributes)
+            ended.finish(error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "retriever", "retrieval", query_chars=len(query or ""))
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents or []))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool.{name}", "tool", input_chars=len(str(input_str or "")))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self._end(run_id, output_chars=len(str(content or "")))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+@functools.lru_cache(maxsize=None)
+def _handler_class():
+    # langchain_core는 무거우므로 실제로 그래프를 실행할 때 처음 불러옵니다.
+    from langchain_core.callbacks import BaseCallbackHandler
+    return type("TracingCallbackHandler", (_TracingCallbacks, BaseCallbackHandler), {})
+
+
+def callbacks() -> list:
+    """그래프 실행 config["callbacks"]에 넣을 핸들러 목록 (추적이 꺼져 있으면 빈 목록)"""
+    return [_handler_class()()] if TRACE_ENABLED else []
+
+
+# --- 집계 ---
+
+def load_spans(path: str) -> list:
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "resourceSpans" in item:  # OTLP 형식이면 평평한 형식으로 되돌림
+                raw = item["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+                attrs = {a["key"]: next(iter(a["value"].values())) for a in raw["attributes"]}
+                item = {"trace_id": raw["traceId"], "span_id": raw["spanId"], "parent_span_id": raw.get("parentSpanId"),
+                        "name": raw["name"], "kind": attrs.pop("cv.kind"), "duration_ms": float(attrs.pop("cv.duration_ms")),
+                        "attributes": {k: (float(v) if k in ("cost_usd", "queue_ms") else int(v) if k.endswith("tokens") else v)
+                                       for k, v in attrs.items()}}
+            spans.append(item)
+    return spans
+
+
+def summarize(spans: list) -> dict:
+    """
+    노드별 합계: {노드: {"runs", "wall_ms", "queue_ms", "llm_calls", "prompt_tokens", "completion_tokens",
+    "cached_tokens", "cost_usd"}}. 중첩 호출은 가장 가까운 노드 span에 더합니다.
+    """
+    by_id = {s["span_id"]: s for s in spans}
+
+    def _node_of(item):
+        while item is not None and item["kind"] != "node":
+            item = by_id.get(item.get("parent_span_id"))
+        return item["name"] if item else "(no node)"
+
+    totals = defaultdict(lambda: defaultdict(float))
+    for item in spans:
+        attrs = item.get("attributes", {})
+        row = totals[_node_of(item)]
+        if item["kind"] == "node":
+            row["runs"] += 1
+            row["wall_ms"] += item["duration_ms"]
+            row["queue_ms"] += attrs.get("queue_ms", 0)
+        elif item["kind"] in ("llm", "embedding"):
+            row["llm_calls"] += 1
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd"):
+                row[key] += attrs.get(key) or 0
+        elif item["kind"] == "tool":
+            row["tool_calls"] += 1
+    return totals
+
+
+def print_summary(spans: list):
+    totals = summarize(spans)
+    print(f"{'node':<18}{'runs':>5}{'wall(s)':>10}{'queue(s)':>10}{'llm':>6}{'tools':>6}"
+          f"{'prompt':>10}{'compl':>9}{'cached':>9}{'cost($)':>10}")
+    for node, row in sorted(totals.items(), key=lambda kv: -kv[1]["wall_ms"]):
+        print(f"{node:<18}{int(row['runs']):>5}{row['wall_ms'] / 1000:>10.2f}{row['queue_ms'] / 1000:>10.2f}"
+              f"{int(row['llm_calls']):>6}{int(row['tool_calls']):>6}{int(row['prompt_tokens']):>10}"
+              f"{int(row['completion_tokens']):>9}{int(row['cached_tokens']):>9}{row['cost_usd']:>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추적 파일을 노드별로 집계")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE, help="span JSONL 파일")
+    parser.add_argument("--run", help="특정 실행(run_id = trace_id)만 집계")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"추적 파일이 없습니다: {args.path}")
+        sys.exit(1)
+    spans = load_spans(args.path)
+    if args.run:
+        spans = [s for s in spans if s["trace_id"] == args.run]
+    print(f"span {len(spans)}개, 실행 {len({s['trace_id'] for s in spans})}개")
+    print_summary(spans)
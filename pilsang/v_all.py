@@ -1,37 +1,90 @@
 import sys
 import os
+import uuid
+import hashlib
 import asyncio
+import argparse
 from dotenv import load_dotenv
 
 # Add project root to sys.path to allow importing from sibling directories
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from typing import TypedDict, Literal, Optional
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from jaebeom.rag import app as rag_app, setup_retriever
 from mirim.hr_agent import hr_agent as mirim_hr_agent
 from mirim.interview import interview_agent as mirim_interview_agent
-from jinwook.googlmcp import GoogleDocsMCPServer
+from pilsang.tool_cache import release_tool_cache
+from pilsang.output_sink import get_output_sink
+from pilsang.work_queue import LeaseLostError, effect_ledger
+from pilsang.stage_limits import limit_stage
+from pilsang import tracing
+from pilsang import convergence
+from pilsang import cassette
+from pilsang.blob_store import put_text, resolve
+from pilsang.sections import SECTION_HEADER, split_sections, parse_revise_instructions, splice_sections
+# langgraph / langchain / RAG / MCP 클라이언트는 무거우므로 (합쳐서 수 초) 노드 안이나 get_app()에서 처음 쓸 때 import 합니다.
+# --list 같은 짧은 CLI 실행과 워커 기동이 import 비용을 내지 않게 하기 위함입니다. (benchmarks/bench_import_time.py)
 
 # 1. 환경 설정
 load_dotenv(override=True)
 MY_GITHUB_ID = "yeop-sang"
+# RAG 입력 기본값 (채용 공고 HTML/URL, 자소서 문항 PDF/DOCX). 실행별로 state의 posting_source / question_source로 바꿀 수 있습니다.
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_for_rag'))
+DEFAULT_POSTING_SOURCE = os.getenv("CV_POSTING_SOURCE", os.path.join(DATA_DIR, "internship.html"))
+DEFAULT_QUESTION_SOURCE = os.getenv("CV_QUESTION_SOURCE", os.path.join(DATA_DIR, "questions.docx"))
+GIT_EVIDENCE_SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'servers', 'git_evidence_server.py'))
+# 파이썬 MCP 서버 실행 방식: "inprocess"(서브프로세스 없이 직접 호출) 또는 "stdio"
+PYTHON_MCP_TRANSPORT = os.getenv("CV_PYTHON_MCP_TRANSPORT", "inprocess")
+# GitHub MCP 서버 대신 쓸 파이썬 서버 ("모듈:객체", in-process). 예: 벤치마크의 로컬 대역 benchmarks.stubs.github_mcp:mcp
+GITHUB_MCP_TARGET = os.getenv("CV_GITHUB_MCP_TARGET")
+# HR [REVISE] 후 MCP Agent로 돌아가는 최대 횟수. 넘으면 가장 점수가 높았던 초안으로 면접 단계에 진행합니다.
+MAX_HR_RETRIES = 5
+
+def python_server_config(script_path: str, target: str, env: dict) -> dict:
+    """파이썬 MCP 서버 설정을 만듭니다. (PYTHON_MCP_TRANSPORT에 따라 in-process 또는 stdio)"""
+    if PYTHON_MCP_TRANSPORT == "inprocess":
+        return {"transport": "inprocess", "target": target, "env": env}
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [script_path],
+        "env": {**{k: v for k, v in env.items() if v is not None}, "PATH": os.environ["PATH"], "PYTHONUNBUFFERED": "1"}
+    }
 
 # --- State 정의 ---
 class AgentState(TypedDict):
     """
     워크플로우 상태 관리.
+    긴 텍스트 필드(resume_text / question_text / draft_text / best_draft)에는 블롭 참조("blob:<sha256>")가 들어갈 수 있으므로,
+    내용이 필요한 곳에서 resolve()로 읽고 새 텍스트는 put_text()로 저장해 돌려줍니다. (pilsang/blob_store.py)
     resume_text: 자소서 텍스트 (RAG/MCP/HR에서 처리)
     question_text: 면접 질문 텍스트 (Interview에서 생성)
     retry_count: 재시도 횟수
+    draft_text: MCP Agent가 마지막으로 작성한 전체 자소서 (문항 단위 수정 시 기준)
+    run_id: 실행 ID (도구 결과 캐시 범위)
+    candidate_id: 지원자 ID (선택, 지정 시 도구 캐시를 지원자 단위로 디스크에 유지)
+    doc_key: 지원자/공고별 문서 키 (선택, 지정 시 매 실행마다 새 문서 대신 같은 문서의 변경분만 갱신)
+    github_id: 근거를 검색할 GitHub 아이디 (선택, 기본 MY_GITHUB_ID)
+    posting_source: 채용 공고 URL 또는 HTML 파일 경로 (선택, 기본 DEFAULT_POSTING_SOURCE)
+    question_source: 자소서 문항 PDF/DOCX 경로 (선택, 기본 DEFAULT_QUESTION_SOURCE)
+    score_history: HR 검토마다의 기준별 점수와 평균 (pilsang/convergence.py)
+    best_draft: 지금까지 HR 평균 점수가 가장 높았던 초안
+    stop_reason: 점수가 정체되어 재시도를 멈춘 이유 (있으면 [REVISE]여도 면접 단계로 진행)
+    artifacts: 출력 싱크가 저장한 결과 파일 경로 {"md", "docx", "json"} (+ "url")
     """
     resume_text: str
     question_text: Optional[str]
     retry_count: int
+    draft_text: Optional[str]
+    run_id: Optional[str]
+    candidate_id: Optional[str]
+    doc_key: Optional[str]
+    github_id: Optional[str]
+    posting_source: Optional[str]
+    question_source: Optional[str]
+    score_history: Optional[list]
+    best_draft: Optional[str]
+    stop_reason: Optional[str]
+    artifacts: Optional[dict]
 
 # --- 에이전트 노드 ---
 
@@ -40,25 +93,30 @@ def rag_agent(state: AgentState) -> AgentState:
     RAG 에이전트: 검색 기반으로 초기 프롬프트를 생성합니다.
     """
     print("--- RAG Agent ---")
+    from langchain_core.messages import HumanMessage
+    from jaebeom.rag import get_app as get_rag_app, cached_retriever, register_retriever, release_retriever
     
-    # RAG 실행에 필요한 설정 (예시 URL/경로 사용 - 실제 사용시 조정 필요)
-    # jaebeom/rag.py의 main 실행부에서 가져온 경로들
-    target_url = "/home/sktll/projects/cv_mcp_project/data_for_rag/internship.html" 
-    target_pdf = "/home/sktll/projects/cv_mcp_project/data_for_rag/questions.docx"
+    # RAG 입력 (실행별 지정이 없으면 data_for_rag/의 기본 파일 사용)
+    target_url = state.get("posting_source") or DEFAULT_POSTING_SOURCE
+    target_pdf = state.get("question_source") or DEFAULT_QUESTION_SOURCE
     
+    retriever_key = None
     try:
-        # Retriever 생성
+        # Retriever 생성 (RAG 상태에는 레지스트리 키만 넣음)
+        # RAG 서브그래프는 부모 그래프의 체크포인터를 물려받아 상태를 저장하므로, 직렬화할 수 없는 객체를 넣으면 안 됩니다.
         print("Initializing Retriever...")
-        retriever = setup_retriever(target_url, target_pdf)
+        # 녹화 / 재생 모드(CV_CASSETTE_MODE)면 검색 결과를 카세트로 녹화하거나 카세트에서 돌려줌
+        retriever = cassette.wrap_retriever(f"{target_url}|{target_pdf}", lambda: cached_retriever(target_url, target_pdf))
+        retriever_key = register_retriever(retriever)
         
         # RAG Workflow 실행
         rag_initial_state = {
             "messages": [HumanMessage(content="채용 공고 분석 및 자소서 가이드 시작해줘.")],
-            "retriever": retriever
+            "retriever": retriever_key
         }
         
         print("Invoking RAG App...")
-        final_state = rag_app.invoke(rag_initial_state)
+        final_state = get_rag_app().invoke(rag_initial_state)
         
         # 결과 추출 (User Request: messages[1] + messages[2])
         # messages[0]: Human, messages[1]: AI(Analysis), messages[2]: AI(Strategy)
@@ -69,18 +127,28 @@ def rag_agent(state: AgentState) -> AgentState:
         
         print("RAG Finished.")
         # RAG 결과는 resume_text에 들어갑니다.
-        return {"resume_text": combined_text, "retry_count": state["retry_count"], "question_text": None}
+        return {"resume_text": put_text(combined_text), "retry_count": state["retry_count"], "question_text": None}
         
     except Exception as e:
         print(f"RAG Agent Error: {e}")
         # 에러 발생 시 fallback
-        return {"resume_text": f"RAG Failed: {e}", "retry_count": state["retry_count"], "question_text": None}
+        return {"resume_text": put_text(f"RAG Failed: {e}"), "retry_count": state["retry_count"], "question_text": None}
+    finally:
+        if retriever_key:
+            release_retriever(retriever_key)
 
 async def mcp_agent(state: AgentState) -> AgentState:
     """
     MCP Agent: GitHub 데이터를 기반으로 자소서를 작성하거나 수정합니다.
     """
     print(f"\n🔹 [MCP Agent 작동 시작] (Retry Count: {state['retry_count']})")
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from langgraph.prebuilt import create_react_agent
+    from pilsang.inprocess_mcp import HybridMCPClient
+    from pilsang.tool_cache import CACHE_POLICIES, get_tool_cache, wrap_tools
+    from pilsang.tool_router import select_tools
+    from pilsang.message_window import pre_model_hook as window_pre_model_hook
+    github_id = state.get("github_id") or MY_GITHUB_ID
     
     # 1. GitHub 서버 설정
     server_config = {
@@ -95,30 +163,87 @@ async def mcp_agent(state: AgentState) -> AgentState:
         }
     }
 
+    if GITHUB_MCP_TARGET:
+        server_config["github"] = {"transport": "inprocess", "target": GITHUB_MCP_TARGET, "env": {}}
+
+    # 로컬에 clone 해 둔 저장소가 있으면 git 히스토리 근거 서버를 fast path로 추가
+    if os.getenv("LOCAL_REPOS_DIR"):
+        server_config["git_evidence"] = python_server_config(
+            GIT_EVIDENCE_SCRIPT_PATH, "servers.git_evidence_server:mcp",
+            {"LOCAL_REPOS_DIR": os.environ["LOCAL_REPOS_DIR"]}
+        )
+
     try:
+        resume_text = resolve(state["resume_text"])
         print("   🔌 GitHub 서버 연결 중...")
-        client = MultiServerMCPClient(server_config)
-        tools = await client.get_tools()
+        # 카세트 재생 모드면 서버를 띄우지 않고 녹화된 도구 목록 / 결과를 씁니다.
+        client = None if cassette.replaying() else HybridMCPClient(server_config)
+        # 같은 실행 안에서 반복되는 도구 호출은 캐시에서 돌려줍니다. (서버별로 감싸서 키에 서버 이름 포함)
+        # 캐시 규칙은 CV_TOOL_CACHE_POLICIES(또는 set_tool_cache_policies)로 바꿀 수 있습니다.
+        cache = get_tool_cache(state["run_id"], state.get("candidate_id"), CACHE_POLICIES) if state.get("run_id") else None
+        tools = []
+        for server_name in server_config:
+            if client is None:
+                server_tools = cassette.replay_tools(server_name)
+            else:
+                server_tools = cassette.record_tools(server_name, await client.get_tools(server_name=server_name))
+            tools.extend(wrap_tools(server_tools, server_name, cache) if cache else server_tools)
         print(f"   ✅ 연결 성공! 사용 가능한 도구: {len(tools)}개")
+        # 단계별로 필요한 도구만 남겨 매 단계 전송되는 스키마를 줄입니다.
+        tools = await select_tools(tools, "revise" if state["retry_count"] > 0 else "create", resume_text)
 
-        # LLM 설정
-        llm = ChatOpenAI(model="gpt-4o", temperature=0)
+        # LLM 설정 (프로세스 안에서 한 번 만들어 연결 풀을 재사용)
+        llm = _chat_model("gpt-4o")
         
-        agent = create_react_agent(llm, tools)
+        # 오래된 도구 결과는 요약하고 최근 라운드만 원문으로 보내 단계별 프롬프트 크기를 제한합니다.
+        agent = create_react_agent(llm, tools, pre_model_hook=window_pre_model_hook)
 
         # 시스템 프롬프트 (내 아이디로만 검색하도록 강제)
         system_prompt = f"""
-        당신은 사용자의 GitHub(`user:{MY_GITHUB_ID}`) 데이터를 근거로 자소서를 작성하는 에이전트입니다.
+        당신은 사용자의 GitHub(`user:{github_id}`) 데이터를 근거로 자소서를 작성하는 에이전트입니다.
         없는 내용은 지어내지 말고, 반드시 검색된 코드나 커밋 내용을 근거로 작성하세요.
         각 항목별로 300자 이내로 작성해주세요.
+
+        [출력 형식]
+        각 문항은 `[자기소개서 문항 n] 문항 제목` 줄로 시작하고, 문항 사이에는 구분선(`---`)을 넣으세요.
+        """
+        if "git_evidence" in server_config:
+            system_prompt += """
+        근거를 찾을 때는 로컬 git 히스토리 도구(find_evidence, repo_overview)를 먼저 사용하고,
+        거기서 부족한 경우에만 GitHub 원격 검색 도구를 사용하세요.
         """
 
         # 입력 메시지 구성 (current_text -> resume_text)
+        draft = resolve(state.get("draft_text"))
+        instructions = parse_revise_instructions(resume_text) if state["retry_count"] > 0 else {}
+        try:
+            draft_sections = split_sections(draft) if draft else {}
+        except ValueError as e:
+            # 문항 번호가 겹치는 초안은 문항 단위로 끼워 넣을 수 없으므로 전체를 다시 작성합니다.
+            print(f"   ⚠️ 문항 단위 수정 불가: {e}")
+            draft_sections = {}
+
+        if instructions and draft_sections and set(instructions) <= set(draft_sections):
+            # HR이 지적한 문항만 다시 작성하고 나머지 문항은 그대로 이어 붙입니다.
+            print(f"작업 모드: [REVISE] (문항 {sorted(instructions)}만 수정, "
+                  f"{len(draft_sections) - len(instructions)}개 문항 유지)")
+            revised = dict(zip(instructions, await asyncio.gather(*[
+                _revise_section(agent, system_prompt, draft_sections[n], instructions[n])
+                for n in instructions
+            ])))
+            generated_ref = put_text(splice_sections(draft_sections, revised))
+            _print_cache_stats(cache)
+            return {"resume_text": generated_ref, "draft_text": generated_ref, "retry_count": state["retry_count"]}
+
         if state["retry_count"] == 0:
-            user_msg = f"[CREATE]\n{state['resume_text']}"
+            user_msg = f"[CREATE]\n{resume_text}"
             print("작업 모드: [CREATE] (초안 작성)")
         else:
-            user_msg = f"[REVISE]\n{state['resume_text']}"
+            # 전체를 다시 쓸 때도 이전 초안을 함께 보내야 HR 피드백을 반영해 고칠 수 있습니다.
+            feedback = resume_text.strip()
+            if feedback.startswith("[REVISE]"):
+                feedback = feedback[len("[REVISE]"):].strip()
+            user_msg = f"[REVISE]\n[이전 초안]\n{draft}\n\n[HR 피드백]\n{feedback}" if draft else f"[REVISE]\n{feedback}"
             print("작업 모드: [REVISE] (수정 보완)")
 
         messages = [
@@ -131,13 +256,50 @@ async def mcp_agent(state: AgentState) -> AgentState:
         response = await agent.ainvoke({"messages": messages})
         
         # 4. 결과 뽑기
-        generated_text = response["messages"][-1].content
-        return {"resume_text": generated_text, "retry_count": state["retry_count"]}
+        generated_ref = put_text(response["messages"][-1].content)
+        _print_cache_stats(cache)
+        return {"resume_text": generated_ref, "draft_text": generated_ref, "retry_count": state["retry_count"]}
 
     except Exception as e:
         print(f"MCP 에러 발생: {e}")
         return {"resume_text": f"Error: {str(e)}", "retry_count": state["retry_count"]}
 
+_chat_models = {}
+
+def _chat_model(model: str):
+    if model not in _chat_models:
+        from langchain_openai import ChatOpenAI
+        _chat_models[model] = ChatOpenAI(model=model, temperature=0)
+    return _chat_models[model]
+
+def _print_cache_stats(cache):
+    if cache is not None:
+        print(f"   🗂️ 도구 캐시: hit {cache.hits} / miss {cache.misses}")
+
+async def _revise_section(agent, system_prompt: str, section: str, instruction: str) -> str:
+    """문항 하나만 HR 작성 지시에 맞춰 다시 작성합니다."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    header = section.splitlines()[0].strip()
+    user_msg = f"""[REVISE]
+아래 문항 하나만 수정하세요. 다른 문항은 작성하지 마세요.
+
+[현재 문항 초안]
+{section}
+
+[작성 지시]
+{instruction}
+"""
+    response = await agent.ainvoke({"messages": [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_msg)
+    ]})
+    revised = response["messages"][-1].content.strip()
+    # 모델이 문항 헤더를 빠뜨리면 원래 헤더를 붙여 이어 붙일 때 순서가 깨지지 않게 합니다.
+    if not SECTION_HEADER.match(revised):
+        revised = f"{header}\n{revised}"
+    return revised
+
 def hr_agent(state: AgentState) -> AgentState:
     """
     HR 에이전트: 실제 LLM 기반 검토 수행 및 태그 부착.
@@ -145,14 +307,17 @@ def hr_agent(state: AgentState) -> AgentState:
     print("--- HR Agent ---")
     
     # mirim/hr_agent.py 호출을 위한 상태 변환 (resume_text -> current_text)
+    draft = resolve(state["resume_text"])
     mirim_state = {
-        "current_text": state["resume_text"],
+        "current_text": draft,
         "retry_count": state["retry_count"]
     }
     
+    scores = None
     try:
         # 실제 HR 에이전트 로직 실행
         result_state = mirim_hr_agent(mirim_state)
+        scores = result_state.get("scores")
         # 결과 매핑 (current_text -> resume_text)
         reviewed_text = result_state["current_text"]
         tag = reviewed_text.splitlines()[0].strip()
@@ -165,9 +330,40 @@ def hr_agent(state: AgentState) -> AgentState:
             
     except Exception as e:
         print(f"HR Agent Error: {e}")
-        reviewed_text = f"[REVISE]\n{e}\n{state['resume_text']}"
-    
-    return {"resume_text": reviewed_text, "retry_count": state["retry_count"]}
+        reviewed_text = f"[REVISE]\n{e}\n{draft}"
+
+    # 점수 이력: 이번 초안이 최고점이면 best_draft로 기억하고, 점수가 정체되면 재시도를 멈춥니다.
+    history = convergence.record_review(state.get("score_history"), state["retry_count"], scores)
+    best_draft = state.get("best_draft")
+    if history[-1]["mean"] is not None and convergence.best_review(history) == len(history) - 1:
+        best_draft = state["resume_text"]
+    stop_reason = None
+    if reviewed_text.startswith("[REVISE]"):
+        stop_reason = convergence.should_stop(history)
+        if stop_reason is None and state["retry_count"] >= MAX_HR_RETRIES:
+            stop_reason = f"retry limit ({MAX_HR_RETRIES})"
+        decision = f"stop: {stop_reason}" if stop_reason else "retry"
+    else:
+        decision = "pass"
+    convergence.log_review(state.get("run_id"), history, decision)
+    current = tracing.current_span()
+    if current is not None:
+        current.set(hr_score=history[-1]["mean"], hr_decision=decision)
+    if scores:
+        print(f"HR Scores: {scores} | 곡선 {convergence.curve(history)} | {decision}")
+
+    return {"resume_text": put_text(reviewed_text), "retry_count": state["retry_count"],
+            "score_history": history, "best_draft": best_draft, "stop_reason": stop_reason}
+
+def final_resume(state: AgentState) -> str:
+    """
+    면접/문서 단계로 넘길 자소서 (참조일 수 있음).
+    HR이 [REVISE]인 채로 끝났으면(점수 정체 / 재시도 한도) 지시문 대신 가장 점수가 높았던 초안을 씁니다.
+    """
+    text = state["resume_text"]
+    if resolve(text).strip().startswith("[REVISE]"):
+        return state.get("best_draft") or state.get("draft_text") or text
+    return text
 
 def interview_agent(state: AgentState) -> AgentState:
     """
@@ -178,8 +374,9 @@ def interview_agent(state: AgentState) -> AgentState:
     # resume_text가 [PASS] 태그를 포함하고 있을 수 있으니, 태그 제거 후 전달하거나 그대로 전달
     # mirim/interview.py는 input 전체를 읽어서 질문 생성하므로 그대로 전달.
     
+    resume = final_resume(state)
     mirim_state = {
-        "current_text": state["resume_text"],
+        "current_text": resolve(resume),
         "retry_count": state["retry_count"]
     }
     
@@ -190,58 +387,71 @@ def interview_agent(state: AgentState) -> AgentState:
     except Exception as e:
         print(f"Interview Agent Error: {e}")
         questions = "Error generating questions."
-    return {"question_text": questions, "resume_text": state["resume_text"], "retry_count": state["retry_count"]}
+    return {"question_text": put_text(questions), "resume_text": resume, "retry_count": state["retry_count"]}
 
 def docs_agent(state: AgentState) -> AgentState:
     """
-    문서 에이전트: 최종 문서화 및 포맷팅 (Google Docs 저장).
+    문서 에이전트: 최종 문서화 및 포맷팅.
+    결과는 출력 싱크(CV_DOCS_SINK)로 저장합니다. 기본은 로컬 파일 + 업로드 큐이므로 원격 API를 기다리지 않습니다.
     """
     print("--- Docs Agent ---")
     
-    resume = state.get('resume_text', '')
-    questions = state.get('question_text', '')
+    resume = resolve(state.get('resume_text', ''))
+    questions = resolve(state.get('question_text', ''))
     
     print(f"Final Resume Length: {len(resume)}")
-    print(f"Final Questions Length: {len(questions)}")
+    print(f"Final Questions Length: {len(questions or '')}")
     
+    artifacts = None
     try:
-        # Google Docs 내용 구성
-        final_content = f"""[최종 자기소개서]
-{resume}
-
-==================================================
-
-[면접 대비 질문 리스트]
-{questions}
-"""
-        # Google Docs 생성
-        # 주의: GoogleDocsMCPServer는 클래스이지만 내부 메서드를 직접 사용합니다.
-        print("Uploading to Google Docs...")
-        docs_server = GoogleDocsMCPServer()
-        doc_id = docs_server._create_google_doc("Generated Resume & Questions", final_content)
+        sink = get_output_sink()
+        key = state.get("doc_key") or state.get("run_id") or "output"
+        # 큐 워커에서는 같은 내용의 저장을 한 번만 수행합니다. (저장 직후 워커가 죽어 다시 실행되는 경우)
+        ledger = effect_ledger()
+        effect_id = hashlib.sha256("\0".join(
+            [key, type(sink).__name__, resume, questions or ""]).encode("utf-8")).hexdigest()
+        result = ledger.effect_result(effect_id) if ledger else None
+        if result is not None:
+            print(f"이미 저장된 결과 (effect {effect_id[:12]}), 저장을 건너뜁니다.")
+        else:
+            if ledger:
+                # 임대를 잃은 뒤에도 이 스레드는 계속 돌 수 있으므로 저장 직전에 임대를 확인합니다.
+                ledger.ensure_lease()
+            result = sink.write(key, resume, questions, metadata={"run_id": state.get("run_id")})
+            if ledger:
+                ledger.record_effect(effect_id, result)
+        artifacts = {**result.get("paths", {}), **({"url": result["url"]} if result.get("url") else {})}
         
-        final_link = f"https://docs.google.com/document/d/{doc_id}/edit"
-        print(f"\n✅ Created Google Doc: {final_link}")
+        print(f"\n✅ Saved: {result['paths']['md']} (+ .docx, .json)")
+        if result.get("url"):
+            print(f"✅ Google Doc: {result['url']}")
+        elif result.get("queued"):
+            print("⏳ Google Docs 업로드는 큐에 추가됨 (python pilsang/output_sink.py --sync)")
         
+    except LeaseLostError:
+        raise
     except Exception as e:
         print(f"Docs Agent Error: {e}")
-        final_link = "Failed to create Google Doc."
     
-    return {"resume_text": resume, "question_text": questions, "retry_count": state["retry_count"]}
+    return {"resume_text": state.get("resume_text", ""), "question_text": state.get("question_text"),
+            "retry_count": state["retry_count"], "artifacts": artifacts}
 
 # --- 라우팅 로직 ---
 
 def route_logic(state: AgentState) -> Literal["mcp_agent", "interview_agent"]:
     """
     HR 에이전트의 출력에 따라 다음 단계를 결정합니다.
-    - [REVISE]이고 retry_count < 5이면 -> mcp_agent
-    - [PASS]이거나 retry_count >= 5이면 -> interview_agent
+    - [REVISE]이고 retry_count < MAX_HR_RETRIES이고 점수가 정체되지 않았으면 -> mcp_agent
+    - [PASS]이거나 retry_count >= MAX_HR_RETRIES이거나 점수가 정체되었으면 -> interview_agent (가장 점수가 높은 초안 사용)
     """
-    text = state["resume_text"]
+    text = resolve(state["resume_text"])
     count = state["retry_count"]
     
     # 생성된 텍스트가 [REVISE]로 시작하는지 확인합니다.
-    if text.strip().startswith("[REVISE]") and count < 5:
+    if text.strip().startswith("[REVISE]") and count < MAX_HR_RETRIES:
+        if state.get("stop_reason"):
+            print(f"--> Stopping retries: {state['stop_reason']}")
+            return "interview_agent"
         print(f"--> Looping back (Retry {count + 1})")
         return "mcp_agent"
     
@@ -255,56 +465,147 @@ def prepare_retry(state: AgentState) -> AgentState:
 
 # --- 그래프 구성 ---
 
-workflow = StateGraph(AgentState)
-
-# 노드 추가
-workflow.add_node("rag_agent", rag_agent)
-workflow.add_node("mcp_agent", mcp_agent)
-workflow.add_node("hr_agent", hr_agent)
-workflow.add_node("prepare_retry", prepare_retry) # 카운팅을 위한 헬퍼 노드
-workflow.add_node("interview_agent", interview_agent)
-workflow.add_node("docs_agent", docs_agent)
-
-# 시작점 설정
-workflow.set_entry_point("rag_agent")
-
-# 엣지 정의
-workflow.add_edge("rag_agent", "mcp_agent")
-workflow.add_edge("mcp_agent", "hr_agent")
-
-# HR 에이전트로부터의 조건부 엣지
-workflow.add_conditional_edges(
-    "hr_agent",
-    route_logic,
-    {
-        "mcp_agent": "prepare_retry", # 재시도 시, 카운트 증가를 위해 prepare_retry로 이동
-        "interview_agent": "interview_agent"
-    }
-)
-
-# prepare_retry에서 mcp_agent로 다시 연결
-workflow.add_edge("prepare_retry", "mcp_agent")
-
-workflow.add_edge("interview_agent", "docs_agent")
-workflow.add_edge("docs_agent", END)
-
-# 컴파일
-app = workflow.compile()
+def build_workflow():
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(AgentState)
+
+    # 노드 추가
+    # 에이전트 노드는 단계별 동시 실행 한도(CV_STAGE_LIMITS) 안에서 실행되고, 노드마다 추적 span이 기록됩니다.
+    workflow.add_node("rag_agent", limit_stage("rag_agent", rag_agent))
+    workflow.add_node("mcp_agent", limit_stage("mcp_agent", mcp_agent))
+    workflow.add_node("hr_agent", limit_stage("hr_agent", hr_agent))
+    workflow.add_node("prepare_retry", limit_stage("prepare_retry", prepare_retry)) # 카운팅을 위한 헬퍼 노드
+    workflow.add_node("interview_agent", limit_stage("interview_agent", interview_agent))
+    workflow.add_node("docs_agent", limit_stage("docs_agent", docs_agent))
+
+    # 시작점 설정
+    workflow.set_entry_point("rag_agent")
+
+    # 엣지 정의
+    workflow.add_edge("rag_agent", "mcp_agent")
+    workflow.add_edge("mcp_agent", "hr_agent")
+
+    # HR 에이전트로부터의 조건부 엣지
+    workflow.add_conditional_edges(
+        "hr_agent",
+        route_logic,
+        {
+            "mcp_agent": "prepare_retry", # 재시도 시, 카운트 증가를 위해 prepare_retry로 이동
+            "interview_agent": "interview_agent"
+        }
+    )
+
+    # prepare_retry에서 mcp_agent로 다시 연결
+    workflow.add_edge("prepare_retry", "mcp_agent")
+
+    workflow.add_edge("interview_agent", "docs_agent")
+    workflow.add_edge("docs_agent", END)
+    return workflow
+
+_checkpointer = None
+_app = None
+
+def get_saver():
+    """실행 상태 저장소 (CV_CHECKPOINT=0이면 None). 그래프를 컴파일하지 않고도 --list 등에서 씁니다."""
+    global _checkpointer
+    if _checkpointer is None:
+        from pilsang.checkpoint import get_checkpointer
+        _checkpointer = get_checkpointer() or False
+    return _checkpointer or None
+
+def get_app():
+    """컴파일된 워크플로우 (처음 호출할 때 한 번 컴파일)"""
+    global _app
+    if _app is None:
+        # 카세트 녹화 / 재생 (CV_CASSETTE_MODE). 추적보다 안쪽에 감싸야 재생된 응답도 span에 기록됨
+        cassette.install()
+        # LLM / 임베딩 호출마다 토큰·비용 span 기록 (CV_TRACE=0이면 끔)
+        tracing.instrument_openai()
+        # 컴파일 (노드마다 상태를 SQLite에 저장 -> 실패 시 --resume으로 이어서 실행)
+        _app = build_workflow().compile(checkpointer=get_saver())
+    return _app
+
+def __getattr__(name):
+    # v_all.app / v_all.checkpointer로 쓰던 코드 호환 (처음 접근할 때 생성)
+    if name == "app":
+        return get_app()
+    if name == "checkpointer":
+        return get_saver()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- 실행 ---
 
+def new_run_state(run_id: str, candidate_id: str = None, doc_key: str = None, github_id: str = None,
+                  posting_source: str = None, question_source: str = None) -> AgentState:
+    """실행 하나의 초기 상태"""
+    return AgentState(resume_text="", question_text=None, retry_count=0, draft_text=None,
+                      run_id=run_id, candidate_id=candidate_id, doc_key=doc_key, github_id=github_id,
+                      posting_source=posting_source, question_source=question_source,
+                      score_history=[], best_draft=None, stop_reason=None, artifacts=None)
+
+def default_doc_key(candidate_id: str, posting_source: str = None) -> str:
+    """문서 키 기본값: 지원자 + 공고 이름 (같은 지원자라도 공고가 다르면 다른 문서를 씁니다)"""
+    posting = posting_source or DEFAULT_POSTING_SOURCE
+    name = os.path.splitext(os.path.basename(posting.rstrip("/")))[0] or posting
+    return f"{candidate_id}:{name}"
+
+async def _find_checkpoint(config: dict, node: str):
+    """실행 기록에서 node 실행 직전의 가장 최근 체크포인트를 찾습니다."""
+    async for snapshot in get_app().aget_state_history(config):
+        if node in snapshot.next:
+            return snapshot.config
+    return None
+
 async def main():
+    parser = argparse.ArgumentParser(description="자소서 멀티 에이전트 워크플로우")
+    parser.add_argument("--resume", metavar="THREAD_ID", help="중단된 실행을 마지막으로 끝난 노드 다음부터 이어서 실행")
+    parser.add_argument("--from", dest="from_node", metavar="NODE", help="--resume과 함께: 지정한 노드부터 다시 실행")
+    parser.add_argument("--list", action="store_true", help="저장된 실행(thread) 목록 보기")
+    args = parser.parse_args()
+
+    if args.list:
+        saver = get_saver()
+        for thread_id, count, last in saver.list_threads() if saver else []:
+            print(f"{thread_id}  체크포인트 {count}개  (마지막 {last})")
+        return
+
     print("Initializing Workflow...")
     
-    initial_state = AgentState(resume_text="", question_text=None, retry_count=0)
+    if args.resume:
+        run_id = args.resume
+        config = {"configurable": {"thread_id": run_id}, "callbacks": tracing.callbacks()}
+        if args.from_node:
+            config = await _find_checkpoint(config, args.from_node)
+            if config is None:
+                print(f"'{args.from_node}' 노드를 실행하기 직전의 체크포인트가 없습니다.")
+                return
+            config["callbacks"] = tracing.callbacks()
+        inputs = None  # 저장된 상태에서 이어서 실행
+        print(f"Resuming run {run_id}" + (f" from {args.from_node}" if args.from_node else ""))
+    else:
+        run_id = uuid.uuid4().hex
+        config = {"configurable": {"thread_id": run_id}, "callbacks": tracing.callbacks()}
+        inputs = new_run_state(run_id, doc_key=os.getenv("CV_DOC_KEY") or default_doc_key(MY_GITHUB_ID))
+        if get_saver():
+            print(f"Run ID: {run_id} (실패 시: python pilsang/v_all.py --resume {run_id})")
     
     # 그래프 실행 (Async)
-    async for output in app.astream(initial_state):
-        for key, value in output.items():
-            print(f"Finished Node: {key}")
-            # print(f"Current State: {value}")
+    try:
+        async for output in get_app().astream(inputs, config):
+            for key, value in output.items():
+                print(f"Finished Node: {key}")
+                # print(f"Current State: {value}")
+    finally:
+        # 지원자 범위 캐시는 candidate_id로 등록되므로 상태에서 찾아 같이 넘겨야 정리 / 저장됩니다.
+        candidate_id = (inputs or {}).get("candidate_id")
+        if inputs is None and get_saver():
+            candidate_id = (await get_app().aget_state(config)).values.get("candidate_id")
+        release_tool_cache(run_id, candidate_id)
             
     print("\nWorkflow Finished.")
+    if tracing.TRACE_ENABLED and os.path.exists(tracing.TRACE_FILE):
+        tracing.print_summary([s for s in tracing.load_spans(tracing.TRACE_FILE) if s["trace_id"] == run_id])
 
 if __name__ == "__main__":
     asyncio.run(main())
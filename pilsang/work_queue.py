@@ -0,0 +1,393 @@
+"""
+SQLite 기반 영속 작업 큐 + 여러 워커 프로세스.
+
+외부 브로커 없이, 공유 파일시스템의 SQLite(WAL) 파일 하나로 여러 코어 / 호스트에 실행을 나눕니다.
+- 작업 키는 batch_runner.job_key(지원자 + 공고)이며 같은 키는 한 번만 들어갑니다. (멱등 enqueue)
+- 워커는 작업을 임대(lease)해서 실행하고, 실행 중에는 주기적으로 임대를 연장합니다.
+  워커가 죽어 임대가 만료되면 다른 워커가 그 작업을 다시 가져가며, 같은 실행 ID(thread_id)의 체크포인트에서 이어서 실행합니다.
+- 실패한 작업은 지수 백오프(CV_QUEUE_BACKOFF * 2^(시도-1), 최대 CV_QUEUE_BACKOFF_MAX초) 후 다시 시도하고,
+  max_attempts를 다 쓰면 dead로 남깁니다.
+- docs_agent의 결과 저장(출력 싱크)은 효과 기록(effects 테이블)으로 같은 내용에 대해 한 번만 수행합니다.
+  (저장 후 체크포인트 전에 워커가 죽어 작업이 다시 실행되어도 같은 결과를 또 올리지 않음)
+  저장 직전에는 임대를 다시 확인(연장)하므로, 임대를 잃은 워커의 스레드에서 아직 돌고 있는 노드는 저장하지 않습니다.
+
+설정: CV_QUEUE_DB (기본 pilsang/queue.db), CV_QUEUE_LEASE (임대 시간, 기본 300초)
+
+실행:
+    python pilsang/work_queue.py enqueue manifest.jsonl           # batch_runner와 같은 매니페스트 형식
+    python pilsang/work_queue.py work --processes 4 --concurrency 2 [--exit-when-empty]
+    python pilsang/work_queue.py status
+    python pilsang/work_queue.py retry                            # dead / failed 작업을 다시 대기열로
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import sqlite3
+import asyncio
+import threading
+import argparse
+import contextlib
+import contextvars
+import multiprocessing
+from typing import Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+QUEUE_DB = os.getenv("CV_QUEUE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "queue.db"))
+LEASE_SECONDS = float(os.getenv("CV_QUEUE_LEASE", "300"))
+BACKOFF_SECONDS = float(os.getenv("CV_QUEUE_BACKOFF", "30"))
+BACKOFF_MAX_SECONDS = float(os.getenv("CV_QUEUE_BACKOFF_MAX", "1800"))
+MAX_ATTEMPTS = int(os.getenv("CV_QUEUE_MAX_ATTEMPTS", "3"))
+POLL_SECONDS = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,                -- queued / leased / done / dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS effects (
+    effect_id TEXT PRIMARY KEY,
+    job_key TEXT,
+    result TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class WorkQueue:
+    """
+    작업 큐. 모든 상태 변경은 BEGIN IMMEDIATE 트랜잭션 하나로 처리하므로
+    여러 프로세스 / 호스트가 같은 파일을 열어도 한 작업은 한 워커만 임대합니다.
+    한 프로세스 안에서는 연결 하나를 여러 스레드(임대 연장, 노드 실행 스레드)가 쓰므로 잠금으로 직렬화합니다.
+    """
+
+    def __init__(self, db_path: str = QUEUE_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+    # --- 생산자 ---
+
+    def enqueue(self, job: dict, max_attempts: int = MAX_ATTEMPTS) -> tuple:
+        """(작업 키, 새로 추가됐는지). 같은 키가 이미 있으면 상태를 바꾸지 않습니다."""
+        from pilsang.batch_runner import job_key
+
+        key = job_key(job)
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (key, payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (key, json.dumps(job, ensure_ascii=False), max_attempts, now, now, now),
+            )
+        return key, cursor.rowcount == 1
+
+    def retry(self, statuses=("dead",)) -> int:
+        """지정한 상태의 작업을 시도 횟수를 초기화해 다시 대기열에 넣습니다."""
+        marks = ",".join("?" for _ in statuses)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status='queued', attempts=0, available_at=?, lease_owner=NULL, lease_expires=NULL, "
+                f"updated_at=? WHERE status IN ({marks})", (time.time(), time.time(), *statuses),
+            )
+        return cursor.rowcount
+
+    # --- 워커 ---
+
+    def claim(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Optional[dict]:
+        """
+        실행할 작업 하나를 임대합니다. 대기 중이면서 백오프가 끝난 작업, 또는 임대가 만료된(워커가 죽은) 작업이 대상입니다.
+        만료된 작업이 시도 횟수를 다 썼으면 dead로 바꾸고 건너뜁니다.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status='dead', last_error=COALESCE(last_error, 'lease expired'), updated_at=? "
+                "WHERE status='leased' AND lease_expires < ? AND attempts >= max_attempts", (now, now),
+            )
+            row = conn.execute(
+                "SELECT key, payload, attempts FROM jobs "
+                "WHERE (status='queued' AND available_at <= ?) OR (status='leased' AND lease_expires < ?) "
+                "ORDER BY available_at LIMIT 1", (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            key, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status='leased', attempts=attempts+1, lease_owner=?, lease_expires=?, updated_at=? "
+                "WHERE key=?", (worker_id, now + lease_seconds, now, key),
+            )
+        return {"key": key, "job": json.loads(payload), "attempt": attempts + 1}
+
+    def heartbeat(self, key: str, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """임대를 연장합니다. 이미 다른 워커에게 넘어갔으면 False."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires=?, updated_at=? WHERE key=? AND status='leased' AND lease_owner=?",
+                (time.time() + lease_seconds, time.time(), key, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, key: str, worker_id: str, result: dict) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status='done', result=?, last_error=NULL, lease_owner=NULL, lease_expires=NULL, "
+                "updated_at=? WHERE key=? AND lease_owner=?",
+                (json.dumps(result, ensure_ascii=False, default=str), time.time(), key, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, key: str, worker_id: str, error: str) -> str:
+        """실패 기록. 시도 횟수가 남았으면 백오프 후 다시 대기열로, 아니면 dead. 바뀐 상태를 돌려줍니다."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE key=? AND lease_owner=?",
+                               (key, worker_id)).fetchone()
+            if row is None:
+                return "lost"
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                status, available_at = "dead", time.time()
+            else:
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** (attempts - 1))
+                status, available_at = "queued", time.time() + delay * random.uniform(0.8, 1.2)
+            conn.execute(
+                "UPDATE jobs SET status=?, available_at=?, last_error=?, lease_owner=NULL, lease_expires=NULL, "
+                "updated_at=? WHERE key=?", (status, available_at, error, time.time(), key),
+            )
+        return status
+
+    # --- 부수 효과 기록 ---
+
+    def effect_result(self, effect_id: str) -> Optional[dict]:
+        rows = self._query("SELECT result FROM effects WHERE effect_id=?", (effect_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def record_effect(self, effect_id: str, job_key: str, result: dict):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO effects (effect_id, job_key, result, created_at) VALUES (?, ?, ?, ?)",
+                         (effect_id, job_key, json.dumps(result, ensure_ascii=False, default=str), time.time()))
+
+    # --- 조회 ---
+
+    def stats(self) -> dict:
+        counts = dict(self._query("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        counts["expired_leases"] = self._query(
+            "SELECT COUNT(*) FROM jobs WHERE status='leased' AND lease_expires < ?", (time.time(),))[0][0]
+        return counts
+
+    def jobs(self, status: str = None, limit: int = 50) -> list:
+        query = "SELECT key, status, attempts, lease_owner, last_error, updated_at FROM jobs"
+        params = ()
+        if status:
+            query, params = query + " WHERE status=?", (status,)
+        rows = self._query(query + " ORDER BY updated_at DESC LIMIT ?", (*params, limit))
+        return [dict(zip(("key", "status", "attempts", "lease_owner", "last_error", "updated_at"), row)) for row in rows]
+
+
+# --- 워커 실행 ---
+
+class LeaseLostError(RuntimeError):
+    """임대가 다른 워커에게 넘어가 이 실행이 더 이상 부수 효과를 내면 안 되는 경우"""
+
+
+class EffectLedger:
+    """
+    임대 중인 작업 하나의 부수 효과 기록.
+    임대를 잃으면 작업 태스크는 취소되지만 스레드에서 실행 중인 동기 노드는 멈추지 않으므로,
+    효과를 실행하기 직전에 ensure_lease()로 임대가 아직 이 워커의 것인지 확인합니다.
+    """
+
+    def __init__(self, queue: WorkQueue, key: str, worker_id: str, lease_seconds: float):
+        self.queue = queue
+        self.key = key
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+
+    def ensure_lease(self):
+        """임대를 연장하면서 소유를 확인합니다. 이미 넘어갔으면 LeaseLostError."""
+        if not self.queue.heartbeat(self.key, self.worker_id, self.lease_seconds):
+            raise LeaseLostError(f"{self.key}: 임대가 다른 워커에게 넘어갔습니다. ({self.worker_id})")
+
+    def effect_result(self, effect_id: str) -> Optional[dict]:
+        return self.queue.effect_result(effect_id)
+
+    def record_effect(self, effect_id: str, result: dict):
+        self.queue.record_effect(effect_id, self.key, result)
+
+
+# 실행 중인 작업의 효과 기록 (작업 태스크와 그 안의 노드 / 스레드로 전달됨)
+_current_ledger = contextvars.ContextVar("work_queue_ledger", default=None)
+
+
+def effect_ledger() -> Optional[EffectLedger]:
+    """큐 워커 안에서 실행 중이면 이 작업의 부수 효과 기록, 아니면 None (docs_agent에서 사용)"""
+    return _current_ledger.get()
+
+
+async def _keep_lease(queue: WorkQueue, key: str, worker_id: str, lease_seconds: float, task: asyncio.Task):
+    while not task.done():
+        await asyncio.sleep(lease_seconds / 3)
+        if not await asyncio.to_thread(queue.heartbeat, key, worker_id, lease_seconds):
+            print(f"[worker {worker_id}] {key}: 임대를 잃어 실행을 중단합니다.")
+            task.cancel()
+            return
+
+
+async def _run_claimed(queue: WorkQueue, claimed: dict, worker_id: str, lease_seconds: float):
+    from pilsang.batch_runner import execute_job
+
+    key = claimed["key"]
+    print(f"[worker {worker_id}] {key}: 시작 (시도 {claimed['attempt']})")
+    # 작업 태스크는 만들 때의 컨텍스트를 복사하므로 이 작업의 효과 기록을 노드에서 꺼낼 수 있습니다.
+    token = _current_ledger.set(EffectLedger(queue, key, worker_id, lease_seconds))
+    try:
+        task = asyncio.create_task(execute_job(claimed["job"]))
+    finally:
+        _current_ledger.reset(token)
+    keeper = asyncio.create_task(_keep_lease(queue, key, worker_id, lease_seconds, task))
+    try:
+        record = await task
+    except asyncio.CancelledError:
+        return  # 임대를 잃음: 새 주인이 체크포인트에서 이어서 실행
+    finally:
+        keeper.cancel()
+    if record["status"] == "done":
+        await asyncio.to_thread(queue.complete, key, worker_id, record)
+        print(f"[worker {worker_id}] {key}: done ({record['elapsed']}s)")
+    else:
+        status = await asyncio.to_thread(queue.fail, key, worker_id, record.get("error") or "failed")
+        print(f"[worker {worker_id}] {key}: failed -> {status} ({record.get('error')})")
+
+
+async def run_worker(worker_id: str, concurrency: int = 1, lease_seconds: float = LEASE_SECONDS,
+                     exit_when_empty: bool = False, db_path: str = QUEUE_DB):
+    """큐에서 작업을 가져와 최대 concurrency개씩 실행합니다."""
+    from concurrent.futures import ThreadPoolExecutor
+    from pilsang.inprocess_mcp import enable_session_pool, close_session_pool
+
+    queue = WorkQueue(db_path)
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max(8, concurrency * 4), thread_name_prefix="cv-node"))
+    enable_session_pool()
+    running = set()
+    try:
+        while True:
+            while len(running) < concurrency:
+                claimed = await asyncio.to_thread(queue.claim, worker_id, lease_seconds)
+                if claimed is None:
+                    break
+                task = asyncio.create_task(_run_claimed(queue, claimed, worker_id, lease_seconds))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if exit_when_empty and not running:
+                stats = await asyncio.to_thread(queue.stats)
+                if not stats.get("queued") and not stats.get("leased"):
+                    break
+            if running:
+                await asyncio.wait(running, timeout=POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(POLL_SECONDS)
+    finally:
+        await asyncio.gather(*running, return_exceptions=True)
+        await close_session_pool()
+        queue.close()
+
+
+def _worker_process(index: int, concurrency: int, lease_seconds: float, exit_when_empty: bool, db_path: str):
+    # 스크립트로 실행하면 이 파일은 __main__이므로, docs_agent가 보는 pilsang.work_queue 모듈 쪽에서 워커를 돌립니다.
+    from pilsang import work_queue
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    asyncio.run(work_queue.run_worker(worker_id, concurrency, lease_seconds, exit_when_empty, db_path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite 작업 큐")
+    parser.add_argument("--db", default=QUEUE_DB, help="큐 파일 (여러 호스트면 공유 파일시스템 경로)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_cmd = commands.add_parser("enqueue", help="매니페스트(JSONL)의 작업을 큐에 추가")
+    enqueue_cmd.add_argument("manifest")
+    enqueue_cmd.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+
+    work_cmd = commands.add_parser("work", help="워커 프로세스 실행")
+    work_cmd.add_argument("--processes", type=int, default=1, help="워커 프로세스 수")
+    work_cmd.add_argument("--concurrency", type=int, default=1, help="프로세스당 동시 작업 수")
+    work_cmd.add_argument("--lease", type=float, default=LEASE_SECONDS, help="임대 시간(초)")
+    work_cmd.add_argument("--exit-when-empty", action="store_true", help="큐가 비면 종료")
+
+    status_cmd = commands.add_parser("status", help="상태별 작업 수와 최근 작업")
+    status_cmd.add_argument("--status", help="특정 상태만 보기")
+
+    retry_cmd = commands.add_parser("retry", help="dead 작업을 다시 대기열로")
+    retry_cmd.add_argument("--include-done", action="store_true", help="끝난 작업도 다시 실행")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        from pilsang.batch_runner import read_manifest
+
+        queue = WorkQueue(args.db)
+        added = sum(queue.enqueue(job, args.max_attempts)[1] for job in read_manifest(args.manifest))
+        print(f"추가 {added}개 (이미 있는 키는 건너뜀) | {queue.stats()}")
+
+    elif args.command == "work":
+        if args.processes == 1:
+            _worker_process(0, args.concurrency, args.lease, args.exit_when_empty, args.db)
+        else:
+            context = multiprocessing.get_context("spawn")
+            processes = [context.Process(target=_worker_process,
+                                         args=(i, args.concurrency, args.lease, args.exit_when_empty, args.db))
+                         for i in range(args.processes)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+    elif args.command == "status":
+        queue = WorkQueue(args.db)
+        print(queue.stats())
+        for job in queue.jobs(args.status):
+            print(f"  {job['status']:<7} {job['key']}  시도 {job['attempts']}  {job['lease_owner'] or ''}  "
+                  f"{(job['last_error'] or '')[:80]}")
+
+    elif args.command == "retry":
+        statuses = ("dead", "done") if args.include_done else ("dead",)
+        print(f"다시 대기열로: {WorkQueue(args.db).retry(statuses)}개")
@@ -0,0 +1,421 @@
+# git_evidence_server.py
+# 목적: 로컬에 clone 해 둔 저장소들의 git 히스토리를 인덱싱하여
+#       "X에 대한 근거 찾아줘" 류의 질문에 네트워크 없이 답하는 MCP 서버.
+#       (원격 server-github 호출 전에 먼저 쓰는 fast path)
+#
+# 실행:
+#   LOCAL_REPOS_DIR=~/code python servers/git_evidence_server.py
+#   python servers/git_evidence_server.py --reindex   # 인덱스만 갱신하고 종료
+#
+# LOCAL_REPOS_DIR: 저장소 경로 또는 저장소들이 들어 있는 상위 폴더 (여러 개는 os.pathsep으로 구분)
+
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import argparse
+import threading
+import subprocess
+
+from mcp.server.fastmcp import FastMCP
+
+# 프로젝트 루트를 sys.path에 추가 (pilsang.server_env import용)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pilsang.server_env import getenv as server_getenv
+
+DEFAULT_DB_PATH = os.getenv(
+    "GIT_EVIDENCE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "git_evidence.db"),
+)
+# 도구 호출 시 HEAD 변경 여부를 다시 확인하는 최소 간격(초)
+REFRESH_INTERVAL = 60
+# 파일 요약을 만들 최대 파일 크기(byte)
+MAX_SUMMARY_FILE_SIZE = 200_000
+# 인덱스 스키마 버전. 올라가면 기존 인덱스를 비우고 다시 만듭니다. (2: 저장소를 이름 대신 경로로 구분)
+SCHEMA_VERSION = 2
+
+LANGUAGES = {
+    ".py": "Python", ".ipynb": "Jupyter", ".js": "JavaScript", ".jsx": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript", ".java": "Java", ".kt": "Kotlin",
+    ".go": "Go", ".rs": "Rust", ".c": "C", ".h": "C", ".cpp": "C++", ".cc": "C++",
+    ".cs": "C#", ".rb": "Ruby", ".php": "PHP", ".swift": "Swift", ".scala": "Scala",
+    ".vue": "Vue", ".html": "HTML", ".css": "CSS", ".scss": "CSS", ".sql": "SQL",
+    ".sh": "Shell", ".md": "Markdown", ".yml": "YAML", ".yaml": "YAML",
+    ".dart": "Dart", ".r": "R", ".m": "Objective-C",
+}
+
+mcp = FastMCP("GitEvidenceServer")
+_last_refresh = 0.0
+# 도구 호출은 스레드에서 동시에 돌 수 있으므로 (섹션별 병렬 수정 등) 재인덱싱은 한 번에 하나만
+_refresh_lock = threading.Lock()
+
+
+# -----------------------------
+# 1) 인덱스 저장소 (SQLite)
+# -----------------------------
+def open_index(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """
+    인덱스 DB를 엽니다. commits / files / FTS 테이블의 repo 열은 저장소 경로(repos.path)이고,
+    이름(basename)은 표시용입니다. (이름이 같은 clone이 여러 개여도 서로 덮어쓰지 않음)
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # 재인덱싱 중에도 다른 연결(검색)이 읽을 수 있도록 WAL 사용
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS repos (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            last_seen_sha TEXT
+        );
+        CREATE TABLE IF NOT EXISTS commits (
+            repo TEXT NOT NULL,
+            sha TEXT NOT NULL,
+            author TEXT,
+            email TEXT,
+            date TEXT,
+            subject TEXT,
+            body TEXT,
+            files TEXT,
+            insertions INTEGER,
+            deletions INTEGER,
+            PRIMARY KEY (repo, sha)
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            repo TEXT NOT NULL,
+            path TEXT NOT NULL,
+            language TEXT,
+            summary TEXT,
+            PRIMARY KEY (repo, path)
+        );
+    """)
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS commits_fts "
+        "USING fts5(repo UNINDEXED, sha UNINDEXED, message, files, tokenize='unicode61')"
+    )
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS files_fts "
+        "USING fts5(repo UNINDEXED, path, summary, tokenize='unicode61')"
+    )
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        # 예전 인덱스(repo = 저장소 이름)는 비우고 다음 갱신 때 처음부터 다시 만듭니다.
+        for table in ("commits", "commits_fts", "files", "files_fts"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("UPDATE repos SET last_seen_sha = NULL")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def repo_labels(conn) -> dict:
+    """저장소 경로 -> 표시 이름. 이름(basename)이 겹치는 저장소는 경로로 표시합니다."""
+    rows = conn.execute("SELECT path, name FROM repos").fetchall()
+    counts = {}
+    for r in rows:
+        counts[r["name"]] = counts.get(r["name"], 0) + 1
+    return {r["path"]: r["name"] if counts[r["name"]] == 1 else r["path"] for r in rows}
+
+
+# -----------------------------
+# 2) git 호출 / 파싱
+# -----------------------------
+def _git(repo_path, *args) -> str:
+    result = subprocess.run(
+        ["git", "-C", repo_path, "-c", "core.quotePath=false", *args],
+        capture_output=True, text=True, encoding="utf-8", errors="replace", check=True,
+    )
+    return result.stdout
+
+
+def find_repos(roots: str) -> list:
+    """LOCAL_REPOS_DIR에서 git 저장소 경로 목록을 찾습니다 (루트 자체 또는 한 단계 아래)."""
+    repos = []
+    for root in filter(None, roots.split(os.pathsep)):
+        root = os.path.abspath(os.path.expanduser(root))
+        if os.path.isdir(os.path.join(root, ".git")):
+            repos.append(root)
+            continue
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if os.path.isdir(os.path.join(path, ".git")):
+                repos.append(path)
+    return repos
+
+
+def parse_git_log(output: str) -> list:
+    """
+    `git log --numstat --format=%x1e%H%x1f%an%x1f%ae%x1f%aI%x1f%s%x1f%b%x1f` 출력을 파싱합니다.
+    커밋마다 헤더(\\x1e로 시작, \\x1f 구분) 뒤에 numstat 줄들이 따라옵니다.
+    """
+    commits = []
+    for record in output.split("\x1e")[1:]:
+        header, _, numstat = record.rpartition("\x1f")
+        sha, author, email, date, subject, body = header.split("\x1f", 5)
+        files, insertions, deletions = [], 0, 0
+        for line in numstat.strip().splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3:
+                continue
+            added, deleted, path = parts
+            files.append(path)
+            # 바이너리 파일은 '-'로 표시됩니다.
+            insertions += int(added) if added.isdigit() else 0
+            deletions += int(deleted) if deleted.isdigit() else 0
+        commits.append({
+            "sha": sha, "author": author, "email": email, "date": date,
+            "subject": subject, "body": body.strip(), "files": files,
+            "insertions": insertions, "deletions": deletions,
+        })
+    return commits
+
+
+def summarize_file(full_path: str) -> str:
+    """파일 첫 부분의 docstring / 주석 / 제목 줄로 짧은 요약을 만듭니다."""
+    try:
+        if os.path.getsize(full_path) > MAX_SUMMARY_FILE_SIZE:
+            return ""
+        with open(full_path, encoding="utf-8", errors="ignore") as f:
+            head = f.read(4000)
+    except OSError:
+        return ""
+
+    lines = []
+    for raw in head.splitlines():
+        line = raw.strip().strip('"\'').lstrip("#/*- ").strip()
+        if not line or line.startswith(("import ", "from ", "package ", "use ")):
+            continue
+        lines.append(line)
+        if len(lines) >= 5:
+            break
+    return " ".join(lines)[:400]
+
+
+# -----------------------------
+# 3) 인덱싱 (last-seen SHA 기준 증분)
+# -----------------------------
+def index_repo(conn, repo_path: str) -> int:
+    """저장소 하나를 인덱싱합니다. 새로 들어온 커밋 수를 반환합니다."""
+    name = os.path.basename(repo_path.rstrip(os.sep))
+    try:
+        head = _git(repo_path, "rev-parse", "HEAD").strip()
+    except subprocess.CalledProcessError:
+        return 0  # 커밋이 없는 저장소
+
+    # 다른 프로세스가 같은 저장소를 동시에 인덱싱하지 않도록 last_seen_sha를 읽기 전에 쓰기 잠금을 잡습니다.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        count = _index_locked(conn, repo_path, name, head)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return count
+
+
+def _index_locked(conn, repo_path: str, name: str, head: str) -> int:
+    row = conn.execute("SELECT last_seen_sha FROM repos WHERE path = ?", (repo_path,)).fetchone()
+    last_seen = row["last_seen_sha"] if row else None
+    if last_seen == head:
+        return 0
+
+    # 히스토리가 다시 쓰였으면(force push 등) 처음부터 다시 인덱싱합니다.
+    if last_seen:
+        check = subprocess.run(
+            ["git", "-C", repo_path, "merge-base", "--is-ancestor", last_seen, head],
+            capture_output=True,
+        )
+        if check.returncode != 0:
+            last_seen = None
+    if not last_seen:
+        for table in ("commits", "commits_fts", "files", "files_fts"):
+            conn.execute(f"DELETE FROM {table} WHERE repo = ?", (repo_path,))
+
+    rev_range = f"{last_seen}..{head}" if last_seen else head
+    log = _git(
+        repo_path, "log", "--numstat", "--no-renames",
+        "--format=%x1e%H%x1f%an%x1f%ae%x1f%aI%x1f%s%x1f%b%x1f", rev_range,
+    )
+    commits = parse_git_log(log)
+    for c in commits:
+        conn.execute(
+            "INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (repo_path, c["sha"], c["author"], c["email"], c["date"], c["subject"], c["body"],
+             "\n".join(c["files"]), c["insertions"], c["deletions"]),
+        )
+        conn.execute(
+            "INSERT INTO commits_fts (repo, sha, message, files) VALUES (?, ?, ?, ?)",
+            (repo_path, c["sha"], f"{c['subject']}\n{c['body']}", " ".join(c["files"])),
+        )
+
+    # 파일 요약: 처음이면 전체, 증분이면 새 커밋에서 바뀐 파일만 갱신
+    tracked = set(_git(repo_path, "ls-files").splitlines())
+    if last_seen:
+        targets = {path for c in commits for path in c["files"]}
+    else:
+        targets = tracked
+    for path in targets:
+        conn.execute("DELETE FROM files WHERE repo = ? AND path = ?", (repo_path, path))
+        conn.execute("DELETE FROM files_fts WHERE repo = ? AND path = ?", (repo_path, path))
+        if path not in tracked:
+            continue  # 삭제된 파일
+        language = LANGUAGES.get(os.path.splitext(path)[1].lower())
+        if not language:
+            continue
+        summary = summarize_file(os.path.join(repo_path, path))
+        conn.execute("INSERT INTO files VALUES (?, ?, ?, ?)", (repo_path, path, language, summary))
+        conn.execute(
+            "INSERT INTO files_fts (repo, path, summary) VALUES (?, ?, ?)",
+            (repo_path, path, summary),
+        )
+
+    conn.execute(
+        "INSERT INTO repos (path, name, last_seen_sha) VALUES (?, ?, ?) "
+        "ON CONFLICT(path) DO UPDATE SET last_seen_sha = excluded.last_seen_sha",
+        (repo_path, name, head),
+    )
+    return len(commits)
+
+
+def refresh_index(db_path: str = DEFAULT_DB_PATH, force: bool = False) -> dict:
+    """
+    LOCAL_REPOS_DIR의 모든 저장소를 증분 인덱싱하고 {저장소 경로: 새 커밋 수}를 돌려줍니다.
+    (REFRESH_INTERVAL 안에서는 생략. 동시에 불리면 먼저 온 호출이 끝날 때까지 기다렸다가 그 결과를 씁니다.)
+    """
+    global _last_refresh
+    with _refresh_lock:
+        if not force and time.monotonic() - _last_refresh < REFRESH_INTERVAL:
+            return {}
+        conn = open_index(db_path)
+        try:
+            stats = {}
+            for repo_path in find_repos(server_getenv("LOCAL_REPOS_DIR", "")):
+                stats[repo_path] = index_repo(conn, repo_path)
+        finally:
+            conn.close()
+        _last_refresh = time.monotonic()
+        return stats
+
+
+def _fts_query(query: str) -> str:
+    terms = [t.replace('"', "") for t in query.split()]
+    return " OR ".join(f'"{t}"*' for t in terms if t)
+
+
+# -----------------------------
+# 4) MCP 도구
+# -----------------------------
+@mcp.tool()
+async def find_evidence(query: str, limit: int = 10, author: str = "") -> str:
+    """
+    로컬 git 히스토리에서 주제(query)에 대한 근거를 찾습니다.
+    커밋 메시지/변경 파일과 파일 요약을 검색하여 커밋(SHA, 날짜, 변경량)과 관련 파일을 돌려줍니다.
+    author를 주면 해당 작성자(이름 또는 이메일 일부)의 커밋만 봅니다.
+    GitHub 원격 검색보다 먼저 사용하세요.
+    """
+    # in-process로 붙었을 때 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+    return await asyncio.to_thread(_find_evidence, query, limit, author)
+
+
+def _find_evidence(query: str, limit: int, author: str) -> str:
+    refresh_index()
+    conn = open_index()
+    try:
+        match = _fts_query(query)
+        if not match:
+            return "검색어가 비어 있습니다."
+
+        labels = repo_labels(conn)
+        lines = ["[커밋 근거]"]
+        rows = conn.execute(
+            "SELECT c.* FROM commits_fts f JOIN commits c ON c.repo = f.repo AND c.sha = f.sha "
+            "WHERE commits_fts MATCH ? AND (? = '' OR c.author LIKE ? OR c.email LIKE ?) "
+            "ORDER BY bm25(commits_fts) LIMIT ?",
+            (match, author, f"%{author}%", f"%{author}%", limit),
+        ).fetchall()
+        for r in rows:
+            files = r["files"].splitlines()
+            shown = ", ".join(files[:5]) + (f" 외 {len(files) - 5}개" if len(files) > 5 else "")
+            lines.append(
+                f"- {labels.get(r['repo'], r['repo'])}@{r['sha'][:8]} ({r['date'][:10]}, {r['author']}) {r['subject']}\n"
+                f"  +{r['insertions']}/-{r['deletions']} | {shown}"
+            )
+
+        lines.append("\n[관련 파일]")
+        rows = conn.execute(
+            "SELECT f.repo, f.path, fi.language, fi.summary FROM files_fts f "
+            "JOIN files fi ON fi.repo = f.repo AND fi.path = f.path "
+            "WHERE files_fts MATCH ? ORDER BY bm25(files_fts) LIMIT ?",
+            (match, limit),
+        ).fetchall()
+        for r in rows:
+            lines.append(f"- {labels.get(r['repo'], r['repo'])}/{r['path']} ({r['language']}): {r['summary']}")
+
+        if len(lines) == 2:
+            return "검색 결과가 없습니다."
+        return "\n".join(lines)
+    finally:
+        conn.close()
+
+
+@mcp.tool()
+async def repo_overview(repo: str = "") -> str:
+    """
+    인덱싱된 저장소의 개요(언어 비중, 커밋 수, 변경이 많은 파일)를 돌려줍니다.
+    repo는 저장소 이름 또는 경로이며, 비우면 모든 저장소를 요약합니다.
+    """
+    return await asyncio.to_thread(_repo_overview, repo)
+
+
+def _repo_overview(repo: str) -> str:
+    refresh_index()
+    conn = open_index()
+    try:
+        labels = repo_labels(conn)
+        repo_paths = [path for path, label in labels.items()
+                      if not repo or repo in (label, path, os.path.basename(path))]
+        if not repo_paths:
+            if repo:
+                return f"'{repo}' 저장소가 인덱스에 없습니다."
+            return "인덱싱된 저장소가 없습니다. LOCAL_REPOS_DIR를 확인하세요."
+
+        blocks = []
+        for repo_path in sorted(repo_paths, key=labels.get):
+            count = conn.execute(
+                "SELECT COUNT(*), MIN(date), MAX(date) FROM commits WHERE repo = ?", (repo_path,)
+            ).fetchone()
+            langs = conn.execute(
+                "SELECT language, COUNT(*) AS n FROM files WHERE repo = ? "
+                "GROUP BY language ORDER BY n DESC LIMIT 5", (repo_path,)
+            ).fetchall()
+            churn = {}
+            for r in conn.execute("SELECT files FROM commits WHERE repo = ?", (repo_path,)):
+                for path in r["files"].splitlines():
+                    churn[path] = churn.get(path, 0) + 1
+            top = sorted(churn, key=churn.get, reverse=True)[:5]
+            blocks.append(
+                f"## {labels[repo_path]}\n"
+                f"- 커밋 {count[0]}개 ({(count[1] or '')[:10]} ~ {(count[2] or '')[:10]})\n"
+                f"- 언어: {', '.join(f'{l[0]}({l[1]})' for l in langs) or '없음'}\n"
+                f"- 자주 바뀐 파일: {', '.join(top) or '없음'}"
+            )
+        return "\n\n".join(blocks)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 git 히스토리 근거 검색 MCP 서버")
+    parser.add_argument("--reindex", action="store_true", help="인덱스만 갱신하고 종료")
+    args = parser.parse_args()
+
+    if args.reindex:
+        result = refresh_index(force=True)
+        for path, n in result.items():
+            print(f"   📦 {path}: 새 커밋 {n}개")
+        print(f"✅ 인덱싱 완료: 저장소 {len(result)}개")
+    else:
+        mcp.run()